@@ -0,0 +1,31 @@
+from fastapi import HTTPException
+
+from app.core.artifacts import ArtifactNotFound, artifact_store
+
+# 단계별 artifact 이름
+STOCKS = "stocks"
+VOLUMES = "volumes"
+CMP = "cmp"
+CANDIDATES = "candidates"
+HORIZONS = "horizons"
+STATEMENTS = "statements"
+RATIOS = "ratios"
+
+def resolve_data(data, artifact_id, *stages):
+    """요청에 직접 담긴 data가 있으면 그대로, 없으면 artifact 저장소에서 꺼낸다."""
+    if data is not None:
+        return data
+    try:
+        return artifact_store.get(artifact_id, stages)
+    except ArtifactNotFound:
+        raise HTTPException(status_code=404, detail=f"artifact({artifact_id})가 없거나 만료되었습니다.")
+
+def store_artifact(stage: str, value) -> str:
+    return artifact_store.put(stage, value)
+
+def artifact_exists(artifact_id: str) -> bool:
+    try:
+        artifact_store.get(artifact_id)
+        return True
+    except ArtifactNotFound:
+        return False
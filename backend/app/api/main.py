@@ -1,4 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.core.metrics import render_metrics
+from app.core.warmup import warmup
 
 api_router = APIRouter()
 
@@ -9,3 +13,14 @@ api_router = APIRouter()
 @api_router.get("/health", tags=["health"])
 async def health_check():
     return {"status": "ok"}
+
+@api_router.get("/ready", tags=["health"])
+async def readiness_check():
+    """warm-up(서비스 준비, 기업 코드, 주가 패널, 거래일 캘린더)이 끝나면 200, 진행 중이면 503"""
+    state = warmup.snapshot()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@api_router.get("/metrics", tags=["health"], include_in_schema=False)
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭 (라우트/외부 호출/단계별 시간, 캐시 적중, 실행기 대기열)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
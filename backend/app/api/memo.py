@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, Optional, Union
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.api import artifacts
+from app.core.cache import MemoryCache
+from app.core.config import settings
+
+
+class RouteMemo:
+    """요청 본문만으로 결과가 정해지는 라우트의 응답을 요청 내용 해시로 메모이즈한다.
+
+    ETag는 요청 해시로 만들고, If-None-Match가 같고 캐시된 응답이 살아 있으면 계산 없이 304를 돌려준다.
+    응답에 담긴 artifact가 만료되었으면 캐시된 응답도 버리고 다시 계산한다.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._cache = MemoryCache(max_entries, max_bytes)
+        self._locks: Dict[tuple, list] = {}
+
+    async def respond(self, request: Request, route: str, body: BaseModel,
+                      compute: Callable[[], Awaitable[Union[Response, BaseModel]]]) -> Response:
+        key = (route, self.request_hash(body))
+        etag = f'"{route}-{key[1][:32]}"'
+
+        entry = self._get_valid(key)
+        if entry is None:
+            # 같은 본문이 동시에 들어오면 하나만 계산한다 (이벤트 루프 안에서만 접근하므로 락 목록 자체는 보호하지 않음)
+            lock = self._locks.setdefault(key, [asyncio.Lock(), 0])
+            lock[1] += 1
+            try:
+                async with lock[0]:
+                    entry = self._get_valid(key)
+                    if entry is None:
+                        self._cache.record(key, hit=False)
+                        entry = self._render(await compute())
+                        if entry['status_code'] == 200:
+                            self._cache.set(key, entry, ttl=self.ttl_seconds)
+                        return self._response(entry, etag, 'MISS')
+            finally:
+                lock[1] -= 1
+                if lock[1] == 0:
+                    del self._locks[key]
+
+        self._cache.record(key, hit=True)
+        if etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=304, headers={'ETag': etag, 'X-Cache': 'HIT'})
+        return self._response(entry, etag, 'HIT')
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    def request_hash(self, body: BaseModel) -> str:
+        # 필드 순서/공백과 무관하도록 정렬된 JSON으로 정규화한 뒤 해시
+        payload = orjson.dumps(body.model_dump(mode='json'), option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+
+    def _get_valid(self, key: tuple) -> Optional[dict]:
+        entry = self._cache.get(key)
+        if entry is not None and entry['artifact_id'] and not artifacts.artifact_exists(entry['artifact_id']):
+            self._cache.delete(key)
+            return None
+        return entry
+
+    def _render(self, result: Union[Response, BaseModel]) -> dict:
+        if isinstance(result, BaseModel):
+            result = Response(content=result.model_dump_json(), media_type='application/json')
+        return {
+            'status_code': result.status_code,
+            'body': result.body,
+            'media_type': result.media_type,
+            'artifact_id': result.headers.get('x-artifact-id')
+        }
+
+    def _response(self, entry: dict, etag: str, cache_status: str) -> Response:
+        headers = {'ETag': etag, 'X-Cache': cache_status}
+        if entry['artifact_id']:
+            headers['X-Artifact-Id'] = entry['artifact_id']
+        return Response(content=entry['body'], status_code=entry['status_code'], media_type=entry['media_type'], headers=headers)
+
+
+route_memo = RouteMemo(
+    max_entries=settings.ROUTE_MEMO_MAX_ENTRIES,
+    max_bytes=settings.ROUTE_MEMO_MAX_BYTES,
+    ttl_seconds=settings.ROUTE_MEMO_TTL_SECONDS
+)
@@ -0,0 +1,127 @@
+"""저장된 결과(artifact)를 페이지 단위로, 필요한 기업/지표/날짜/컬럼만 잘라 읽는다.
+
+투자지표 패널(기업 x 지표 x 날짜)은 기업 단위로 페이지를 나눠 한 기업의 지표 행이 두 페이지에 걸치지 않게 하고,
+그 밖의 표(주가 목록, 기업 코드 목록)는 행 단위로 나눈다. artifact는 내용 해시 id라 바뀌지 않으므로
+커서는 위치(offset)만 담고, 다른 행 필터로 커서를 재사용하지 못하도록 필터 해시를 함께 넣는다.
+"""
+import base64
+import hashlib
+from typing import List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Query
+
+from app.core.config import settings
+from app.schemas.page import PageInfo
+
+META_COLUMNS = ['corp_name', 'type']
+
+
+class PageQuery:
+    """페이지/필터 쿼리 (?cursor=&limit=&corp=&type=&date_from=&date_to=&columns=)"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="이전 응답의 page.next_cursor"),
+        limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT,
+                                     description="페이지 크기 (투자지표 패널은 기업 수, 그 밖에는 행 수)"),
+        corp: Optional[List[str]] = Query(None, description="기업 이름/종목코드 (여러 번 지정 가능)"),
+        type: Optional[List[str]] = Query(None, description="투자지표 패널의 지표 (closingPrice, PER, PBR, ...)"),
+        date_from: Optional[str] = Query(None, pattern=r"^\d{8}$", description="투자지표 패널 날짜 시작 (YYYYMMDD, 포함)"),
+        date_to: Optional[str] = Query(None, pattern=r"^\d{8}$", description="투자지표 패널 날짜 끝 (YYYYMMDD, 포함)"),
+        columns: Optional[List[str]] = Query(None, description="남길 컬럼 (주가/기업 코드 목록)"),
+    ):
+        self.cursor = cursor
+        # 커서만 주면 기본 크기로 이어 읽고, 필터만 주면 조건에 맞는 전체를 돌려준다
+        self.limit = limit or (settings.PAGE_DEFAULT_LIMIT if cursor is not None else None)
+        self.corp = corp
+        self.type = type
+        self.date_from = date_from
+        self.date_to = date_to
+        self.columns = columns
+        # 아무것도 주지 않으면 지금처럼 전체를 그대로 돌려준다
+        self.active = any(value is not None for value in (cursor, limit, corp, type, date_from, date_to, columns))
+
+    def filter_hash(self) -> str:
+        # 행을 고르는 필터만 넣는다 (날짜 범위/컬럼은 스크롤 중에 바꿔도 된다)
+        filters = [self.corp, self.type]
+        return hashlib.sha256(orjson.dumps(filters)).hexdigest()[:8]
+
+    def offset(self) -> int:
+        if self.cursor is None:
+            return 0
+        try:
+            offset, filter_hash = orjson.loads(base64.urlsafe_b64decode(self.cursor.encode() + b'=' * (-len(self.cursor) % 4)))
+        except Exception:
+            raise HTTPException(status_code=400, detail="cursor를 읽을 수 없습니다.")
+        if filter_hash != self.filter_hash():
+            raise HTTPException(status_code=400, detail="cursor를 만든 요청과 필터(corp/type)가 다릅니다.")
+        return max(int(offset), 0)
+
+    def bounds(self, total: int) -> Tuple[int, int]:
+        offset = self.offset()
+        return offset, offset + (self.limit or total)
+
+    def page_info(self, offset: int, end: int, total: int) -> PageInfo:
+        next_cursor = None
+        if end < total:
+            next_cursor = base64.urlsafe_b64encode(orjson.dumps([end, self.filter_hash()])).decode().rstrip('=')
+        return PageInfo(total=total, limit=end - offset, next_cursor=next_cursor)
+
+
+def page_headers(page: Optional[PageInfo]) -> dict:
+    if page is None:
+        return {}
+    headers = {"X-Total-Count": str(page.total)}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    return headers
+
+
+def page_ratio_panel(df, query: PageQuery) -> Tuple["pd.DataFrame", PageInfo]:
+    """투자지표 패널에서 조건에 맞는 기업을 저장 순서대로 limit개만 골라, 그 행과 요청한 날짜 컬럼만 꺼낸다."""
+    import numpy as np
+    import pandas as pd
+
+    corp_names = df['corp_name'].to_numpy()
+    mask = np.ones(len(df), dtype=bool)
+    if query.corp:
+        mask &= np.isin(corp_names, query.corp)
+    if query.type:
+        mask &= np.isin(df['type'].to_numpy(), query.type)
+
+    companies = pd.unique(corp_names[mask])
+    offset, end = query.bounds(len(companies))
+    page_companies = companies[offset:end]
+    rows = np.flatnonzero(mask & np.isin(corp_names, page_companies))
+
+    date_cols = [col for col in df.columns if str(col).isdigit() and len(str(col)) == 8
+                 and (query.date_from is None or str(col) >= query.date_from)
+                 and (query.date_to is None or str(col) <= query.date_to)]
+    date_cols.sort(key=str)
+    # 페이지에 들어갈 행/컬럼만 복사한다
+    page = df.iloc[rows, [df.columns.get_loc(col) for col in META_COLUMNS + date_cols]].reset_index(drop=True)
+    return page, query.page_info(offset, end, len(companies))
+
+
+def page_frame(df, query: PageQuery, key_columns: Sequence[str]) -> Tuple["pd.DataFrame", PageInfo]:
+    """행 단위 표에서 key_columns 중 하나가 corp에 맞는 행을 limit개만 골라, 요청한 컬럼만 꺼낸다."""
+    import numpy as np
+
+    mask = np.ones(len(df), dtype=bool)
+    if query.corp:
+        mask = np.zeros(len(df), dtype=bool)
+        for column in key_columns:
+            mask |= df[column].astype(str).isin(query.corp).to_numpy()
+
+    columns = list(df.columns)
+    if query.columns:
+        unknown = [column for column in query.columns if column not in columns]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"없는 컬럼입니다: {unknown} (가능한 컬럼: {columns})")
+        columns = [column for column in columns if column in query.columns]
+
+    rows = np.flatnonzero(mask)
+    offset, end = query.bounds(len(rows))
+    page = df.iloc[rows[offset:end], [df.columns.get_loc(column) for column in columns]]
+    return page.reset_index(drop=True), query.page_info(offset, end, len(rows))
@@ -0,0 +1,123 @@
+from typing import Any, Optional, Union, get_args, get_origin
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.api.paging import page_headers, page_ratio_panel
+from app.core.lazy import lazy_service
+from app.core.metrics import timed_stage
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+RATIO_PANEL_MEDIA_TYPE = "application/vnd.quantus.ratio-panel+json"
+
+# pandas/pyarrow는 첫 사용 때 불러온다
+ratio_panel_service = lazy_service("app.service.ratio_panel:RatioPanelService")
+
+class FrameJSONResponse(Response):
+    """서비스가 직접 만든 결과를 Pydantic 재검증 없이 바로 JSON bytes로 직렬화하는 응답.
+
+    DataFrame은 컬럼 단위로 records 배열을 만들어 orjson으로 직렬화한다.
+    라우트의 response_model은 그대로 두므로 OpenAPI 스키마는 바뀌지 않는다.
+    """
+    media_type = "application/json"
+
+    @timed_stage("encode_json", rows=None)
+    def render(self, content: Any) -> bytes:
+        if not isinstance(content, dict):
+            return _dumps(content)
+        parts = [_dumps(key) + b":" + _dumps(value) for key, value in content.items()]
+        return b"{" + b",".join(parts) + b"}"
+
+def frame_response(**content) -> FrameJSONResponse:
+    return FrameJSONResponse(content=content, headers=_headers(content.get("artifact_id"), content.get("page")) or None)
+
+def project_frame(df, model):
+    """응답 스키마에 정의된 컬럼만 남기고 int/float/str 필드는 스키마 타입으로 맞춘다.
+
+    검증 없이 직렬화하므로 스키마 밖 컬럼이 새거나 int 필드가 123.0처럼 나가지 않게 한다 (Pydantic 검증 때와 같은 값).
+    """
+    df = df.filter(items=list(model.model_fields))
+    casts = {}
+    for name, field in model.model_fields.items():
+        if name not in df.columns:
+            continue
+        column = df[name]
+        kind = _scalar_type(field.annotation)
+        if kind is int and column.dtype.kind == 'f':
+            if column.isna().any():
+                # 결측이 있으면 int64로 바꿀 수 없으므로 값마다 int/None으로 둔다
+                casts[name] = column.astype(object).where(column.notna(), None).map(lambda value: value if value is None else int(value))
+            else:
+                casts[name] = column.astype('int64')
+        elif kind is float and column.dtype.kind in 'iub':
+            casts[name] = column.astype('float64')
+        elif kind is str and column.dtype.kind in 'iuf':
+            casts[name] = column.astype(str)
+    return df.assign(**casts) if casts else df
+
+def _scalar_type(annotation):
+    # Optional[int] 같은 경우 None을 뺀 타입 하나만 본다
+    args = [arg for arg in get_args(annotation) if arg is not type(None)] if get_origin(annotation) is Union else [annotation]
+    return args[0] if len(args) == 1 and args[0] in (int, float, str) else None
+
+def _dumps(value: Any) -> bytes:
+    import pandas as pd
+    if isinstance(value, pd.DataFrame):
+        value = _frame_records(value)
+    # NaN은 null로 직렬화된다
+    return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def _frame_records(df) -> list:
+    # 컬럼 단위 tolist()로 numpy 값을 한 번에 파이썬 값으로 바꾼 뒤 행으로 묶는다 (to_dict(orient='records')보다 빠름)
+    columns = [str(col) for col in df.columns]
+    return [dict(zip(columns, row)) for row in zip(*(df[col].tolist() for col in df.columns))]
+
+def _default(value: Any):
+    import numpy as np
+    import pandas as pd
+    if isinstance(value, pd.DataFrame):
+        return _frame_records(value)
+    if isinstance(value, pd.Series):
+        return value.to_dict()
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode='json')
+    raise TypeError(f"JSON으로 직렬화할 수 없는 타입입니다: {type(value)}")
+
+def negotiate_panel_format(request: Request, requested: Optional[str] = None) -> str:
+    """?format= 또는 Accept 헤더로 투자지표 패널 응답 형식(rows / columnar / arrow)을 결정한다."""
+    if requested:
+        return requested
+    accept = request.headers.get("accept", "")
+    if ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    if RATIO_PANEL_MEDIA_TYPE in accept:
+        return "columnar"
+    return "rows"
+
+def ratio_panel_response(df, panel_format: str, artifact_id: Optional[str] = None, page=None) -> Response:
+    headers = _headers(artifact_id, page) or None
+    if panel_format == "arrow":
+        # Arrow 응답의 페이지 정보는 X-Total-Count / X-Next-Cursor 헤더로만 보낸다
+        return Response(content=ratio_panel_service.to_arrow(df), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    content = {"data": ratio_panel_service.to_panel(df), "artifact_id": artifact_id}
+    if page is not None:
+        content["page"] = page
+    return FrameJSONResponse(content=content, media_type=RATIO_PANEL_MEDIA_TYPE, headers=headers)
+
+def ratio_page_response(request: Request, df, page_query, response_format: Optional[str] = None,
+                        artifact_id: Optional[str] = None) -> Response:
+    """투자지표 패널을 요청한 형식으로 돌려준다. 페이지/필터 쿼리가 있으면 해당 부분만 잘라 page 정보와 함께 보낸다."""
+    page = None
+    if page_query.active:
+        df, page = page_ratio_panel(df, page_query)
+    panel_format = negotiate_panel_format(request, response_format)
+    if panel_format != "rows":
+        return ratio_panel_response(df, panel_format, artifact_id, page)
+    return frame_response(data=df, artifact_id=artifact_id, **({"page": page} if page is not None else {}))
+
+def _headers(artifact_id: Optional[str], page=None) -> dict:
+    headers = {"X-Artifact-Id": artifact_id} if artifact_id else {}
+    headers.update(page_headers(page))
+    return headers
@@ -1,67 +1,98 @@
-from fastapi import APIRouter, HTTPException
-from app.service.dart_api import DartApi
-from fastapi.logger import logger
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+import logging
+from typing import Literal, Optional
+from pydantic import ValidationError
 
 from app.schemas.financial import FinancialStatementRequest, FinancialStatementResponse
-from app.service.back_test import BackTestService
-from app.schemas.backtest import BackTestRequest, TestDataResponse, TestDataRequest, BackTestAnalysis
+from app.schemas.backtest import BackTestRequest, TestDataResponse, TestDataRequest, BackTestAnalysis, ScreeningCriteria
 from app.schemas.invest_idx import RatioRow
+from app.api.responses import ARROW_MEDIA_TYPE, ratio_page_response, ratio_panel_service
+from app.api import artifacts
+from app.api.paging import PageQuery
+from app.core.runtime import run_io, run_cpu
+from app.core.lazy import lazy_import, lazy_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/backtest")
-backtest_service = BackTestService()
+backtest_service = lazy_service("app.service.back_test:BackTestService")
+tasks = lazy_import("app.service.tasks")
 
 @router.post("/generate", response_model=TestDataResponse)
-async def generate_test_data(testdata_request : TestDataRequest):
-  test_data = backtest_service.generate_test_data(testdata_request.data, testdata_request.start_date, testdata_request.end_date, testdata_request.test_case)
-  
-  ratio_rows = []
-  for _, row in test_data.iterrows():
-    corp_name = row['corp_name']
-    type_name = row['type']
-    date_values = {col: row[col] for col in test_data.columns if col not in ['corp_name', 'type']}
-    ratio_rows.append(RatioRow(corp_name=corp_name, type=type_name, **date_values))
-  
-  return TestDataResponse(data=ratio_rows)
+async def generate_test_data(testdata_request : TestDataRequest, request: Request,
+                             response_format: Optional[Literal["rows", "columnar", "arrow"]] = Query(None, alias="format"),
+                             page_query: PageQuery = Depends()):
+  data = artifacts.resolve_data(testdata_request.data, testdata_request.artifact_id, artifacts.STOCKS, artifacts.VOLUMES)
+  test_data = await run_io(backtest_service.generate_test_data, data, testdata_request.start_date, testdata_request.end_date, testdata_request.test_case)
+  artifact_id = artifacts.store_artifact(artifacts.RATIOS, test_data)
+  # ?limit= 이 있으면 첫 페이지만 보내고, 나머지는 GET /backtest/generate/{artifact_id}로 이어 읽는다
+  return await run_io(ratio_page_response, request, test_data, page_query, response_format, artifact_id)
+
+@router.get("/generate/{artifact_id}", response_model=TestDataResponse)
+async def get_test_data_page(artifact_id: str, request: Request,
+                             response_format: Optional[Literal["rows", "columnar", "arrow"]] = Query(None, alias="format"),
+                             page_query: PageQuery = Depends()):
+  """저장된 테스트 데이터(투자지표 패널)를 기업/지표/날짜 범위로 잘라 페이지 단위로 읽는다"""
+  test_data = artifacts.resolve_data(None, artifact_id, artifacts.RATIOS)
+  return await run_io(ratio_page_response, request, ratio_panel_service.to_frame(test_data), page_query, response_format, artifact_id)
 
 @router.post("/start")
 async def start_backtest(backtest_request : BackTestRequest):
-  print(backtest_request)
+  logger.debug("백테스트 요청: top_n=%d, initial_capital=%d, 기준=%s, 테스트 데이터 %s",
+               backtest_request.top_n, backtest_request.initial_capital, backtest_request.screening_criteria,
+               backtest_request.test_data_artifact_id or "요청 본문")
   
-  # RatioRow 리스트를 DataFrame으로 변환
-  import pandas as pd
+  # 행 목록 / columnar 패널 모두 DataFrame으로 변환
+  test_data = artifacts.resolve_data(backtest_request.test_data, backtest_request.test_data_artifact_id, artifacts.RATIOS)
+  test_data_df = ratio_panel_service.to_frame(test_data)
   
-  # 테스트 데이터를 DataFrame으로 변환
-  test_data_records = []
-  for ratio_row in backtest_request.test_data:
-    row_dict = {
-      '종목명': ratio_row.corp_name,  # 백테스트 서비스에서 기대하는 컬럼명
-      '구분': ratio_row.type          # 백테스트 서비스에서 기대하는 컬럼명
-    }
-    # 날짜 필드들 추가 (RatioRow의 모든 필드 확인)
-    ratio_row_dict = ratio_row.model_dump()  # Pydantic 모델을 딕셔너리로 변환
-    for key, value in ratio_row_dict.items():
-      if key not in ['corp_name', 'type']:
-        row_dict[key] = value
-    test_data_records.append(row_dict)
+  # ScreeningCriteria 객체를 딕셔너리로 변환
+  screening_criteria_dict = backtest_request.screening_criteria.model_dump()
   
-  test_data_df = pd.DataFrame(test_data_records)
+  return await _run_backtest(test_data_df, backtest_request.initial_capital, backtest_request.top_n, screening_criteria_dict)
+
+@router.post("/start/arrow")
+async def start_backtest_arrow(request: Request):
+  """Arrow IPC stream으로 테스트 데이터를 받는 백테스트 실행.
+
+  screening_criteria, top_n, initial_capital은 Arrow 스키마 메타데이터에 JSON으로 담는다.
+  """
+  if ARROW_MEDIA_TYPE not in request.headers.get("content-type", ""):
+    raise HTTPException(status_code=415, detail=f"Content-Type은 {ARROW_MEDIA_TYPE} 이어야 합니다.")
+
+  try:
+    test_data_df, metadata = await run_io(ratio_panel_service.from_arrow, await request.body())
+    screening_criteria = ScreeningCriteria(**metadata.get("screening_criteria", {}))
+    # 나머지 파라미터는 BackTestRequest와 같은 규칙으로 검증
+    params = BackTestRequest(
+      test_data=[],
+      screening_criteria=screening_criteria,
+      top_n=metadata.get("top_n"),
+      **({"initial_capital": metadata["initial_capital"]} if "initial_capital" in metadata else {})
+    )
+  except ValidationError as e:
+    raise HTTPException(status_code=422, detail=json.loads(e.json()))
+  except Exception as e:
+    logger.error(f"Arrow 데이터 변환 중 오류 발생: {str(e)}")
+    raise HTTPException(status_code=400, detail="Arrow 데이터를 읽을 수 없습니다.")
+
+  return await _run_backtest(test_data_df, params.initial_capital, params.top_n, screening_criteria.model_dump())
+
+async def _run_backtest(test_data_df, initial_capital: int, top_n: int, screening_criteria_dict: dict):
+  # 백테스트 서비스에서 기대하는 컬럼명으로 변경
+  test_data_df = test_data_df.rename(columns={'corp_name': '종목명', 'type': '구분'})
   
-  # 디버깅: 변환된 데이터 확인
-  print(f"🔍 변환된 데이터 정보:")
-  print(f"   - shape: {test_data_df.shape}")
-  print(f"   - 컬럼명: {test_data_df.columns.tolist()}")
-  if not test_data_df.empty:
-    print(f"   - 첫 번째 행: {test_data_df.iloc[0].to_dict()}")
+  if test_data_df.empty:
+    logger.warning("백테스트 테스트 데이터가 비어있습니다.")
   else:
-    print("   - 데이터가 비어있습니다!")
-  
-  # ScreeningCriteria 객체를 딕셔너리로 변환
-  screening_criteria_dict = backtest_request.screening_criteria.model_dump()
+    logger.debug("백테스트 테스트 데이터: shape=%s", test_data_df.shape)
   
-  result = backtest_service.run_monthly_rebalancing_backtest(
+  result = await run_cpu(
+    tasks.run_monthly_rebalancing_backtest,
     test_data_df, 
-    backtest_request.initial_capital, 
-    backtest_request.top_n, 
+    initial_capital, 
+    top_n, 
     screening_criteria_dict
   )
-  return result
\ No newline at end of file
+  return result
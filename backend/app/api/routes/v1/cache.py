@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+
+from app.api.memo import route_memo
+from app.core import cache
+from app.core.artifacts import artifact_store
+
+router = APIRouter(prefix="/cache")
+
+@router.get("/stats")
+async def get_cache_stats():
+    """라우트 메모이즈 / 서비스 캐시의 namespace별 적중률과 artifact 저장소 상태"""
+    return {
+        "routes": route_memo.stats(),
+        "services": cache.shared_cache.stats(),
+        "artifacts": artifact_store.stats()
+    }
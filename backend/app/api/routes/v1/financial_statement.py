@@ -1,20 +1,38 @@
-from fastapi import APIRouter, HTTPException
-from app.service.dart_api import DartApi
-from fastapi.logger import logger
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.api.responses import frame_response
+from app.api import artifacts
+from app.api.paging import PageQuery, page_frame
+from app.core.runtime import run_io
+from app.core.lazy import lazy_service
+import logging
 
-from app.schemas.financial import FinancialStatementRequest, FinancialStatementResponse
+from app.schemas.financial import FinancialStatementRequest, FinancialStatementResponse, StatementResult
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/financial")
+dart_api = lazy_service("app.service.dart_api:DartApi")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 @router.get("/corp-code")
-async def get_corp_code():
+async def get_corp_code(page_query: PageQuery = Depends()):
     try:
-        dart_api = DartApi()
-        corp_code_df = dart_api._get_corp_code()
-        return {
-            "message": "회사 코드 호출에 성공했습니다.",
-            "data": corp_code_df.to_dict(orient='records')
-        }
+        corp_code_df = await run_io(dart_api._get_corp_code)
+        if not page_query.active:
+            return frame_response(
+                message="회사 코드 호출에 성공했습니다.",
+                data=corp_code_df
+            )
+        # 캐시된 기업 코드 목록에서 요청한 기업/컬럼/페이지만 잘라 보낸다
+        page, page_info = page_frame(corp_code_df, page_query, ('corp_code', 'corp_name', 'stock_code'))
+        return frame_response(
+            message="회사 코드 호출에 성공했습니다.",
+            data=page,
+            page=page_info
+        )
     except HTTPException as he:
         raise he 
     except Exception as e:
@@ -22,14 +40,42 @@ async def get_corp_code():
         raise HTTPException(status_code=500, detail="회사 코드 조회 중 오류가 발생했습니다.")
 
 @router.post("/statements", response_model=FinancialStatementResponse)
-async def get_corp_statement(selected_data: FinancialStatementRequest):
+async def get_corp_statement(selected_data: FinancialStatementRequest, request: Request, stream: bool = Query(False)):
     try:
-        dart_api = DartApi()
-        filtered_data = dart_api.filter_by_cnt(selected_data.data, selected_data.analysis_cnt)
-        result = dart_api.get_corp_statement(filtered_data, selected_data.start_date, selected_data.end_date)
-        return FinancialStatementResponse(data=result)
+        data = artifacts.resolve_data(selected_data.data, selected_data.artifact_id, artifacts.CMP, artifacts.CANDIDATES)
+        filtered_data = await run_io(dart_api.filter_by_cnt, data, selected_data.analysis_cnt)
+
+        if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            return StreamingResponse(
+                _stream_statements(filtered_data, selected_data.start_date, selected_data.end_date),
+                media_type=NDJSON_MEDIA_TYPE
+            )
+
+        result = await run_io(dart_api.get_corp_statement, filtered_data, selected_data.start_date, selected_data.end_date)
+        return FinancialStatementResponse(data=result, artifact_id=artifacts.store_artifact(artifacts.STATEMENTS, result))
     except HTTPException as he:
         raise he 
     except Exception as e:
         logger.error(f"회사 재무제표 조회 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail="회사 재무제표 조회 중 오류가 발생했습니다.")
+
+def _stream_statements(filtered_data, start_date: str, end_date: str):
+    """기업별 StatementResult를 한 줄씩 내보내고 마지막 줄에 요약을 붙인다."""
+    requested = len(filtered_data)
+    statements = []
+    summary = {"requested": requested}
+    try:
+        for statement in dart_api.iter_corp_statement(filtered_data, start_date, end_date):
+            statements.append(statement)
+            yield StatementResult(**statement).model_dump_json() + "\n"
+        if statements:
+            summary["artifact_id"] = artifacts.store_artifact(artifacts.STATEMENTS, statements)
+        else:
+            summary["error"] = "공시된 정보가 없습니다"
+    except Exception as e:
+        logger.error(f"회사 재무제표 스트리밍 중 오류 발생: {str(e)}")
+        summary["error"] = "회사 재무제표 조회 중 오류가 발생했습니다."
+
+    summary["completed"] = len(statements)
+    summary["failed"] = requested - len(statements)
+    yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
@@ -1,29 +1,44 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.logger import logger
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+import logging
 from app.schemas.invest_idx import InvestIdxRequest, InvestIdxResponse, AnalysisRequest, AnalysisResponse
-from app.service.invest_idx import InvestIdxService
-from typing import Dict, List
-import pandas as pd
+from app.api.responses import ratio_page_response, ratio_panel_service
+from app.api import artifacts
+from app.api.paging import PageQuery
+from app.core import workqueue
+from app.core.runtime import run_io, run_cpu_cached
+from app.core.lazy import lazy_import, lazy_service
+from app.api.memo import route_memo
+from typing import Dict, List, Literal, Optional
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/idx")
-invest_idx_service = InvestIdxService()
+invest_idx_service = lazy_service("app.service.invest_idx:InvestIdxService")
+tasks = lazy_import("app.service.tasks")
 
 @router.post("/gen-idx", response_model=InvestIdxResponse)
-async def gen_invest_idx(invest_idx_request: InvestIdxRequest):
+async def gen_invest_idx(invest_idx_request: InvestIdxRequest, request: Request,
+                         response_format: Optional[Literal["rows", "columnar", "arrow"]] = Query(None, alias="format"),
+                         page_query: PageQuery = Depends()):
     try:
         # stock_range_info, fileId = await invest_idx_service.get_stock_range_info(
         #     invest_idx_request.start_date, 
         #     invest_idx_request.end_date
         # )
 
-        stock_range_info = invest_idx_service.get_stock_file(invest_idx_request.start_date)  
+        stock_range_info = await run_io(invest_idx_service.get_stock_file, invest_idx_request.start_date)  
         
         if stock_range_info.empty:
             logger.error("수집된 주가 데이터가 없습니다.")
             raise HTTPException(status_code=400, detail="주가 데이터를 수집할 수 없습니다.")
             
-        candidates_range_info = invest_idx_service.get_candidates_range_info(
-            invest_idx_request.data, 
+        data = artifacts.resolve_data(invest_idx_request.data, invest_idx_request.artifact_id, artifacts.CMP, artifacts.CANDIDATES)
+        financial_statements = artifacts.resolve_data(invest_idx_request.financial_statements,
+                                                      invest_idx_request.financial_statements_artifact_id,
+                                                      artifacts.STATEMENTS)
+        candidates_range_info = await run_io(
+            invest_idx_service.get_candidates_range_info,
+            data, 
             stock_range_info
         )
         
@@ -31,12 +46,23 @@ async def gen_invest_idx(invest_idx_request: InvestIdxRequest):
             logger.error("후보 종목들의 주가 정보가 없습니다.")
             raise HTTPException(status_code=400, detail="후보 종목들의 주가 정보를 찾을 수 없습니다.")
         
-        company_analysis_dataframe = invest_idx_service.create_company_analysis_dataframe(
-            candidates_range_info,
-            invest_idx_request.financial_statements
-        )
-        
-        return InvestIdxResponse(data=company_analysis_dataframe.to_dict(orient='records'))
+        if workqueue.distributes(len(candidates_range_info)):
+            # 워커에 샤드를 맡길 때는 결과를 기다리기만 하므로 CPU 실행기 자리를 차지하지 않는다
+            company_analysis_dataframe = await run_io(
+                invest_idx_service.create_company_analysis_dataframe,
+                candidates_range_info,
+                financial_statements
+            )
+        else:
+            company_analysis_dataframe = await run_cpu_cached(
+                invest_idx_service.create_company_analysis_dataframe,
+                tasks.create_company_analysis_dataframe,
+                candidates_range_info,
+                financial_statements
+            )
+        artifact_id = artifacts.store_artifact(artifacts.RATIOS, company_analysis_dataframe)
+        # ?limit= 이 있으면 첫 페이지만 보내고, 나머지는 GET /idx/gen-idx/{artifact_id}로 이어 읽는다
+        return await run_io(ratio_page_response, request, company_analysis_dataframe, page_query, response_format, artifact_id)
 
     except HTTPException as he:
         raise he
@@ -45,10 +71,23 @@ async def gen_invest_idx(invest_idx_request: InvestIdxRequest):
         logger.exception("상세 에러:")  # 스택 트레이스 출력
         raise HTTPException(status_code=500, detail="투자 지표 생성 중 오류가 발생했습니다.")
 
+@router.get("/gen-idx/{artifact_id}", response_model=InvestIdxResponse)
+async def get_invest_idx_page(artifact_id: str, request: Request,
+                              response_format: Optional[Literal["rows", "columnar", "arrow"]] = Query(None, alias="format"),
+                              page_query: PageQuery = Depends()):
+    """저장된 투자지표 패널을 기업/지표/날짜 범위로 잘라 페이지 단위로 읽는다"""
+    data = artifacts.resolve_data(None, artifact_id, artifacts.RATIOS)
+    return await run_io(ratio_page_response, request, ratio_panel_service.to_frame(data), page_query, response_format, artifact_id)
+
 @router.post("/analysis", response_model=AnalysisResponse)
-async def analysis_invest_idx(analysis_request: AnalysisRequest):
+async def analysis_invest_idx(analysis_request: AnalysisRequest, request: Request):
+    return await route_memo.respond(request, "idx-analysis", analysis_request, lambda: _analysis_invest_idx(analysis_request))
+
+async def _analysis_invest_idx(analysis_request: AnalysisRequest):
     try:
-        analysis_data = invest_idx_service.analysis_invest_idx(analysis_request.data)
+        data = artifacts.resolve_data(analysis_request.data, analysis_request.artifact_id, artifacts.RATIOS)
+        analysis_data = await run_cpu_cached(invest_idx_service._analysis_invest_idx, tasks.analysis_invest_idx,
+                                             ratio_panel_service.to_frame(data))
         
         # 응답 데이터 구조화
         response = AnalysisResponse(
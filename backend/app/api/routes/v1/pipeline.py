@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+import logging
+
+from app.schemas.pipeline import PipelineSpec, PipelineResponse
+from app.api.responses import frame_response
+from app.core.runtime import run_io
+from app.core.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/pipeline")
+pipeline_service = lazy_import("app.service.pipeline:pipeline_service")
+
+@router.post("/run", response_model=PipelineResponse)
+async def run_pipeline(spec: PipelineSpec):
+    try:
+        result = await run_io(pipeline_service.run, spec)
+        return frame_response(**result)
+    except HTTPException as he:
+        raise he
+    except ValueError as e:
+        logger.error(f"파이프라인 실행 실패: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"파이프라인 실행 중 오류 발생: {str(e)}")
+        logger.exception("상세 에러:")
+        raise HTTPException(status_code=500, detail="파이프라인 실행 중 오류가 발생했습니다.")
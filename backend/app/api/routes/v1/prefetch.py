@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException
+
+from app.service.prefetch import dart_budget, krx_budget, scheduler
+
+router = APIRouter(prefix="/prefetch")
+
+@router.get("/status")
+async def get_prefetch_status():
+    """사전 수집 작업별 마지막 결과/다음 실행 시각과 오늘 쓴 외부 호출 예산"""
+    return {**scheduler.snapshot(), "budgets": {"krx": krx_budget.snapshot(), "dart": dart_budget.snapshot()}}
+
+@router.post("/{job}/run", status_code=202)
+async def run_prefetch_job(job: str):
+    """작업을 다음 루프에서 바로 실행하도록 당긴다 (락을 잡은 프로세스에서만 돈다)"""
+    try:
+        scheduler.trigger(job)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 사전 수집 작업입니다: {job}")
+    return {"job": job, "leader": scheduler.is_leader}
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+
+from app.core.profiling import load_profile
+
+router = APIRouter(prefix="/profiles")
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str):
+    """프로파일링한 요청의 요약 (전체/단계별 시간, 단계별 최대 메모리, 메모리 할당 상위 위치)"""
+    content = load_profile(profile_id, "json")
+    if content is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+    return Response(content=content, media_type="application/json")
+
+@router.get("/{profile_id}/flamegraph")
+async def get_profile_flamegraph(profile_id: str):
+    """접힌 스택(folded stack) 형식. flamegraph.pl, speedscope 등에서 바로 열 수 있다."""
+    content = load_profile(profile_id, "folded")
+    if content is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+    return PlainTextResponse(content=content)
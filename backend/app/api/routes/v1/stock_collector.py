@@ -1,20 +1,26 @@
-from fastapi import APIRouter, HTTPException
-from app.service.krx_api import KrxApi
-from app.service.stock_filter import StockFilterService
-from fastapi.logger import logger
-from app.schemas.stock import DateRequest, StockRequest, StockResponse
+from fastapi import APIRouter, Depends, HTTPException
+import logging
+from app.schemas.stock import DateRequest, StockRequest, StockResponse, StockData
+from app.api.responses import frame_response, project_frame
+from app.api import artifacts
+from app.api.paging import PageQuery, page_frame
+from app.core.runtime import run_io
+from app.core.lazy import lazy_service
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/collect")
-krx_api = KrxApi()
-stock_filter_service = StockFilterService()
+krx_api = lazy_service("app.service.krx_api:KrxApi")
+stock_filter_service = lazy_service("app.service.stock_filter:StockFilterService")
 
 @router.post("/stocks", response_model=StockResponse)
-async def collect_stock_data(stock_request: StockRequest):
+async def collect_stock_data(stock_request: StockRequest, page_query: PageQuery = Depends()):
     try:
         date_request = DateRequest(input_date=stock_request.startDd)
-        stock_data = krx_api.get_stock_list_with_next_day(date_request.input_date)
+        stock_data = await run_io(krx_api.get_stock_list_with_next_day, date_request.input_date)
         
-        filtered_stock_data = stock_filter_service.apply_filters(
+        filtered_stock_data = await run_io(
+            stock_filter_service.apply_filters,
             stock_data,
             etf=stock_request.etf_filter,
             inverse=stock_request.inverse_filter,
@@ -25,10 +31,27 @@ async def collect_stock_data(stock_request: StockRequest):
             bottom_percent=stock_request.bottom_percent
         )
         
-        return StockResponse(data=filtered_stock_data.to_dict(orient='records'))
+        stock_frame = project_frame(filtered_stock_data, StockData)
+        artifact_id = artifacts.store_artifact(artifacts.STOCKS, stock_frame)
+        # ?limit= 이 있으면 첫 페이지만 보내고, 나머지는 GET /collect/stocks/{artifact_id}로 이어 읽는다
+        return _stock_page_response(stock_frame, page_query, artifact_id)
+    except HTTPException as he:
+        raise he
     except ValueError as e:
         logger.error(f"날짜 검증 실패: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"예상치 못한 오류 발생: {str(e)}")
-        raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
+
+@router.get("/stocks/{artifact_id}", response_model=StockResponse)
+async def get_stock_data_page(artifact_id: str, page_query: PageQuery = Depends()):
+    """저장된 주가 목록을 종목(코드/이름)과 컬럼으로 잘라 페이지 단위로 읽는다"""
+    stock_frame = artifacts.resolve_data(None, artifact_id, artifacts.STOCKS)
+    return _stock_page_response(stock_frame, page_query, artifact_id)
+
+def _stock_page_response(stock_frame, page_query: PageQuery, artifact_id: str):
+    if not page_query.active:
+        return frame_response(data=stock_frame, artifact_id=artifact_id)
+    page, page_info = page_frame(stock_frame, page_query, ('stockCode', 'stockName'))
+    return frame_response(data=page, artifact_id=artifact_id, page=page_info)
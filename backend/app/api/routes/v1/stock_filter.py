@@ -1,29 +1,49 @@
-from fastapi import APIRouter, HTTPException
-from app.service.krx_api import KrxApi
-from app.service.stock_filter import StockFilterService
-from fastapi.logger import logger
+from fastapi import APIRouter, HTTPException, Request
+import logging
 from app.schemas.stock import VolumeRequest, VolumeResponse, VolumeFilterRequest, VolumeFilterResponse
 from app.schemas.stock import DateRequest, StockEndRequest, StockEndResponse, StockCandidatesRequest, StockCandidatesResponse
+from app.schemas.stock import StockHorizonRequest, StockHorizonResponse, StockData, StockCmpData, StockHorizonData
+from app.api.responses import frame_response, project_frame
+from app.api import artifacts
+from app.core.runtime import run_io
+from app.core.lazy import lazy_service
+from app.api.memo import route_memo
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/filter")
-krx_api = KrxApi()
-stock_filter_service = StockFilterService()
+krx_api = lazy_service("app.service.krx_api:KrxApi")
+stock_filter_service = lazy_service("app.service.stock_filter:StockFilterService")
+invest_idx_service = lazy_service("app.service.invest_idx:InvestIdxService")
     
 @router.post("/volumes", response_model=VolumeResponse)
-async def collect_volume_data(volume_request: VolumeRequest):
+async def collect_volume_data(volume_request: VolumeRequest, request: Request):
+    return await route_memo.respond(request, "volumes", volume_request, lambda: _collect_volume_data(volume_request))
+
+async def _collect_volume_data(volume_request: VolumeRequest):
     try:
-        volume_data = stock_filter_service.analyze_volume(volume_request.data)
+        data = artifacts.resolve_data(volume_request.data, volume_request.artifact_id, artifacts.STOCKS, artifacts.VOLUMES)
+        volume_data = await run_io(stock_filter_service.analyze_volume, data)
         return VolumeResponse(data=volume_data)
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"예상치 못한 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
 
 @router.post("/volumes/filter")
-async def filter_volume_data(volume_request: VolumeFilterRequest):
+async def filter_volume_data(volume_request: VolumeFilterRequest, request: Request):
+    return await route_memo.respond(request, "volumes-filter", volume_request, lambda: _filter_volume_data(volume_request))
+
+async def _filter_volume_data(volume_request: VolumeFilterRequest):
     try:
-        filtered_data = stock_filter_service.apply_volume_filters(volume_request.data, volume_request.filter_type)
-        return VolumeFilterResponse(data=filtered_data.to_dict(orient='records'))
+        data = artifacts.resolve_data(volume_request.data, volume_request.artifact_id, artifacts.STOCKS, artifacts.VOLUMES)
+        filtered_data = await run_io(stock_filter_service.apply_volume_filters, data, volume_request.filter_type)
+        return frame_response(data=project_frame(filtered_data, StockData),
+                              artifact_id=artifacts.store_artifact(artifacts.VOLUMES, filtered_data))
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"예상치 못한 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
@@ -32,23 +52,70 @@ async def filter_volume_data(volume_request: VolumeFilterRequest):
 async def collect_stock_end_data(stock_request: StockEndRequest):
     try:
         date_request = DateRequest(input_date=stock_request.endDd)
-        stock_data = krx_api.get_stock_list_with_next_day(date_request.input_date)
-        cmp_data, annual_return_analysis, market_cap_change_analysis = stock_filter_service.calculate_cmp_data(stock_request.data, stock_data)
-        return StockEndResponse(data=cmp_data.to_dict(orient='records'),
-                                 annual_return_analysis=annual_return_analysis,
-                                 market_cap_change_analysis=market_cap_change_analysis)
+        stock_data = await run_io(krx_api.get_stock_list_with_next_day, date_request.input_date)
+        data = artifacts.resolve_data(stock_request.data, stock_request.artifact_id, artifacts.STOCKS, artifacts.VOLUMES)
+        cmp_data, annual_return_analysis, market_cap_change_analysis = await run_io(stock_filter_service.calculate_cmp_data, data, stock_data)
+        return frame_response(data=project_frame(cmp_data, StockCmpData),
+                              annual_return_analysis=annual_return_analysis,
+                              market_cap_change_analysis=market_cap_change_analysis,
+                              artifact_id=artifacts.store_artifact(artifacts.CMP, cmp_data))
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"예상치 못한 오류 발생: {str(e)}")
+        raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
+    
+@router.post("/stocks/horizons", response_model=StockHorizonResponse)
+async def collect_stock_horizon_data(stock_request: StockHorizonRequest):
+    try:
+        date_request = DateRequest(input_date=stock_request.startDd)
+        targets = stock_filter_service.horizon_targets(date_request.input_date, stock_request.horizons,
+                                                       stock_request.custom_end_dates)
+        # 가장 늦은 목표일이 속한 연도까지의 주가 패널을 이어 붙인다
+        price_panel = await run_io(invest_idx_service.get_stock_files, date_request.input_date,
+                                   max(target for _, target in targets) if targets else date_request.input_date)
+        data = artifacts.resolve_data(stock_request.data, stock_request.artifact_id, artifacts.STOCKS, artifacts.VOLUMES)
+        horizon_data, horizons, annual_return_analysis, market_cap_change_analysis = await run_io(
+            stock_filter_service.calculate_horizon_cmp,
+            data,
+            price_panel,
+            date_request.input_date,
+            stock_request.horizons,
+            stock_request.custom_end_dates
+        )
+        return frame_response(horizons=horizons,
+                              data=project_frame(horizon_data, StockHorizonData),
+                              annual_return_analysis=annual_return_analysis,
+                              market_cap_change_analysis=market_cap_change_analysis,
+                              artifact_id=artifacts.store_artifact(artifacts.HORIZONS, horizon_data))
+    except FileNotFoundError as e:
+        logger.error(f"주가 데이터 파일 없음: {str(e)}")
+        raise HTTPException(status_code=400, detail="주가 데이터 파일을 찾을 수 없습니다.")
+    except HTTPException as he:
+        raise he
+    except ValueError as e:
+        logger.error(f"기간 검증 실패: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"예상치 못한 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
     
 @router.post("/stocks/candidates", response_model=StockCandidatesResponse)
-async def collect_stock_candidates(stock_request: StockCandidatesRequest):
+async def collect_stock_candidates(stock_request: StockCandidatesRequest, request: Request):
+    return await route_memo.respond(request, "candidates", stock_request, lambda: _collect_stock_candidates(stock_request))
+
+async def _collect_stock_candidates(stock_request: StockCandidatesRequest):
     try:
-        candidates = stock_filter_service.select_candidates(
-                                            stock_request.data, 
+        data = artifacts.resolve_data(stock_request.data, stock_request.artifact_id, artifacts.CMP, artifacts.CANDIDATES)
+        candidates = await run_io(
+                                            stock_filter_service.select_candidates,
+                                            data, 
                                             stock_request.candidates_type, 
                                             stock_request.strategy_type)
-        return StockCandidatesResponse(data=candidates.to_dict(orient='records'))
+        return frame_response(data=project_frame(candidates, StockCmpData),
+                              artifact_id=artifacts.store_artifact(artifacts.CANDIDATES, candidates))
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"예상치 못한 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail="서버 오류가 발생했습니다.")
\ No newline at end of file
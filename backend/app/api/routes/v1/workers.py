@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Query
+
+from app.core import workqueue
+from app.core.runtime import run_io
+
+router = APIRouter(prefix="/workers")
+
+@router.get("/jobs")
+async def get_worker_jobs(limit: int = Query(20, ge=1, le=200)):
+    """최근 샤드 작업별 진행 상황 (대기/실행 중/완료/실패 샤드 수)"""
+    return {"jobs": await run_io(workqueue.work_queue.jobs, limit)}
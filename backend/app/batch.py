@@ -0,0 +1,183 @@
+"""여러 시작 연도/전략 조합을 서버 없이 한 번에 돌리는 배치 실행기.
+
+사용법 (backend 디렉터리에서):
+
+    python -m app.batch specs.json --out results/ --workers 4 --cache-dir .cache
+
+스펙 파일은 다음 중 하나이다.
+
+- PipelineSpec 객체의 JSON 배열 (각 객체에 선택적으로 "name")
+- 한 줄에 PipelineSpec 하나씩인 JSONL
+- {"base": {...}, "matrix": {"키": [값, ...]}} 형태. matrix의 모든 조합을 base에 덮어써서 펼친다.
+  값이 객체이면 여러 키를 한 번에 덮어쓴다 (예: {"start_date": "20200101", "end_date": "20201231"}).
+
+결과는 --out 디렉터리에 Parquet로 저장된다.
+
+- summary.parquet: 실행별 수익률/최종 자본/소요 시간/오류
+- monthly_returns.parquet: 실행별 월간·누적 수익률과 자본
+- portfolios.parquet: 실행별 월간 포트폴리오 구성 비중
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple
+
+from app.core.log import configure_logging
+
+logger = logging.getLogger("app.batch")
+
+
+def load_specs(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        payload = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if isinstance(payload, dict) and ('base' in payload or 'matrix' in payload):
+        specs = _expand_matrix(payload.get('base', {}), payload.get('matrix', {}))
+    elif isinstance(payload, dict):
+        # 한 줄짜리 JSONL도 JSON 객체로 읽히므로 spec 하나로 본다
+        specs = [payload]
+    else:
+        specs = payload
+
+    named = []
+    for i, spec in enumerate(specs):
+        spec = dict(spec)
+        name = spec.pop('name', None) or f"run-{i:04d}"
+        named.append((name, spec))
+    return named
+
+
+def _expand_matrix(base: Dict[str, Any], matrix: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    keys = list(matrix)
+    specs = []
+    for combo in itertools.product(*(matrix[key] for key in keys)):
+        spec = dict(base)
+        labels = []
+        for key, value in zip(keys, combo):
+            if isinstance(value, dict):
+                spec.update(value)
+                labels.append('-'.join(str(v) for v in value.values()))
+            else:
+                spec[key] = value
+                labels.append(str(value))
+        spec.setdefault('name', '_'.join(labels))
+        specs.append(spec)
+    return specs
+
+
+def _run_spec(name: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """워커 프로세스에서 실행된다. 앱 모듈은 CACHE_DIR 환경 변수가 설정된 뒤에 임포트해야 한다."""
+    from app.service.pipeline import run_pipeline
+
+    started = time.perf_counter()
+    try:
+        result = run_pipeline(spec)
+    except Exception as e:
+        return {'name': name, 'spec': spec, 'elapsed': time.perf_counter() - started, 'error': repr(e)}
+
+    return {
+        'name': name,
+        'spec': spec,
+        'elapsed': time.perf_counter() - started,
+        'error': None,
+        'backtest': result['backtest'],
+        'stages': result['stages']
+    }
+
+
+def _to_frames(results: List[Dict[str, Any]]):
+    import pandas as pd
+
+    summary, monthly, portfolios = [], [], []
+    for result in results:
+        backtest = result.get('backtest') or {}
+        summary.append({
+            'name': result['name'],
+            'spec': json.dumps(result['spec'], ensure_ascii=False, sort_keys=True),
+            'total_return': backtest.get('total_return'),
+            'final_capital': backtest.get('final_capital'),
+            'months': len(backtest.get('monthly_returns', [])),
+            'elapsed': result['elapsed'],
+            'error': result['error']
+        })
+        for step, (monthly_return, cumulative_return, capital) in enumerate(zip(
+                backtest.get('monthly_returns', []),
+                backtest.get('cumulative_returns', []),
+                backtest.get('total_capital', [])[1:])):
+            monthly.append({
+                'name': result['name'],
+                'step': step,
+                'monthly_return': monthly_return,
+                'cumulative_return': cumulative_return,
+                'capital': capital
+            })
+        for step, portfolio in enumerate(backtest.get('monthly_portfolios', [])):
+            for stock, weight in portfolio.items():
+                portfolios.append({'name': result['name'], 'step': step, 'stock': stock, 'weight': weight})
+
+    return pd.DataFrame(summary), pd.DataFrame(monthly), pd.DataFrame(portfolios)
+
+
+def run_batch(specs: List[Tuple[str, Dict[str, Any]]], out_dir: str, workers: int) -> List[Dict[str, Any]]:
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+
+    if workers <= 1:
+        for name, spec in specs:
+            results.append(_run_spec(name, spec))
+            logger.info(f"[{len(results)}/{len(specs)}] {name} 완료")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_spec, name, spec) for name, spec in specs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                logger.info(f"[{len(results)}/{len(specs)}] {result['name']} 완료")
+
+    order = {name: i for i, (name, _) in enumerate(specs)}
+    results.sort(key=lambda result: order[result['name']])
+
+    summary, monthly, portfolios = _to_frames(results)
+    summary.to_parquet(os.path.join(out_dir, 'summary.parquet'), index=False)
+    monthly.to_parquet(os.path.join(out_dir, 'monthly_returns.parquet'), index=False)
+    portfolios.to_parquet(os.path.join(out_dir, 'portfolios.parquet'), index=False)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.batch', description='파이프라인 스펙 여러 개를 배치로 실행한다')
+    parser.add_argument('spec_file', help='JSON/JSONL 스펙 파일')
+    parser.add_argument('--out', default='results', help='Parquet 결과 디렉터리')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='프로세스 수')
+    parser.add_argument('--cache-dir', default=None, help='워커 간 공유 캐시 디렉터리 (기본: CACHE_DIR 또는 <out>/.cache)')
+    args = parser.parse_args(argv)
+
+    # 앱 설정(app.core.config) 임포트 시 LOG_* 설정으로 다시 구성되지만, 그 전에 남기는 로그도 보이도록 먼저 켠다
+    configure_logging()
+
+    # 워커 프로세스가 같은 디스크 캐시를 보도록 앱 모듈 임포트 전에 설정한다
+    os.environ['CACHE_DIR'] = args.cache_dir or os.environ.get('CACHE_DIR') or os.path.join(args.out, '.cache')
+
+    specs = load_specs(args.spec_file)
+    names = [name for name, _ in specs]
+    if len(set(names)) != len(names):
+        parser.error('스펙 이름이 중복되었습니다')
+
+    started = time.perf_counter()
+    results = run_batch(specs, args.out, args.workers)
+    failed = sum(1 for result in results if result['error'])
+    logger.info(f"배치 완료: {len(results)}건 (실패 {failed}건), {time.perf_counter() - started:.1f}초 → {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""가상 데이터 기반 벤치마크(`python -m app.bench`)와 부하 테스트(`python -m app.bench.loadtest`)."""
@@ -0,0 +1,360 @@
+"""수집 → 필터 → 재무제표 → 투자지표 → 백테스트 흐름을 여러 가상 사용자가 반복하는 부하 테스트.
+
+사용법 (backend 디렉터리에서):
+
+    python -m app.bench.loadtest --users 8 --iterations 3                  # 앱을 이 프로세스 안에서 (ASGI) 실행
+    python -m app.bench.loadtest --url http://127.0.0.1:8000 --duration 60  # 띄워 둔 서버 (app.bench.stub_app 권장)
+    python -m app.bench.loadtest --sweep WEB_CONCURRENCY=1,2,4 --sweep CPU_WORKERS=0,2 --users 16 --duration 60
+
+가상 사용자마다 X-Client-Id가 다르고, 흐름마다 필터/전략/분석 기업 수/top_n을 seed 고정 난수로 골라
+캐시와 메모가 모두 적중하지 않게 한다. 외부 API는 app.bench.stubs의 가짜 KRX/DART가 응답한다.
+
+--sweep은 설정 조합마다 app.bench.stub_app을 uvicorn으로 새로 띄워(WEB_CONCURRENCY는 --workers) 같은 부하를 건다.
+멀티 워커에서도 artifact를 이어 쓸 수 있도록 조합마다 임시 CACHE_DIR을 공유 캐시로 지정한다.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from app.bench.runner import SCREENING_CRITERIA
+
+logger = logging.getLogger("app.bench.loadtest")
+
+API_PREFIX = '/api/v1'
+
+FILTER_TYPES = ['IQR', 'PERCENT', 'ALL']
+CANDIDATES_TYPES = ['ANNUAL_RETURN', 'MARKET_CAP_CHANGE']
+STRATEGY_TYPES = ['HIGH_RETURN', 'RISK_AVERSE', 'STABLE']
+ANALYSIS_COUNTS = [20, 30, 50]
+TOP_NS = [5, 10]
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+
+    def record(self, seconds: float, status: str, ok: bool):
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+class LoadTest:
+    """가상 사용자 users명이 각자 흐름을 iterations번(또는 duration초 동안) 반복한다."""
+
+    def __init__(self, client, users: int, iterations: Optional[int], duration: Optional[float],
+                 start_date: str, end_date: str, think: float = 0.0, ramp_up: float = 0.0, seed: int = 0):
+        self.client = client
+        self.users = users
+        self.iterations = iterations
+        self.duration = duration
+        self.start_date = start_date
+        self.end_date = end_date
+        self.think = think
+        self.ramp_up = ramp_up
+        self.seed = seed
+        self.routes: Dict[str, RouteStats] = {}
+        self.flows = {'completed': 0, 'failed': 0}
+        self.failures: Dict[str, int] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        deadline = started + self.duration if self.duration else None
+        await asyncio.gather(*(self._user(user, deadline) for user in range(self.users)))
+        return self.report(time.perf_counter() - started)
+
+    async def _user(self, user: int, deadline: Optional[float]):
+        if self.ramp_up:
+            await asyncio.sleep(self.ramp_up * user / self.users)
+        rng = random.Random(self.seed * 10007 + user)
+        headers = {'X-Client-Id': f"loadtest-{user}"}
+        iteration = 0
+        while (self.iterations is None or iteration < self.iterations) and (deadline is None or time.perf_counter() < deadline):
+            iteration += 1
+            try:
+                await self._flow(rng, headers)
+                self.flows['completed'] += 1
+            except FlowError as e:
+                self.flows['failed'] += 1
+                self.failures[str(e)] = self.failures.get(str(e), 0) + 1
+
+    async def _flow(self, rng: random.Random, headers: dict):
+        """프론트엔드가 단계마다 보내는 요청 순서 그대로. 앞 단계의 artifact_id로 다음 단계를 요청한다."""
+        stocks = await self._post('/collect/stocks', {'startDd': self.start_date, 'etf_filter': True, 'inverse_filter': True,
+                                                      'preferred_filter': True, 'etc_filter': True,
+                                                      'top_percent': 0, 'bottom_percent': 100}, headers)
+        await self._post('/filter/volumes', {'artifact_id': stocks}, headers)
+        volumes = await self._post('/filter/volumes/filter', {'artifact_id': stocks, 'filter_type': rng.choice(FILTER_TYPES)},
+                                   headers)
+        cmp_data = await self._post('/filter/stocks/end', {'artifact_id': volumes, 'endDd': self.end_date}, headers)
+        candidates = await self._post('/filter/stocks/candidates', {
+            'artifact_id': cmp_data,
+            'candidates_type': rng.choice(CANDIDATES_TYPES),
+            'strategy_type': rng.choice(STRATEGY_TYPES)
+        }, headers)
+        statements = await self._post('/financial/statements', {
+            'artifact_id': candidates,
+            'analysis_cnt': rng.choice(ANALYSIS_COUNTS),
+            'start_date': self.start_date,
+            'end_date': self.end_date
+        }, headers)
+        ratios = await self._post('/idx/gen-idx', {
+            'artifact_id': candidates,
+            'financial_statements_artifact_id': statements,
+            'start_date': self.start_date,
+            'end_date': self.end_date
+        }, headers)
+        await self._post('/idx/analysis', {'artifact_id': ratios}, headers)
+        await self._post('/backtest/start', {
+            'test_data_artifact_id': ratios,
+            'screening_criteria': {metric: list(bounds) for metric, bounds in SCREENING_CRITERIA.items()},
+            'top_n': rng.choice(TOP_NS)
+        }, headers)
+
+    async def _post(self, route: str, body: dict, headers: dict) -> Optional[str]:
+        if self.think:
+            await asyncio.sleep(self.think)
+        stats = self.routes.setdefault(route, RouteStats())
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(API_PREFIX + route, json=body, headers=headers)
+        except Exception as e:
+            stats.record(time.perf_counter() - started, type(e).__name__, ok=False)
+            raise FlowError(f"{route} {type(e).__name__}")
+        # 본문을 끝까지 받은 시점까지 잰다
+        payload = response.content
+        stats.record(time.perf_counter() - started, str(response.status_code), ok=response.status_code < 400)
+        if response.status_code >= 400:
+            raise FlowError(f"{route} {response.status_code}")
+        return json.loads(payload).get('artifact_id')
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        routes = {}
+        for route, stats in self.routes.items():
+            latencies = sorted(stats.latencies)
+            routes[route] = {
+                'requests': len(latencies),
+                'errors': stats.errors,
+                'error_rate': round(stats.errors / len(latencies), 4) if latencies else 0,
+                'throughput': round(len(latencies) / elapsed, 3),
+                'mean_ms': round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+                'p50_ms': _percentile(latencies, 50),
+                'p95_ms': _percentile(latencies, 95),
+                'p99_ms': _percentile(latencies, 99),
+                'max_ms': round(latencies[-1] * 1000, 1) if latencies else None,
+                'statuses': stats.statuses
+            }
+        requests = sum(route['requests'] for route in routes.values())
+        errors = sum(route['errors'] for route in routes.values())
+        return {
+            'users': self.users,
+            'elapsed_seconds': round(elapsed, 3),
+            'requests': requests,
+            'errors': errors,
+            'error_rate': round(errors / requests, 4) if requests else 0,
+            'throughput': round(requests / elapsed, 3),
+            'flows': dict(self.flows, per_minute=round(self.flows['completed'] / elapsed * 60, 2)),
+            'failures': self.failures,
+            'routes': routes
+        }
+
+
+class FlowError(Exception):
+    pass
+
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # nearest-rank
+    rank = max(1, int(-(-percent * len(sorted_values) // 100)))
+    return round(sorted_values[rank - 1] * 1000, 1)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'route':<28} {'reqs':>6} {'err%':>6} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for route, stats in report['routes'].items():
+        lines.append(f"{route:<28} {stats['requests']:>6} {stats['error_rate'] * 100:>5.1f}% {stats['throughput']:>7.2f} "
+                     f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    flows = report['flows']
+    lines.append(f"합계: {report['requests']}요청, 오류 {report['error_rate'] * 100:.1f}%, {report['throughput']:.2f} req/s, "
+                 f"흐름 {flows['completed']}건 완료/{flows['failed']}건 실패 ({flows['per_minute']}/분), {report['elapsed_seconds']}초")
+    for failure, count in sorted(report['failures'].items(), key=lambda item: -item[1])[:5]:
+        lines.append(f"  실패: {failure} x{count}")
+    return '\n'.join(lines)
+
+
+def _dates(years: int) -> tuple:
+    """가상 시장(app.bench.synthetic, 2024년까지)의 첫 해 첫 영업일과 연말 영업일."""
+    import pandas as pd
+
+    days = pd.bdate_range(f"{2024 - years + 1}-01-02", f"{2024 - years + 1}-12-30").strftime('%Y%m%d')
+    return days[0], days[-3]
+
+
+async def run_in_process(args) -> Dict[str, Any]:
+    """가짜 백엔드를 설치한 앱을 이 프로세스 안에서 httpx ASGITransport로 호출한다."""
+    import httpx
+
+    from app.bench.stubs import install_from_env
+
+    backends = install_from_env()
+    from app.main import app
+
+    start_date, end_date = _dates(int(os.environ['LOADTEST_YEARS']))
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://loadtest', timeout=args.timeout) as client:
+            report = await LoadTest(client, args.users, args.iterations, args.duration, start_date, end_date,
+                                    args.think_ms / 1000, args.ramp_up, args.seed).run()
+    report['backend_calls'] = dict(backends.calls)
+    return report
+
+
+async def run_against(url: str, args) -> Dict[str, Any]:
+    import httpx
+
+    start_date, end_date = _dates(int(os.environ['LOADTEST_YEARS']))
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await LoadTest(client, args.users, args.iterations, args.duration, start_date, end_date,
+                              args.think_ms / 1000, args.ramp_up, args.seed).run()
+
+
+def run_sweep(args) -> List[Dict[str, Any]]:
+    names = [name for name, _ in args.sweep]
+    results = []
+    for values in itertools.product(*(values for _, values in args.sweep)):
+        config = dict(zip(names, values))
+        logger.info(f"설정 {config} 부하 테스트 시작")
+        with tempfile.TemporaryDirectory(prefix='quantus-loadtest-') as workdir:
+            env = dict(os.environ, **config)
+            env.setdefault('CACHE_DIR', os.path.join(workdir, 'cache'))
+            env.setdefault('LOADTEST_DATA_DIR', os.path.join(workdir, 'data'))
+            port = _free_port()
+            command = [sys.executable, '-m', 'uvicorn', 'app.bench.stub_app:app', '--host', '127.0.0.1', '--port', str(port),
+                       '--workers', config.get('WEB_CONCURRENCY', '1'), '--log-level', 'warning']
+            server = subprocess.Popen(command, env=env)
+            try:
+                url = f"http://127.0.0.1:{port}"
+                _wait_ready(url, server, env.get('WARMUP_ENABLED', 'true').lower() != 'false', args.startup_timeout)
+                report = asyncio.run(run_against(url, args))
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+        report['config'] = config
+        results.append(report)
+        logger.info(f"설정 {config} 결과\n{format_report(report)}")
+    return results
+
+
+def format_sweep(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'config':<48} {'req/s':>7} {'flows/min':>10} {'err%':>6} {'slowest route p95':>32}"]
+    for report in results:
+        config = ' '.join(f"{name}={value}" for name, value in report['config'].items())
+        slowest = max(report['routes'].items(), key=lambda item: item[1]['p95_ms'] or 0, default=(None, None))
+        slowest_text = f"{slowest[0]} {slowest[1]['p95_ms']:.0f}ms" if slowest[0] else '-'
+        lines.append(f"{config:<48} {report['throughput']:>7.2f} {report['flows']['per_minute']:>10.2f} "
+                     f"{report['error_rate'] * 100:>5.1f}% {slowest_text:>32}")
+    return '\n'.join(lines)
+
+
+def _wait_ready(url: str, server: subprocess.Popen, warmup: bool, timeout: float):
+    import httpx
+
+    path = '/ready' if warmup else '/health'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"서버가 종료되었습니다 (exit {server.returncode})")
+        try:
+            if httpx.get(url + path, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{timeout}초 안에 서버가 준비되지 않았습니다: {url}{path}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _parse_sweep(value: str) -> tuple:
+    name, _, values = value.partition('=')
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f"--sweep은 NAME=v1,v2 형식이어야 합니다: {value}")
+    return name.strip(), [item.strip() for item in values.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.bench.loadtest', description='전체 흐름을 반복하는 부하 테스트')
+    parser.add_argument('--users', type=int, default=4, help='동시 가상 사용자 수')
+    parser.add_argument('--iterations', type=int, default=None, help='사용자당 흐름 반복 횟수 (기본: --duration이 없으면 1)')
+    parser.add_argument('--duration', type=float, default=None, help='이 시간(초) 동안 반복')
+    parser.add_argument('--think-ms', type=float, default=0, help='요청 사이 대기 시간')
+    parser.add_argument('--ramp-up', type=float, default=0, help='사용자를 이 시간(초)에 걸쳐 나눠 시작')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=300, help='요청 타임아웃(초)')
+    parser.add_argument('--url', default=None, help='이미 떠 있는 서버 주소 (없으면 프로세스 안에서 실행)')
+    parser.add_argument('--sweep', type=_parse_sweep, action='append', help='NAME=v1,v2 (여러 번 지정하면 모든 조합)')
+    parser.add_argument('--startup-timeout', type=float, default=120, help='스윕 서버 준비 대기 시간(초)')
+    parser.add_argument('--stocks', type=int, default=1000, help='가상 시장 종목 수')
+    parser.add_argument('--years', type=int, default=1, help='가상 시장 연도 수')
+    parser.add_argument('--krx-latency-ms', type=float, default=50, help='가짜 KRX 응답 평균 지연')
+    parser.add_argument('--dart-latency-ms', type=float, default=80, help='가짜 DART 응답 평균 지연')
+    parser.add_argument('--out', default=None, help='결과 JSON 경로')
+    args = parser.parse_args(argv)
+    if args.iterations is None and args.duration is None:
+        args.iterations = 1
+
+    # in-process / 스윕 서버 모두 같은 가상 시장과 지연을 쓰도록 환경 변수로 넘긴다
+    os.environ.update({
+        'LOADTEST_STOCKS': str(args.stocks),
+        'LOADTEST_YEARS': str(args.years),
+        'LOADTEST_SEED': str(args.seed),
+        'LOADTEST_KRX_LATENCY_MS': str(args.krx_latency_ms),
+        'LOADTEST_DART_LATENCY_MS': str(args.dart_latency_ms)
+    })
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('LOG_LEVELS', 'app.bench=INFO')
+    os.environ.setdefault('TQDM_DISABLE', '1')
+    from app.bench.stubs import configure_environment
+    configure_environment()
+    from app.core.config import settings  # noqa: F401  (로깅 설정)
+
+    if args.sweep:
+        results = run_sweep(args)
+        print(format_sweep(results))
+    else:
+        report = asyncio.run(run_against(args.url, args) if args.url else run_in_process(args))
+        print(format_report(report))
+        results = [report]
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results if args.sweep else results[0], f, ensure_ascii=False, indent=2)
+    return 1 if any(report['errors'] for report in results) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
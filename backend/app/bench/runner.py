@@ -0,0 +1,315 @@
+"""서비스 계층 핫패스 벤치마크.
+
+사용법 (backend 디렉터리에서):
+
+    python -m app.bench                              # quick: 100/1,000 종목 x 1년
+    python -m app.bench --preset full                # 100/1,000/2,500 종목 x 1/3/5년
+    python -m app.bench --scale 2500x5 --only backtest
+    python -m app.bench --save-baseline              # 현재 결과를 기준값으로 저장
+
+가상 데이터(app.bench.synthetic)로 함수마다 시간(repeat회 중앙값)과 최대 메모리(tracemalloc, 1회)를 잰다.
+기준값 파일(--baseline)에 같은 (벤치마크, 규모) 항목이 있으면 비교해서, 시간 또는 메모리가
+임계값(--threshold, --memory-threshold)을 넘게 늘어나면 종료 코드 1로 끝난다.
+
+외부 API와 캐시를 쓰지 않도록 앱 모듈 임포트 전에 CACHE_BACKEND=none, TRACE_EXPORTER=none을 설정한다.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger("app.bench")
+
+PRESETS = {
+    'quick': [(100, 1), (1000, 1)],
+    'full': [(stocks, years) for stocks in (100, 1000, 2500) for years in (1, 3, 5)],
+}
+
+SCREENING_CRITERIA = {
+    'PER': (0, 60),
+    'PBR': (0, 10),
+    'ROE': (2, 100),
+    'ROA': (0.5, 100),
+    '영업이익률': (3, 100),
+    '부채비율': (0, 200)
+}
+
+# 벤치마크 이름 -> (준비 함수, 결과 검사 함수). 준비 함수는 시간 측정에서 빠지고, 측정할 인자 없는 함수를 돌려준다.
+BENCHMARKS: Dict[str, Tuple[Callable, Callable[[Any], bool]]] = {}
+
+# 규모마다 가상 시장과 파생 데이터를 한 번만 만든다
+_fixtures: Dict[str, Any] = {}
+
+
+def benchmark(name: str, check: Callable[[Any], bool] = lambda result: True):
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, check)
+        return setup
+    return decorator
+
+
+def _fixture(market, name: str, build: Callable[[], Any]):
+    key = f"{market.stocks}x{len(market.years)}:{name}"
+    if key not in _fixtures:
+        _fixtures[key] = build()
+    return _fixtures[key]
+
+
+def _not_empty(result) -> bool:
+    return result is not None and len(result) > 0
+
+
+@benchmark('stock_filter.apply_filters', check=_not_empty)
+def _apply_filters(market):
+    from app.service.stock_filter import StockFilterService
+
+    service = StockFilterService()
+    snapshot = market.snapshot(market.dates[0])
+
+    def run():
+        # 스냅샷별 유니버스 캐시를 비워 매번 처음 요청처럼 잰다
+        service._universe_cache.clear()
+        return service.apply_filters(snapshot, etf=True, inverse=True, sector=True, preferred=True, etc=True,
+                                     top_percent=0, bottom_percent=100)
+    return run
+
+
+@benchmark('stock_filter.calculate_cmp_data', check=lambda result: len(result[0]) > 0)
+def _calculate_cmp_data(market):
+    from app.service.stock_filter import StockFilterService
+
+    service = StockFilterService()
+    start = market.snapshot(market.dates[0]).drop(columns='baseDate')
+    end = market.snapshot(market.dates[-1])
+    return lambda: service.calculate_cmp_data(start, end)
+
+
+@benchmark('stock_filter.select_candidates', check=_not_empty)
+def _select_candidates(market):
+    from app.schemas.stock import CandidatesType, StrategyType
+    from app.service.stock_filter import StockFilterService
+
+    service = StockFilterService()
+    cmp_data = _fixture(market, 'cmp_data', lambda: service.calculate_cmp_data(
+        market.snapshot(market.dates[0]).drop(columns='baseDate'), market.snapshot(market.dates[-1]))[0])
+    return lambda: service.select_candidates(cmp_data, CandidatesType.ANNUAL_RETURN, StrategyType.RISK_AVERSE)
+
+
+@benchmark('dart_api.build_statements', check=_not_empty)
+def _build_statements(market):
+    from app.service.dart_api import DartApi
+
+    dart_api = DartApi()
+    quarter_info = market.quarter_info()
+    frames = [(name, market.statement_frame(i)) for i, name in enumerate(market.names)]
+    return lambda: [dart_api._build_statement_result(name, frame, quarter_info) for name, frame in frames]
+
+
+@benchmark('invest_idx.filter_zero_accounts', check=_not_empty)
+def _filter_zero_accounts(market):
+    from app.service.invest_idx import InvestIdxService
+
+    service = InvestIdxService()
+    statements = _fixture(market, 'statements', market.statements)
+    return lambda: service.filter_zero_accounts(statements)
+
+
+@benchmark('invest_idx.create_company_analysis_dataframe', check=_not_empty)
+def _create_company_analysis_dataframe(market):
+    from app.service.invest_idx import InvestIdxService
+
+    service = InvestIdxService()
+    statements = _fixture(market, 'statements', market.statements)
+    range_info = _fixture(market, 'range_info', market.range_info)
+    return lambda: service.create_company_analysis_dataframe(range_info, statements)
+
+
+@benchmark('invest_idx.analysis_invest_idx', check=lambda result: bool(result['investment_zones']))
+def _analysis_invest_idx(market):
+    from app.service.invest_idx import InvestIdxService
+
+    service = InvestIdxService()
+    ratio_panel = _fixture(market, 'ratio_panel', market.ratio_panel)
+    return lambda: service.analysis_invest_idx(ratio_panel)
+
+
+@benchmark('back_test.run_monthly_rebalancing_backtest', check=lambda result: len(result['monthly_returns']) > 0)
+def _run_monthly_rebalancing_backtest(market):
+    from app.service.back_test import BackTestService
+
+    service = BackTestService()
+    ratio_panel = _fixture(market, 'ratio_panel', market.ratio_panel)
+    test_data = ratio_panel.rename(columns={'corp_name': '종목명', 'type': '구분'})
+    return lambda: service.run_monthly_rebalancing_backtest(test_data, 10_000_000, 10, SCREENING_CRITERIA)
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """tracemalloc 아래에서 한 번 (최대 메모리, 워밍업 겸) 실행한 뒤 repeat번 시간을 잰다."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'seconds': statistics.median(timings),
+        'min_seconds': min(timings),
+        'peak_bytes': peak_bytes,
+        'result': result
+    }
+
+
+def run_benchmarks(scales: List[Tuple[int, int]], names: List[str], repeat: int, seed: int) -> Dict[str, dict]:
+    from app.bench.synthetic import SyntheticMarket
+
+    results = {}
+    for stocks, years in scales:
+        started = time.perf_counter()
+        market = SyntheticMarket(stocks, years, seed=seed)
+        logger.info(f"가상 데이터 생성: {stocks}종목 x {years}년 ({len(market.dates)}영업일), {time.perf_counter() - started:.1f}초")
+
+        for name in names:
+            setup, check = BENCHMARKS[name]
+            measured = measure(setup(market), repeat)
+            if not check(measured.pop('result')):
+                raise RuntimeError(f"{name} ({stocks}x{years}) 결과가 비어있습니다. 서비스 오류 로그를 확인하세요.")
+            key = f"{name}@{stocks}x{years}"
+            results[key] = {k: round(v, 6) if isinstance(v, float) else v for k, v in measured.items()}
+            logger.info(f"{key}: {measured['seconds'] * 1000:.1f}ms, 최대 {measured['peak_bytes'] / 1024 ** 2:.1f}MB")
+        _fixtures.clear()
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float, memory_threshold: float,
+            min_seconds: float = 0.005, min_bytes: int = 1024 ** 2) -> List[dict]:
+    """기준값 대비 변화율. 아주 짧거나 작은 측정값은 잡음이 커서 절대 차이(min_seconds, min_bytes)를 넘을 때만 회귀로 본다."""
+    rows = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        row = {'benchmark': key, **current, 'time_change': None, 'memory_change': None, 'regression': []}
+        if base:
+            row['time_change'] = current['seconds'] / base['seconds'] - 1 if base['seconds'] else None
+            row['memory_change'] = current['peak_bytes'] / base['peak_bytes'] - 1 if base['peak_bytes'] else None
+            if (row['time_change'] is not None and row['time_change'] > threshold
+                    and current['seconds'] - base['seconds'] > min_seconds):
+                row['regression'].append('time')
+            if (row['memory_change'] is not None and row['memory_change'] > memory_threshold
+                    and current['peak_bytes'] - base['peak_bytes'] > min_bytes):
+                row['regression'].append('memory')
+        rows.append(row)
+    return rows
+
+
+def format_report(rows: List[dict]) -> str:
+    def change(value):
+        return '-' if value is None else f"{value * 100:+.1f}%"
+
+    lines = [f"{'benchmark':<62} {'median':>10} {'min':>10} {'peak MB':>9} {'time':>8} {'memory':>8}"]
+    for row in rows:
+        flag = f"  ← 회귀 ({', '.join(row['regression'])})" if row['regression'] else ''
+        lines.append(f"{row['benchmark']:<62} {row['seconds'] * 1000:>8.1f}ms {row['min_seconds'] * 1000:>8.1f}ms "
+                     f"{row['peak_bytes'] / 1024 ** 2:>9.1f} {change(row['time_change']):>8} "
+                     f"{change(row['memory_change']):>8}{flag}")
+    return '\n'.join(lines)
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {'machine': None, 'results': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, baseline: Dict[str, Any], results: Dict[str, dict]):
+    # 이번에 돌린 항목만 덮어쓰고 나머지 규모의 기준값은 유지한다
+    baseline = {'machine': machine_info(), 'results': {**baseline.get('results', {}), **results}}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def machine_info() -> Dict[str, Any]:
+    import numpy
+    import pandas
+
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__
+    }
+
+
+def _parse_scale(value: str) -> Tuple[int, int]:
+    match = re.fullmatch(r'(\d+)x(\d+)', value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"규모는 '종목수x연도수' 형식이어야 합니다: {value}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.bench', description='가상 데이터로 서비스 함수 시간/메모리를 측정한다')
+    parser.add_argument('--preset', choices=list(PRESETS), default='quick', help='측정 규모 묶음')
+    parser.add_argument('--scale', type=_parse_scale, action='append', help="규모 직접 지정 (예: 2500x5, 여러 번 가능)")
+    parser.add_argument('--only', default=None, help='이름에 이 정규식이 포함된 벤치마크만 실행')
+    parser.add_argument('--repeat', type=int, default=3, help='시간 측정 반복 횟수 (중앙값 사용)')
+    parser.add_argument('--seed', type=int, default=0, help='가상 데이터 seed')
+    parser.add_argument('--baseline', default='bench/baseline.json', help='기준값 JSON 파일')
+    parser.add_argument('--save-baseline', action='store_true', help='이번 결과로 기준값 갱신')
+    parser.add_argument('--threshold', type=float, default=0.25, help='시간 회귀 임계값 (0.25 = 25%% 느려지면 실패)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='최대 메모리 회귀 임계값')
+    parser.add_argument('--out', default=None, help='이번 결과를 JSON으로 저장할 경로')
+    args = parser.parse_args(argv)
+
+    # 외부 캐시/추적 없이 함수 자체만 재도록 앱 설정 임포트 전에 지정한다
+    os.environ['CACHE_BACKEND'] = 'none'
+    os.environ['TRACE_EXPORTER'] = 'none'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('LOG_LEVELS', 'app.bench=INFO')
+    os.environ.setdefault('TQDM_DISABLE', '1')
+    from app.core.config import settings  # noqa: F401  (로깅 설정)
+
+    names = [name for name in BENCHMARKS if args.only is None or re.search(args.only, name)]
+    if not names:
+        parser.error(f"'{args.only}'에 해당하는 벤치마크가 없습니다: {', '.join(BENCHMARKS)}")
+
+    results = run_benchmarks(args.scale or PRESETS[args.preset], names, args.repeat, args.seed)
+
+    baseline = load_baseline(args.baseline)
+    if baseline['results'] and baseline.get('machine') != machine_info():
+        logger.warning(f"기준값이 다른 환경에서 측정되었습니다: {baseline.get('machine')}")
+    rows = compare(results, baseline['results'], args.threshold, args.memory_threshold)
+    print(format_report(rows))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine_info(), 'results': results}, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, baseline, results)
+        logger.info(f"기준값 저장: {args.baseline} ({len(results)}건)")
+        return 0
+
+    regressions = [row['benchmark'] for row in rows if row['regression']]
+    if regressions:
+        logger.error(f"성능 회귀 {len(regressions)}건: {', '.join(regressions)}")
+        return 1
+    return 0
@@ -0,0 +1,411 @@
+"""KRX/DART 대역 서버. 실제 API 대신 띄워 두고 KRX_API_URL / DART_API_URL만 이쪽으로 돌린다.
+
+사용법 (backend 디렉터리에서):
+
+    python -m app.bench.standin --port 9000                                  # 가상 시장(SyntheticMarket)으로 응답
+    python -m app.bench.standin --source fixtures --fixtures ./fixtures      # 녹화한 응답으로만 응답
+    python -m app.bench.standin --latency-ms krx=50,dart=80 --error-rate 429=0.02,503=0.01 \\
+        --holidays 20240102,20240103 --quota dart=10000 --rate dart=16
+    python -m app.bench.standin --record --fixtures ./fixtures              # 실제 API를 중계하며 응답을 녹화
+
+    KRX_API_URL=http://127.0.0.1:9000/svc/apis/sto DART_API_URL=http://127.0.0.1:9000/api uvicorn app.main:app
+
+경로의 마지막 조각(stk_bydd_trd, ksq_bydd_trd, corpCode.xml, fnlttSinglAcntAll.json)으로 엔드포인트를 고르므로
+앞쪽 경로는 실제 API와 같게 두면 된다. 녹화 파일은 엔드포인트/쿼리 파라미터(인증키 제외)별로 저장되어
+API 키 없이 다시 재생할 수 있다.
+
+장애 주입:
+    --latency-ms   서비스별 평균 지연 (±50% 흔듦)
+    --error-rate   상태 코드별 확률 (429는 Retry-After 헤더 포함)
+    --holidays     KRX가 빈 OutBlock_1로 응답할 날짜 (쉼표 구분 또는 @파일)
+    --quota        서비스별 인증키당 일일 호출 한도. 넘으면 KRX는 429, DART는 status 020
+    --rate         서비스별 초당 호출 한도. 넘으면 429
+
+GET /_standin/stats 로 호출/주입 통계를, POST /_standin/reset 으로 통계와 한도 사용량을 초기화한다.
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.bench.stubs import DART_ENDPOINTS, KRX_ENDPOINTS, StubBackends, StubResponse
+
+logger = logging.getLogger("app.bench.standin")
+
+# 녹화 키에서 빼는 인증 파라미터
+SECRET_PARAMS = {'crtfc_key', 'AUTH_KEY'}
+
+DART_QUOTA_EXCEEDED = {'status': '020', 'message': '요청 제한을 초과하였습니다.'}
+ERROR_MESSAGES = {
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    502: 'Bad Gateway',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout'
+}
+
+
+def service_of(endpoint: str) -> Optional[str]:
+    if endpoint in KRX_ENDPOINTS:
+        return 'krx'
+    if endpoint in DART_ENDPOINTS:
+        return 'dart'
+    return None
+
+
+class FixtureStore:
+    """녹화한 응답을 {root}/{endpoint}/{파라미터}.bin (+ .meta.json)으로 저장하고 읽는다."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, endpoint: str, params: dict) -> str:
+        key = '_'.join(f"{name}-{params[name]}" for name in sorted(params) if name not in SECRET_PARAMS)
+        key = re.sub(r'[^0-9A-Za-z_.-]', '', key) or 'default'
+        return os.path.join(self.root, endpoint, f"{key}.bin")
+
+    def load(self, endpoint: str, params: dict) -> Optional[StubResponse]:
+        path = self.path(endpoint, params)
+        if not os.path.exists(path):
+            return None
+        with open(f"{path}.meta.json", encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(path, 'rb') as f:
+            return StubResponse(meta['status_code'], f.read(), meta['content_type'])
+
+    def save(self, endpoint: str, params: dict, response: StubResponse):
+        path = self.path(endpoint, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(response.content)
+        os.replace(f"{path}.tmp", path)
+        with open(f"{path}.meta.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                'status_code': response.status_code,
+                'content_type': response.headers['Content-Type'],
+                'recorded_at': datetime.datetime.now().isoformat(timespec='seconds')
+            }, f, ensure_ascii=False)
+
+
+class FaultPlan:
+    """지연, 무작위 오류, 일일 한도, 초당 한도를 서비스(krx/dart)별로 정한다. seed가 같으면 같은 순서로 오류를 낸다."""
+
+    def __init__(self, latency: Dict[str, float] = None, error_rates: Dict[int, float] = None,
+                 quotas: Dict[str, int] = None, rates: Dict[str, int] = None, seed: int = 0):
+        self.latency = latency or {}
+        self.error_rates = error_rates or {}
+        self.quotas = quotas or {}
+        self.rates = rates or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._usage: Dict[Tuple[str, str, str], int] = collections.Counter()
+        self._recent: Dict[str, collections.deque] = collections.defaultdict(collections.deque)
+
+    def delay(self, service: str) -> float:
+        latency = self.latency.get(service, 0.0)
+        with self._lock:
+            return latency * self._random.uniform(0.5, 1.5) if latency > 0 else 0.0
+
+    def check(self, service: str, api_key: str) -> Optional[str]:
+        """이번 호출에 낼 장애 종류('quota', 'rate', 상태 코드 문자열) 또는 None."""
+        with self._lock:
+            quota = self.quotas.get(service)
+            if quota is not None:
+                usage_key = (service, api_key, datetime.date.today().strftime('%Y%m%d'))
+                if self._usage[usage_key] >= quota:
+                    return 'quota'
+                self._usage[usage_key] += 1
+
+            rate = self.rates.get(service)
+            if rate is not None:
+                now = time.monotonic()
+                recent = self._recent[service]
+                while recent and now - recent[0] >= 1.0:
+                    recent.popleft()
+                if len(recent) >= rate:
+                    return 'rate'
+                recent.append(now)
+
+            draw = self._random.random()
+            for status_code, probability in self.error_rates.items():
+                if draw < probability:
+                    return str(status_code)
+                draw -= probability
+        return None
+
+    def usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{service}:{api_key[:4]}…:{day}": count for (service, api_key, day), count in self._usage.items()}
+
+    def reset(self):
+        with self._lock:
+            self._usage.clear()
+            self._recent.clear()
+
+
+class StandIn:
+    """요청 하나를 장애 주입 → 휴장일 → 녹화/재생/가상 데이터 순으로 처리한다.
+
+    source는 'synthetic', 'fixtures', 'both'(녹화본 우선, 없으면 가상 데이터) 중 하나다.
+    record가 켜져 있으면 upstream(서비스별 실제 API 주소)에 그대로 중계하고 200 응답을 녹화한다.
+    """
+
+    def __init__(self, source: str = 'synthetic', backends: Optional[StubBackends] = None,
+                 fixtures: Optional[FixtureStore] = None, faults: Optional[FaultPlan] = None,
+                 holidays: Iterable[str] = (), record: bool = False, upstream: Dict[str, str] = None):
+        if not record and source in ('synthetic', 'both') and backends is None:
+            raise ValueError("synthetic 응답에는 StubBackends가 필요합니다")
+        if (source in ('fixtures', 'both') or record) and fixtures is None:
+            raise ValueError("녹화/재생에는 --fixtures 디렉터리가 필요합니다")
+        self.source = source
+        self.backends = backends
+        self.fixtures = fixtures
+        self.faults = faults or FaultPlan()
+        self.holidays = set(holidays)
+        self.record = record
+        self.upstream = upstream or {}
+        self._client = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+
+    def _count(self, endpoint: str, name: str):
+        with self._lock:
+            self.stats[endpoint][name] += 1
+
+    async def handle(self, endpoint: str, params: dict, headers: dict) -> Response:
+        service = service_of(endpoint)
+        if service is None:
+            return JSONResponse({'message': f'unknown endpoint: {endpoint}'}, status_code=404)
+        self._count(endpoint, 'calls')
+
+        delay = self.faults.delay(service)
+        if delay:
+            await asyncio.sleep(delay)
+
+        api_key = headers.get('auth_key', '') if service == 'krx' else params.get('crtfc_key', '')
+        fault = self.faults.check(service, api_key)
+        if fault is not None:
+            self._count(endpoint, f"fault_{fault}")
+            return self._fault_response(service, fault)
+
+        if service == 'krx' and params.get('basDd') in self.holidays:
+            self._count(endpoint, 'holiday')
+            return Response(orjson.dumps({'OutBlock_1': []}), media_type='application/json')
+
+        if self.record:
+            response = await self._relay(service, endpoint, params, headers)
+        else:
+            response = self._lookup(endpoint, params)
+        self._count(endpoint, f"status_{response.status_code}")
+        return Response(response.content, status_code=response.status_code,
+                        media_type=response.headers['Content-Type'])
+
+    def _lookup(self, endpoint: str, params: dict) -> StubResponse:
+        if self.source in ('fixtures', 'both'):
+            response = self.fixtures.load(endpoint, params)
+            if response is not None:
+                self._count(endpoint, 'fixture_hit')
+                return response
+            self._count(endpoint, 'fixture_miss')
+            if self.source == 'fixtures':
+                logger.warning(f"녹화본 없음: {endpoint} {self._public(params)}")
+                return self._empty(endpoint)
+        return self.backends.respond(endpoint, params)
+
+    async def _relay(self, service: str, endpoint: str, params: dict, headers: dict) -> StubResponse:
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=60)
+        url = f"{self.upstream[service].rstrip('/')}/{endpoint}"
+        forward = {'AUTH_KEY': headers['auth_key']} if 'auth_key' in headers else {}
+        upstream = await self._client.get(url, params=params, headers=forward)
+        response = StubResponse(upstream.status_code, upstream.content,
+                                upstream.headers.get('content-type', 'application/json'))
+        if upstream.status_code == 200 and self._recordable(endpoint, upstream.content):
+            self.fixtures.save(endpoint, params, response)
+            self._count(endpoint, 'recorded')
+            logger.info(f"녹화: {endpoint} {self._public(params)} ({len(upstream.content):,}B)")
+        else:
+            logger.warning(f"실제 API 오류 응답은 녹화하지 않음: {endpoint} {self._public(params)} → {upstream.status_code}")
+        return response
+
+    @staticmethod
+    def _recordable(endpoint: str, content: bytes) -> bool:
+        # DART는 키 오류/한도 초과도 HTTP 200으로 주므로 정상(000)과 데이터 없음(013)만 녹화한다
+        if endpoint != 'fnlttSinglAcntAll.json':
+            return True
+        try:
+            return orjson.loads(content).get('status') in ('000', '013')
+        except orjson.JSONDecodeError:
+            return False
+
+    def _fault_response(self, service: str, fault: str) -> Response:
+        if fault == 'quota' and service == 'dart':
+            # DART는 한도 초과를 HTTP 200 + status 020으로 알린다
+            return Response(orjson.dumps(DART_QUOTA_EXCEEDED), media_type='application/json')
+        status_code = 429 if fault in ('quota', 'rate') else int(fault)
+        headers = {'Retry-After': '1'} if status_code == 429 else None
+        return JSONResponse({'message': ERROR_MESSAGES.get(status_code, 'Error')},
+                            status_code=status_code, headers=headers)
+
+    def _empty(self, endpoint: str) -> StubResponse:
+        if service_of(endpoint) == 'krx':
+            return StubResponse(200, orjson.dumps({'OutBlock_1': []}))
+        if endpoint == 'corpCode.xml':
+            return StubResponse(404, b'{"message": "corpCode.xml fixture missing"}')
+        return StubResponse(200, orjson.dumps({'status': '013', 'message': '조회된 데이타가 없습니다.'}))
+
+    @staticmethod
+    def _public(params: dict) -> dict:
+        return {name: value for name, value in params.items() if name not in SECRET_PARAMS}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            endpoints = {endpoint: dict(counter) for endpoint, counter in self.stats.items()}
+        return {'source': 'record' if self.record else self.source, 'endpoints': endpoints,
+                'quota_usage': self.faults.usage()}
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+        self.faults.reset()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+
+def create_app(standin: StandIn) -> FastAPI:
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await standin.close()
+
+    app = FastAPI(title='KRX/DART stand-in', docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan)
+
+    @app.get('/_standin/stats')
+    async def stats():
+        return standin.snapshot()
+
+    @app.post('/_standin/reset')
+    async def reset():
+        standin.reset()
+        return {'reset': True}
+
+    @app.get('/{path:path}')
+    async def dispatch(path: str, request: Request):
+        endpoint = path.rsplit('/', 1)[-1]
+        return await standin.handle(endpoint, dict(request.query_params), dict(request.headers))
+
+    return app
+
+
+def _parse_pairs(value: str, cast) -> dict:
+    """'krx=50,dart=80' 형식을 dict로."""
+    pairs = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, sep, number = item.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"NAME=값 형식이어야 합니다: {item}")
+        try:
+            pairs[name.strip()] = cast(number)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(f"값을 읽을 수 없습니다: {item}") from e
+    return pairs
+
+
+def _parse_holidays(value: str) -> list:
+    if value.startswith('@'):
+        with open(value[1:], encoding='utf-8') as f:
+            value = f.read()
+    holidays = [day.strip() for day in re.split(r'[,\s]+', value) if day.strip()]
+    invalid = [day for day in holidays if not re.fullmatch(r'\d{8}', day)]
+    if invalid:
+        raise argparse.ArgumentTypeError(f"휴장일은 YYYYMMDD 형식이어야 합니다: {invalid}")
+    return holidays
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.bench.standin', description='KRX/DART 대역 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--source', choices=['synthetic', 'fixtures', 'both'], default='synthetic',
+                        help='응답 출처 (both: 녹화본 우선, 없으면 가상 데이터)')
+    parser.add_argument('--fixtures', default=None, help='녹화본 디렉터리')
+    parser.add_argument('--record', action='store_true', help='실제 API에 중계하며 응답을 --fixtures에 녹화')
+    parser.add_argument('--upstream-krx', default='http://data-dbg.krx.co.kr/svc/apis/sto')
+    parser.add_argument('--upstream-dart', default='https://opendart.fss.or.kr/api')
+    parser.add_argument('--stocks', type=int, default=1000, help='가상 시장 종목 수')
+    parser.add_argument('--years', type=int, default=1, help='가상 시장 연도 수')
+    parser.add_argument('--seed', type=int, default=0, help='가상 시장과 오류 주입 난수 seed')
+    parser.add_argument('--latency-ms', type=lambda v: _parse_pairs(v, float), default={},
+                        help='서비스별 평균 지연, 예: krx=50,dart=80')
+    parser.add_argument('--error-rate', type=lambda v: _parse_pairs(v, float), default={},
+                        help='상태 코드별 오류 확률, 예: 429=0.02,500=0.01')
+    parser.add_argument('--holidays', type=_parse_holidays, default=[], help='YYYYMMDD,... 또는 @파일')
+    parser.add_argument('--quota', type=lambda v: _parse_pairs(v, int), default={},
+                        help='서비스별 인증키당 일일 호출 한도, 예: dart=20000')
+    parser.add_argument('--rate', type=lambda v: _parse_pairs(v, int), default={},
+                        help='서비스별 초당 호출 한도, 예: dart=16')
+    args = parser.parse_args(argv)
+
+    from app.core.log import configure_logging
+    configure_logging()
+    # 중계 요청 URL에 DART 인증키가 들어가므로 httpx 요청 로그는 끈다
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    unknown = set(args.latency_ms) | set(args.quota) | set(args.rate)
+    unknown -= {'krx', 'dart'}
+    if unknown:
+        parser.error(f"서비스 이름은 krx 또는 dart여야 합니다: {sorted(unknown)}")
+    error_rates = {int(status_code): rate for status_code, rate in args.error_rate.items()}
+    if sum(error_rates.values()) > 1:
+        parser.error("--error-rate 확률 합이 1을 넘습니다")
+
+    backends = None
+    if args.source in ('synthetic', 'both') and not args.record:
+        from app.bench.synthetic import SyntheticMarket
+        backends = StubBackends(SyntheticMarket(stocks=args.stocks, years=args.years, seed=args.seed))
+    try:
+        standin = StandIn(
+            source=args.source,
+            backends=backends,
+            fixtures=FixtureStore(args.fixtures) if args.fixtures else None,
+            faults=FaultPlan(
+                latency={service: ms / 1000 for service, ms in args.latency_ms.items()},
+                error_rates=error_rates,
+                quotas=args.quota,
+                rates=args.rate,
+                seed=args.seed
+            ),
+            holidays=args.holidays,
+            record=args.record,
+            upstream={'krx': args.upstream_krx, 'dart': args.upstream_dart}
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    import uvicorn
+
+    mode = f"녹화 (→ {args.upstream_krx}, {args.upstream_dart})" if args.record else args.source
+    logger.info(f"KRX/DART 대역 서버: http://{args.host}:{args.port} [{mode}]")
+    uvicorn.run(create_app(standin), host=args.host, port=args.port, log_level='warning')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
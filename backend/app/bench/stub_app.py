@@ -0,0 +1,12 @@
+"""가짜 KRX/DART 백엔드를 설치한 app.main:app. 외부 API 없이 서버를 띄워 부하 테스트할 때 쓴다.
+
+    LOADTEST_STOCKS=1000 LOADTEST_DART_LATENCY_MS=80 uvicorn app.bench.stub_app:app --workers 4
+
+가상 시장 규모와 지연은 LOADTEST_STOCKS / LOADTEST_YEARS / LOADTEST_SEED / LOADTEST_KRX_LATENCY_MS /
+LOADTEST_DART_LATENCY_MS / LOADTEST_HOLIDAYS(YYYYMMDD,...), 주가 패널 CSV 위치는 LOADTEST_DATA_DIR로 정한다.
+"""
+from app.bench.stubs import install_from_env
+
+install_from_env()
+
+from app.main import app  # noqa: E402
@@ -0,0 +1,212 @@
+"""오프라인 실행용 가짜 KRX/DART 백엔드.
+
+SyntheticMarket 데이터를 실제 API와 같은 응답 형식(KRX OutBlock_1 JSON, DART corpCode.xml ZIP,
+fnlttSinglAcntAll.json)으로 만들어 requests.get 자리에 설치한다. 응답 파싱, 캐시, 메트릭 등 앱 코드는 그대로 탄다.
+"""
+import io
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+import orjson
+
+from app.bench.synthetic import SyntheticMarket
+
+logger = logging.getLogger(__name__)
+
+KRX_ENDPOINTS = ('stk_bydd_trd', 'ksq_bydd_trd')
+DART_ENDPOINTS = ('corpCode.xml', 'fnlttSinglAcntAll.json')
+
+# 서비스가 찾는 DART 계정명 (DartApi._get_one_quarter의 키워드 중 첫 번째)
+DART_ACCOUNT_NAMES = {
+    '영업이익': '영업이익(손실)',
+    '당기순이익': '당기순이익(손실)'
+}
+
+
+class StubResponse:
+    """requests.Response 중 서비스가 쓰는 부분만 흉내 낸다."""
+
+    def __init__(self, status_code: int, content: bytes, content_type: str = 'application/json'):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'Content-Type': content_type}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return orjson.loads(self.content)
+
+
+class StubBackends:
+    """URL 경로로 KRX/DART 엔드포인트를 골라 가상 데이터로 응답한다.
+
+    latency는 호출당 평균 지연(초)이며 ±50% 범위에서 흔든다. 0이면 지연 없이 응답한다.
+    holidays에 준 날짜는 영업일이어도 휴장일(빈 OutBlock_1)로 응답한다.
+    """
+
+    def __init__(self, market: SyntheticMarket, krx_latency: float = 0.0, dart_latency: float = 0.0,
+                 holidays: Iterable[str] = ()):
+        self.market = market
+        self.krx_latency = krx_latency
+        self.dart_latency = dart_latency
+        self.trading_days = set(market.dates) - set(holidays)
+        self.corp_codes = {f"{index + 1:08d}": index for index in range(market.stocks)}
+        self._quarters = {(str(year), code): i for i, (year, code, _) in enumerate(market.quarters)}
+        self._corp_code_zip: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+
+    def get(self, url: str, params: dict = None, headers: dict = None, **kwargs) -> StubResponse:
+        params = params or {}
+        endpoint = urlparse(url).path.rsplit('/', 1)[-1]
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        self._sleep(self.krx_latency if endpoint in KRX_ENDPOINTS else self.dart_latency)
+        return self.respond(endpoint, params)
+
+    def respond(self, endpoint: str, params: dict) -> StubResponse:
+        """지연 없이 엔드포인트 이름과 쿼리 파라미터로 응답을 만든다."""
+        if endpoint in KRX_ENDPOINTS:
+            return StubResponse(200, orjson.dumps(self.krx_daily(endpoint, params.get('basDd', ''))))
+        if endpoint == 'corpCode.xml':
+            return StubResponse(200, self.corp_code_zip(), 'application/x-msdownload')
+        if endpoint == 'fnlttSinglAcntAll.json':
+            return StubResponse(200, orjson.dumps(self.financial_statement(
+                params.get('corp_code', ''), str(params.get('bsns_year', '')), params.get('reprt_code', ''))))
+        return StubResponse(404, b'{"message": "unknown endpoint"}')
+
+    def krx_daily(self, endpoint: str, basDd: str) -> dict:
+        """KRX 일별매매정보 응답. 거래일이 아니면 빈 OutBlock_1 (휴장일)."""
+        if basDd not in self.trading_days:
+            return {'OutBlock_1': []}
+        snapshot = self.market.snapshot(basDd)
+        market_type = 'KOSPI' if endpoint == 'stk_bydd_trd' else 'KOSDAQ'
+        snapshot = snapshot[snapshot['marketType'] == market_type]
+        return {'OutBlock_1': [
+            {
+                'BAS_DD': basDd,
+                'ISU_CD': row.stockCode,
+                'ISU_NM': row.stockName,
+                'MKT_NM': row.marketType,
+                'SECT_TP_NM': row.sectorType,
+                'TDD_CLSPRC': f"{row.closingPrice:,.0f}",
+                'CMPPREVDD_PRC': f"{row.priceChange:,.0f}",
+                'FLUC_RT': f"{row.fluctuationRate:.2f}",
+                'TDD_OPNPRC': f"{row.openingPrice:,.0f}",
+                'TDD_HGPRC': f"{row.highPrice:,.0f}",
+                'TDD_LWPRC': f"{row.lowPrice:,.0f}",
+                'ACC_TRDVOL': f"{row.tradingVolume:,}",
+                'ACC_TRDVAL': f"{row.tradingValue:,.0f}",
+                'MKTCAP': f"{row.marketCap:,.0f}",
+                'LIST_SHRS': f"{row.listedShares:,}"
+            }
+            for row in snapshot.itertuples(index=False)
+        ]}
+
+    def corp_code_zip(self) -> bytes:
+        """DART 고유번호 목록 (CORPCODE.xml을 담은 ZIP)."""
+        if self._corp_code_zip is None:
+            items = ''.join(
+                f"<list><corp_code>{corp_code}</corp_code><corp_name>{escape(self.market.names[index])}</corp_name>"
+                f"<stock_code>{self.market.codes[index]}</stock_code><modify_date>20240101</modify_date></list>"
+                for corp_code, index in self.corp_codes.items()
+            )
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr('CORPCODE.xml', f'<?xml version="1.0" encoding="UTF-8"?><result>{items}</result>')
+            self._corp_code_zip = buffer.getvalue()
+        return self._corp_code_zip
+
+    def financial_statement(self, corp_code: str, bsns_year: str, reprt_code: str) -> dict:
+        """단일회사 전체 재무제표 응답. 없는 기업/분기는 DART와 같이 status 013."""
+        index = self.corp_codes.get(corp_code)
+        quarter = self._quarters.get((bsns_year, reprt_code))
+        if index is None or quarter is None:
+            return {'status': '013', 'message': '조회된 데이타가 없습니다.'}
+
+        rcept_no = f"{self.market.disclosure_date(index, quarter)}{index % 1000000:06d}"
+        return {
+            'status': '000',
+            'message': '정상',
+            'list': [
+                {
+                    'rcept_no': rcept_no,
+                    'bsns_year': bsns_year,
+                    'corp_code': corp_code,
+                    'reprt_code': reprt_code,
+                    'sj_div': 'BS' if category.startswith('BS') else 'CIS',
+                    'account_nm': DART_ACCOUNT_NAMES.get(subject, subject),
+                    'thstrm_amount': str(int(value))
+                }
+                for category, subject, value in self.market.quarter_accounts(index, quarter)
+            ]
+        }
+
+    def _sleep(self, latency: float):
+        if latency > 0:
+            time.sleep(latency * random.uniform(0.5, 1.5))
+
+
+def install(backends: StubBackends, data_dir: Optional[str] = None) -> str:
+    """requests.get을 가짜 백엔드로 바꾸고, 연도별 주가 패널 CSV를 data_dir에 써서 get_stock_file이 읽게 한다."""
+    import requests
+
+    from app.service.invest_idx import InvestIdxService
+
+    data_dir = data_dir or tempfile.mkdtemp(prefix='quantus-stub-')
+    os.makedirs(data_dir, exist_ok=True)
+    for year in backends.market.years:
+        path = os.path.join(data_dir, f"stock_data_{year}.csv")
+        if not os.path.exists(path):
+            # 여러 워커가 동시에 만들 수 있으므로 임시 파일에 쓴 뒤 바꿔치기한다
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            backends.market.price_panel(year).to_csv(temp_path, index=False)
+            os.replace(temp_path, path)
+
+    requests.get = backends.get
+    InvestIdxService.get_stock_file = lambda self, start_date: self._read_stock_file(
+        os.path.join(data_dir, f"stock_data_{start_date[:4]}.csv"))
+    logger.info(f"가짜 KRX/DART 백엔드 설치: {backends.market.stocks}종목, {backends.market.years}년, 주가 패널 {data_dir}")
+    return data_dir
+
+
+def configure_environment():
+    """설정 검증을 통과하도록 외부 API 설정 기본값을 채운다. 앱 설정 임포트 전에 불러야 한다."""
+    for name, value in {
+        'PROJECT_NAME': 'quantus-loadtest',
+        'KRX_API_KEY': 'stub',
+        'KRX_API_URL': 'http://krx.stub/svc/apis/sto',
+        'DART_API_KEY': 'stub',
+        'DART_API_URL': 'http://dart.stub/api',
+        # 가상 사용자는 한 IP에서 접속하므로 X-Client-Id로 구분한다 (부하 테스트 환경에서만 신뢰)
+        'CLIENT_ID_HEADER': 'X-Client-Id'
+    }.items():
+        os.environ.setdefault(name, value)
+
+
+def install_from_env() -> StubBackends:
+    """LOADTEST_* 환경 변수로 가상 시장을 만들고 설치한다 (uvicorn 워커마다 같은 데이터)."""
+    configure_environment()
+    market = SyntheticMarket(
+        stocks=int(os.environ.get('LOADTEST_STOCKS', '1000')),
+        years=int(os.environ.get('LOADTEST_YEARS', '1')),
+        seed=int(os.environ.get('LOADTEST_SEED', '0'))
+    )
+    backends = StubBackends(
+        market,
+        krx_latency=float(os.environ.get('LOADTEST_KRX_LATENCY_MS', '0')) / 1000,
+        dart_latency=float(os.environ.get('LOADTEST_DART_LATENCY_MS', '0')) / 1000,
+        holidays=filter(None, os.environ.get('LOADTEST_HOLIDAYS', '').split(','))
+    )
+    install(backends, os.environ.get('LOADTEST_DATA_DIR'))
+    return backends
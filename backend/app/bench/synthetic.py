@@ -0,0 +1,277 @@
+"""벤치마크용 가상 시장 데이터.
+
+같은 (종목 수, 연도 수, seed)이면 항상 같은 값을 만든다. 모양은 실제 파이프라인 단계의 입력과 같다.
+
+- snapshot(): KrxApi.get_stock_list 결과 (종목별 일별 시세 스냅샷)
+- price_panel(): data/stock_data_{연도}.csv 종가 패널
+- statement_frame() / statements(): DartApi._get_corp_financial 결과와 StatementResult 목록
+- range_info(): 후보 종목 + 종가 패널 (InvestIdxService.get_candidates_range_info 결과)
+- ratio_panel(): InvestIdxService.create_company_analysis_dataframe 결과 (기업별 종가/PER/PBR/ROE/ROA/영업이익률/부채비율)
+"""
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# DartApi._get_corp_financial이 만드는 계정 목록과 같은 순서
+ACCOUNTS = {
+    'CIS': ['매출액', '매출총이익', '매출원가', '영업이익', '당기순이익', '금융원가', '금융수익'],
+    'BS_자산': ['자산총계', '유동자산', '현금및현금성자산'],
+    'BS_부채': ['부채총계', '유동부채'],
+    'BS_자본': ['자본총계', '자본금']
+}
+RATIO_TYPES = ['closingPrice', 'PER', 'PBR', 'ROE', 'ROA', '영업이익률', '부채비율']
+
+# 보고서 코드별 (분기 이름, 공시 월일, 공시 연도 차이)
+REPORTS = [
+    ('11013', '1Q', '0515', 0),
+    ('11012', '2Q', '0814', 0),
+    ('11014', '3Q', '1114', 0),
+    ('11011', '4Q', '0331', 1),
+]
+
+SECTORS = ['제조', '서비스', 'IT', '금융', '유통', '건설', '바이오', '관리종목(소속부없음)']
+# 필터 단계가 실제로 걸러낼 이름도 섞는다 (ETF, 우선주, 스팩 등)
+SPECIAL_NAMES = ['KODEX 200', 'TIGER 인버스', '우선주', '스팩', 'ARIRANG 레버리지', 'HK이노엔']
+
+
+class SyntheticMarket:
+    """종목 stocks개 x years년치 가상 시장. end_year 12월 말까지의 영업일을 쓴다."""
+
+    def __init__(self, stocks: int = 100, years: int = 1, seed: int = 0, end_year: int = 2024):
+        if not 1 <= years <= 9 or end_year - years + 1 < 2020:
+            # 서비스가 날짜 컬럼을 '202xxxxx'로 찾기 때문에 2020년대만 쓸 수 있다
+            raise ValueError("연도 범위는 2020년 이후여야 합니다.")
+        self.stocks = stocks
+        self.years = list(range(end_year - years + 1, end_year + 1))
+        rng = np.random.default_rng(seed)
+
+        self.dates: List[str] = list(pd.bdate_range(f"{self.years[0]}-01-02", f"{end_year}-12-30").strftime('%Y%m%d'))
+        self.codes = [f"{i:06d}" for i in range(1, stocks + 1)]
+        names = [f"종목{code}" for code in self.codes]
+        for i in range(0, stocks, 40):
+            names[i] = f"{SPECIAL_NAMES[(i // 40) % len(SPECIAL_NAMES)]} {i}"
+        self.names = names
+        self.market_types = np.where(rng.random(stocks) < 0.45, 'KOSPI', 'KOSDAQ')
+        self.sectors = rng.choice(SECTORS, stocks, p=[0.3, 0.15, 0.2, 0.1, 0.1, 0.05, 0.08, 0.02])
+
+        # 종가: 종목별 추세/변동성이 다른 기하 랜덤워크 (원 단위 반올림)
+        days = len(self.dates)
+        drift = rng.normal(0.0003, 0.0006, stocks)
+        volatility = rng.uniform(0.01, 0.035, stocks)
+        log_returns = rng.normal(drift[:, None], volatility[:, None], (stocks, days))
+        start_price = np.exp(rng.uniform(np.log(1_000), np.log(300_000), stocks))
+        self.prices = np.maximum(np.round(start_price[:, None] * np.exp(np.cumsum(log_returns, axis=1))), 1.0)
+        self.shares = rng.integers(1_000_000, 500_000_000, stocks)
+        self.volumes = (rng.lognormal(11, 1.5, (stocks, days))).astype(np.int64)
+
+        # 재무제표: 시가총액 수준에 맞춘 매출에서 이익률/부채비율을 뽑아 분기별로 흔든다
+        self.quarters = self._build_quarters()
+        self._fundamentals = self._build_fundamentals(rng)
+        self._disclosure = self._build_disclosure_dates(rng)
+
+    # ----- KRX -----
+
+    def snapshot(self, date: str) -> pd.DataFrame:
+        """KrxApi.get_stock_list 결과와 같은 컬럼의 일별 스냅샷. 마지막 1%는 상장 폐지로 보고 마지막 연도에 빠진다."""
+        day = self.dates.index(date) if date in self.dates else len(self.dates) - 1
+        listed = np.arange(self.stocks)
+        if date[:4] == str(self.years[-1]) and len(self.years) > 1:
+            listed = listed[: self.stocks - max(1, self.stocks // 100)]
+
+        close = self.prices[listed, day]
+        previous = self.prices[listed, max(day - 1, 0)]
+        change = close - previous
+        volume = self.volumes[listed, day]
+        return pd.DataFrame({
+            'baseDate': date,
+            'stockCode': [self.codes[i] for i in listed],
+            'stockName': [self.names[i] for i in listed],
+            'marketType': self.market_types[listed],
+            'sectorType': self.sectors[listed],
+            'closingPrice': close,
+            'priceChange': change,
+            'fluctuationRate': np.round(change / previous * 100, 2),
+            'openingPrice': previous,
+            'highPrice': np.maximum(close, previous),
+            'lowPrice': np.minimum(close, previous),
+            'tradingVolume': volume,
+            'tradingValue': volume * close,
+            'marketCap': close * self.shares[listed],
+            'listedShares': self.shares[listed]
+        })
+
+    def price_panel(self, year: int = None) -> pd.DataFrame:
+        """stockCode, stockName + 날짜별 종가 컬럼. year를 주면 그 해의 data/stock_data_{year}.csv와 같은 범위만."""
+        columns = [i for i, date in enumerate(self.dates) if year is None or date[:4] == str(year)]
+        panel = pd.DataFrame(self.prices[:, columns], columns=[self.dates[i] for i in columns])
+        panel.insert(0, 'stockName', self.names)
+        panel.insert(0, 'stockCode', self.codes)
+        return panel
+
+    # ----- DART -----
+
+    def quarter_info(self) -> List[dict]:
+        """DartApi._build_quarter_info와 같은 형식의 분기 목록."""
+        return [{'year': year, 'quarter': name, 'report_code': code, 'period': f"{year}_{code}"}
+                for year, code, name in self.quarters]
+
+    def statement_frame(self, index: int) -> pd.DataFrame:
+        """DartApi._get_corp_financial 결과와 같은 DataFrame (공시일 행 + 계정별 분기 값)."""
+        periods = [info['period'] for info in self.quarter_info()]
+        rows = [{'category': 'report_info', 'subject': 'report_date', 'find': 'O',
+                 **dict(zip(periods, self._disclosure[index]))}]
+        for account_index, (category, subject) in enumerate(self._accounts()):
+            values = self._fundamentals[index, account_index]
+            rows.append({'category': category, 'subject': subject, **dict(zip(periods, values.tolist())),
+                         'find': 'O' if values[0] != 0 else 'X'})
+        return pd.DataFrame(rows)
+
+    def disclosure_date(self, index: int, quarter: int) -> str:
+        """index번째 기업의 quarter번째 분기(self.quarters 순서) 공시일 (YYYYMMDD)."""
+        return self._disclosure[index][quarter]
+
+    def quarter_accounts(self, index: int, quarter: int) -> List[tuple]:
+        """index번째 기업의 quarter번째 분기 계정 값 [(category, subject, value), ...]."""
+        values = self._fundamentals[index][:, quarter]
+        return [(category, subject, value) for (category, subject), value in zip(self._accounts(), values.tolist())]
+
+    def statements(self) -> List[dict]:
+        """get_corp_statement 결과와 같은 StatementResult 목록 (공시일은 파이프라인처럼 float)."""
+        periods = [info['period'] for info in self.quarter_info()]
+        results = []
+        for index, name in enumerate(self.names):
+            data = [{'category': 'report_info', 'subject': 'report_date', 'find': 'O',
+                     'quarters': {period: float(date) for period, date in zip(periods, self._disclosure[index])}}]
+            for account_index, (category, subject) in enumerate(self._accounts()):
+                values = self._fundamentals[index, account_index]
+                data.append({'category': category, 'subject': subject, 'find': 'O' if values[0] != 0 else 'X',
+                             'quarters': dict(zip(periods, values.tolist()))})
+            results.append({'corp_name': name, 'data': data})
+        return results
+
+    # ----- 투자지표 -----
+
+    def range_info(self) -> pd.DataFrame:
+        """후보 종목(StockCmpData 컬럼) + 전체 기간 종가 컬럼."""
+        first, last = self.prices[:, 0], self.prices[:, -1]
+        candidates = pd.DataFrame({
+            'stockCode': self.codes,
+            'stockName': self.names,
+            'marketType': self.market_types,
+            'sectorType': self.sectors,
+            'start_closingPrice': first,
+            'end_closingPrice': last,
+            'annual_return': (last - first) / first * 100,
+            'start_marketCap': first * self.shares,
+            'end_marketCap': last * self.shares,
+            'market_cap_change': (last - first) / first * 100,
+            'start_listedShares': self.shares,
+            'end_listedShares': self.shares
+        })
+        return pd.merge(candidates, self.price_panel(), on=['stockCode', 'stockName'], how='inner')
+
+    def ratio_panel(self) -> pd.DataFrame:
+        """create_company_analysis_dataframe과 같은 규칙(공시일 기준 분기 선택, 1~3분기 연율화)으로 만든 패널.
+
+        매출 계정이 0인 기업은 filter_zero_accounts처럼 뺀다.
+        """
+        account = {subject: i for i, (_, subject) in enumerate(self._accounts())}
+        factors = np.array([1.0 if name == '4Q' else 4.0 for _, _, name in self.quarters])
+        date_values = np.array(self.dates, dtype=np.int64)
+
+        panel = np.full((self.stocks, len(RATIO_TYPES), len(self.dates)), np.nan)
+        panel[:, 0] = self.prices
+        for index in range(self.stocks):
+            disclosure = np.array(self._disclosure[index], dtype=np.int64)
+            # 공시일이 지난 마지막 분기, 아직 없으면 첫 분기
+            quarter = np.maximum(np.searchsorted(disclosure, date_values, side='right') - 1, 0)
+
+            values = self._fundamentals[index]
+            factor = factors[quarter]
+            net_income = values[account['당기순이익'], quarter] * factor
+            equity = values[account['자본총계'], quarter]
+            assets = values[account['자산총계'], quarter]
+            debt = values[account['부채총계'], quarter]
+            revenue = values[account['매출액'], quarter]
+            operating = values[account['영업이익'], quarter]
+            price = self.prices[index]
+            shares = self.shares[index]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                eps = net_income / shares
+                bps = equity / shares
+                panel[index, 1] = np.where(eps > 0, price / eps, np.nan)
+                panel[index, 2] = np.where(bps > 0, price / bps, np.nan)
+                panel[index, 3] = np.where(equity > 0, net_income / equity * 100, np.nan)
+                panel[index, 4] = np.where(assets > 0, net_income / assets * 100, np.nan)
+                panel[index, 5] = np.where(revenue > 0, operating / revenue * 100, np.nan)
+                panel[index, 6] = np.where(equity > 0, debt / equity * 100, np.nan)
+
+        kept = ~self.missing_revenue
+        frame = pd.DataFrame(panel[kept].reshape(-1, len(self.dates)), columns=self.dates)
+        frame.insert(0, 'type', RATIO_TYPES * int(kept.sum()))
+        frame.insert(0, 'corp_name', np.repeat(np.array(self.names)[kept], len(RATIO_TYPES)))
+        return frame
+
+    # ----- 내부 -----
+
+    def _accounts(self):
+        return [(category, subject) for category, subjects in ACCOUNTS.items() for subject in subjects]
+
+    def _build_quarters(self):
+        # 첫 해 초 조회 시 직전 3분기 보고서부터 필요하다 (DartApi._find_last_quarter와 같은 범위)
+        quarters = [(self.years[0] - 1, '11014', '3Q'), (self.years[0] - 1, '11011', '4Q')]
+        for year in self.years:
+            quarters.extend((year, code, name) for code, name, _, _ in REPORTS)
+        return quarters[:-1]
+
+    def _build_fundamentals(self, rng) -> np.ndarray:
+        stocks, quarters = self.stocks, len(self.quarters)
+        market_cap = self.prices[:, 0] * self.shares
+        revenue = market_cap * rng.lognormal(0.4, 0.6, stocks) / 4
+        growth = np.cumprod(1 + rng.normal(0.01, 0.08, (stocks, quarters)), axis=1)
+        quarter_revenue = revenue[:, None] * growth
+
+        gross_margin = rng.uniform(0.1, 0.5, stocks)[:, None]
+        operating_margin = rng.normal(0.06, 0.08, (stocks, 1)) + rng.normal(0, 0.02, (stocks, quarters))
+        net_margin = operating_margin * rng.uniform(0.5, 0.9, (stocks, 1))
+        assets = quarter_revenue * rng.uniform(2, 6, (stocks, 1))
+        debt_ratio = rng.uniform(0.2, 0.7, (stocks, 1))
+        equity = assets * (1 - debt_ratio)
+
+        columns = {
+            '매출액': quarter_revenue,
+            '매출총이익': quarter_revenue * gross_margin,
+            '매출원가': quarter_revenue * (1 - gross_margin),
+            '영업이익': quarter_revenue * operating_margin,
+            '당기순이익': quarter_revenue * net_margin,
+            '금융원가': quarter_revenue * 0.01,
+            '금융수익': quarter_revenue * 0.005,
+            '자산총계': assets,
+            '유동자산': assets * 0.4,
+            '현금및현금성자산': assets * 0.1,
+            '부채총계': assets * debt_ratio,
+            '유동부채': assets * debt_ratio * 0.5,
+            '자본총계': equity,
+            '자본금': equity * 0.2
+        }
+        values = np.stack([columns[subject] for _, subject in self._accounts()], axis=1).round()
+
+        # 일부 기업은 매출 공시가 없는 계정(0)을 가진다 → filter_zero_accounts에서 빠진다
+        self.missing_revenue = rng.random(stocks) < 0.05
+        values[self.missing_revenue, 0, :] = 0
+        return values
+
+    def _build_disclosure_dates(self, rng) -> Dict[int, List[str]]:
+        reports = {code: (day, offset) for code, _, day, offset in REPORTS}
+        dates = {}
+        for index in range(self.stocks):
+            jitter = int(rng.integers(-10, 1))
+            row = []
+            for year, code, _ in self.quarters:
+                day, offset = reports[code]
+                date = pd.Timestamp(f"{year + offset}{day}") + pd.Timedelta(days=jitter)
+                row.append(date.strftime('%Y%m%d'))
+            dates[index] = row
+        return dates
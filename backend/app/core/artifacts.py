@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.cache import estimate_size, fingerprint, shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactNotFound(KeyError):
+    pass
+
+
+class ArtifactStore:
+    """파이프라인 단계별 결과를 내용 해시 id로 보관하는 in-process 저장소 (TTL + LRU).
+
+    저장된 DataFrame은 여러 요청이 공유하므로 읽기 전용으로 다뤄야 한다.
+    shared 캐시가 주어지면 다른 워커 프로세스가 만든 artifact도 찾을 수 있도록 함께 기록하고,
+    만료/용량 초과로 밀어낼 때 공유 사본도 지운다 (/dev/shm에 결과가 계속 쌓이지 않도록).
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, max_bytes: int, shared=None):
+        self.shared = shared
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, stage: str, value: Any) -> str:
+        artifact_id = f"{stage}-{self.fingerprint(value)[:32]}"
+        size = self._estimate_size(value)
+        now = time.monotonic()
+
+        with self._lock:
+            if artifact_id in self._entries:
+                self._entries.move_to_end(artifact_id)
+                self._entries[artifact_id]['expires_at'] = now + self.ttl_seconds
+                return artifact_id
+
+            evicted = self._insert(artifact_id, stage, value, size, now)
+
+        if self.shared is not None:
+            self.shared.set(('artifact', artifact_id), (stage, value), ttl=self.ttl_seconds)
+        self._drop_shared(evicted)
+        return artifact_id
+
+    def get(self, artifact_id: str, stages: Optional[tuple] = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(artifact_id)
+            if entry is not None and entry['expires_at'] < now:
+                self._remove(artifact_id)
+                entry = None
+                expired = True
+            else:
+                expired = False
+            if entry is not None:
+                self._entries.move_to_end(artifact_id)
+
+        if expired:
+            self._drop_shared([artifact_id])
+            raise ArtifactNotFound(artifact_id)
+        if entry is None:
+            entry = self._get_shared(artifact_id, now)
+        if stages and entry['stage'] not in stages:
+            raise ArtifactNotFound(artifact_id)
+        return entry['value']
+
+    def _get_shared(self, artifact_id: str, now: float) -> dict:
+        shared = self.shared.get(('artifact', artifact_id)) if self.shared is not None else None
+        if shared is None:
+            raise ArtifactNotFound(artifact_id)
+        stage, value = shared
+        evicted = []
+        with self._lock:
+            if artifact_id not in self._entries:
+                evicted = self._insert(artifact_id, stage, value, self._estimate_size(value), now)
+            entry = self._entries.get(artifact_id) or {'stage': stage, 'value': value}
+        self._drop_shared(evicted)
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
+
+    def fingerprint(self, value: Any) -> str:
+        return fingerprint(value)
+
+    def _estimate_size(self, value: Any) -> int:
+        return estimate_size(value)
+
+    def _insert(self, artifact_id: str, stage: str, value: Any, size: int, now: float) -> list:
+        self._entries[artifact_id] = {
+            'stage': stage,
+            'value': value,
+            'size': size,
+            'created_at': now,
+            'expires_at': now + self.ttl_seconds
+        }
+        self._total_bytes += size
+        return self._evict(now)
+
+    def _evict(self, now: float) -> list:
+        evicted = [key for key, entry in self._entries.items() if entry['expires_at'] < now]
+        for artifact_id in evicted:
+            self._remove(artifact_id)
+        # 가장 최근에 넣은 항목은 한도를 넘더라도 남겨 둔다
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            artifact_id = next(iter(self._entries))
+            self._remove(artifact_id)
+            evicted.append(artifact_id)
+        return evicted
+
+    def _drop_shared(self, artifact_ids: list):
+        # 파일 삭제/네트워크 호출은 락 밖에서 한다
+        if self.shared is None:
+            return
+        for artifact_id in artifact_ids:
+            try:
+                self.shared.delete(('artifact', artifact_id))
+            except Exception as e:
+                logger.warning(f"공유 artifact 삭제 실패 ({artifact_id}): {str(e)}")
+
+    def _remove(self, artifact_id: str):
+        entry = self._entries.pop(artifact_id)
+        self._total_bytes -= entry['size']
+
+
+artifact_store = ArtifactStore(
+    ttl_seconds=settings.ARTIFACT_TTL_SECONDS,
+    max_entries=settings.ARTIFACT_MAX_ENTRIES,
+    max_bytes=settings.ARTIFACT_MAX_BYTES,
+    shared=shared_cache if shared_cache.shared_across_processes else None
+)
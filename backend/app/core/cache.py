@@ -0,0 +1,628 @@
+import fcntl
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def fingerprint(value: Any) -> str:
+    """DataFrame/리스트/딕셔너리 내용으로 만든 sha256 해시 (프로세스가 달라도 같은 값이면 같은 해시)"""
+    import pandas as pd
+    digest = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        digest.update(orjson.dumps([str(col) for col in value.columns]))
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+            return digest.hexdigest()
+        except TypeError:
+            # dict/list 같은 해시 불가능한 셀이 있으면 직렬화 결과로 해시
+            value = value.to_dict(orient='records')
+    digest.update(orjson.dumps(value, default=_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+    return digest.hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    import pandas as pd
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return len(orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+
+
+def _default(value: Any):
+    import pandas as pd
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict(orient='records')
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"해시할 수 없는 타입입니다: {type(value)}")
+
+
+def _dumps(value: Any) -> bytes:
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) >= settings.CACHE_COMPRESS_MIN_BYTES:
+        return b'Z' + zlib.compress(payload, 3)
+    return b'P' + payload
+
+
+def _loads(payload: bytes) -> Any:
+    if payload[:1] == b'Z':
+        return pickle.loads(zlib.decompress(payload[1:]))
+    return pickle.loads(payload[1:])
+
+
+class CacheBackend:
+    """캐시 백엔드 공통 동작.
+
+    키는 (namespace, ...) 튜플이다. get_or_set은 같은 키를 동시에 계산하지 않도록
+    프로세스 안에서는 키별 락으로, 프로세스/서버 간에는 백엔드별 채움 락으로 막는다.
+    """
+    # 다른 프로세스/서버와 내용을 공유하는지 여부
+    shared_across_processes = False
+
+    def __init__(self):
+        self._key_locks: Dict[Any, list] = {}
+        self._key_locks_guard = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def get_or_set(self, key, loader: Callable[[], Any], ttl: Optional[int] = None,
+                   should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.record(key, hit=True)
+            return value
+
+        with self._key_lock(key):
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                self.record(key, hit=True)
+                return value
+
+            with self._fill_lock(key) as acquired:
+                if not acquired:
+                    # 다른 프로세스가 채우는 중이면 끝날 때까지 기다렸다가 그 결과를 쓴다
+                    value = self._wait_for_fill(key)
+                    if value is not _MISSING:
+                        self.record(key, hit=True)
+                        return value
+
+                self.record(key, hit=False)
+                value = loader()
+                if should_cache is None or should_cache(value):
+                    self.set(key, value, ttl)
+                return value
+
+    def record(self, key, hit: bool):
+        namespace = _namespace(key)
+        record_cache(namespace, hit)
+        with self._stats_lock:
+            stats = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._stats_lock:
+            return {
+                namespace: {**counts, 'hit_ratio': counts['hits'] / max(counts['hits'] + counts['misses'], 1)}
+                for namespace, counts in self._stats.items()
+            }
+
+    @contextmanager
+    def _key_lock(self, key):
+        with self._key_locks_guard:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._key_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    @contextmanager
+    def _fill_lock(self, key):
+        yield True
+
+    def _wait_for_fill(self, key):
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if not self._fill_in_progress(key):
+                break
+            time.sleep(0.05)
+        return self.get(key, _MISSING)
+
+    def _fill_in_progress(self, key) -> bool:
+        return False
+
+
+class NullCache(CacheBackend):
+    """캐시가 설정되지 않았을 때 쓰는 아무것도 저장하지 않는 캐시"""
+
+    def get(self, key, default=None):
+        return default
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def get_or_set(self, key, loader: Callable[[], Any], ttl: Optional[int] = None,
+                   should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        return loader()
+
+
+class MemoryCache(CacheBackend):
+    """프로세스 안 LRU 캐시. 항목 수와 추정 바이트 수 한도를 함께 적용한다.
+
+    값을 직렬화하지 않고 그대로 보관하므로 꺼낸 값은 읽기 전용으로 다뤄야 한다.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value, _ = entry
+            if expires_at is not None and expires_at < time.time():
+                self._remove(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        import pandas as pd
+        size = estimate_size(value) if isinstance(value, pd.DataFrame) else len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value, size)
+            self._total_bytes += size
+            # 가장 최근에 넣은 항목은 한도를 넘더라도 남겨 둔다
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+
+class MappedFrame:
+    """DataFrame의 float64 컬럼은 .npy 파일(메모리 매핑)로, 나머지는 pickle로 나눠 담는 참조"""
+
+    def __init__(self, frame, values_path: str):
+        import numpy as np
+        self.columns = list(frame.columns)
+        self.float_columns = [col for col in self.columns if frame[col].dtype == np.float64]
+        self.others = frame[[col for col in self.columns if col not in self.float_columns]]
+        self.index = frame.index
+        self.values_file = os.path.basename(values_path)
+
+    @staticmethod
+    def supports(value) -> bool:
+        import numpy as np
+        import pandas as pd
+        return (isinstance(value, pd.DataFrame) and value.columns.is_unique
+                and not isinstance(value.columns, pd.MultiIndex)
+                and (value.dtypes == np.float64).any())
+
+    def attach(self, directory: str):
+        import numpy as np
+        import pandas as pd
+        # 읽기 전용 매핑이므로 모든 프로세스가 같은 페이지를 공유하고, 제자리 수정은 ValueError가 난다
+        values = np.load(os.path.join(directory, self.values_file), mmap_mode='r')
+        frame = pd.DataFrame(values, columns=self.float_columns, index=self.index, copy=False)
+        for col in self.others.columns:
+            frame.insert(self.columns.index(col), col, self.others[col])
+        return frame
+
+
+class DiskCache(CacheBackend):
+    """여러 프로세스가 같은 디렉터리를 공유하는 pickle 기반 디스크 캐시.
+
+    쓰기는 임시 파일에 쓴 뒤 os.replace로 교체하므로 동시에 읽어도 깨진 파일을 보지 않는다.
+    숫자 컬럼이 있는 DataFrame은 .npy로 저장해 메모리 매핑으로 붙이므로, 디렉터리를 /dev/shm 같은
+    tmpfs에 두면 여러 워커가 주가 패널/스냅샷을 복사 없이 공유한다.
+
+    tmpfs는 메모리이므로 크기를 max_bytes로 제한한다. sweep_seconds마다 (또는 쓰기 실패 후) 한 프로세스가
+    만료된 파일을 지우고, 한도를 넘으면 가장 오래 읽지 않은 항목부터 .pkl/.npy를 함께 지운다.
+    """
+    shared_across_processes = True
+    # 파일 앞머리: 표식 + 만료 시각(float64, 0이면 만료 없음). 정리할 때 값을 풀지 않고 만료 여부를 본다
+    HEADER = struct.Struct('<cd')
+    # 읽을 때마다 atime(최근 사용 시각)을 고치지 않도록 이 간격이 지났을 때만 갱신한다
+    TOUCH_SECONDS = 60
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None, sweep_seconds: Optional[float] = None,
+                 max_attached: Optional[int] = None):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = settings.CACHE_DISK_MAX_BYTES if max_bytes is None else max_bytes
+        self.sweep_seconds = settings.CACHE_DISK_SWEEP_SECONDS if sweep_seconds is None else sweep_seconds
+        self.max_attached = settings.CACHE_DISK_MAX_ATTACHED if max_attached is None else max_attached
+        os.makedirs(directory, exist_ok=True)
+        # 이 프로세스에서 이미 붙인 DataFrame (경로 → (파일 mtime, (만료 시각, frame))). 오래 안 쓴 것부터 놓는다
+        self._attached = OrderedDict()
+        self._attached_lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            with self._attached_lock:
+                attached = self._attached.get(path)
+                if attached is not None and attached[0] == stat.st_mtime_ns:
+                    self._attached.move_to_end(path)
+            if attached is not None and attached[0] == stat.st_mtime_ns:
+                expires_at, value = attached[1]
+            else:
+                with open(path, 'rb') as f:
+                    expires_at, value = self._decode(f.read())
+                if isinstance(value, MappedFrame):
+                    value = value.attach(os.path.dirname(path))
+                    self._attach(path, stat.st_mtime_ns, (expires_at, value))
+        except FileNotFoundError:
+            return default
+        except Exception as e:
+            logger.warning(f"캐시 파일을 읽을 수 없습니다 ({path}): {str(e)}")
+            return default
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return default
+        if time.time() - stat.st_atime > self.TOUCH_SECONDS:
+            try:
+                # mtime은 그대로 둔다 (붙인 DataFrame이 최신인지 mtime으로 확인한다)
+                os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+            except OSError:
+                pass
+        return value
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        path = self._path(key)
+        values_path = path[:-len('.pkl')] + '.npy'
+        expires_at = time.time() + ttl if ttl else None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if MappedFrame.supports(value):
+                # 같은 키의 값은 바뀌지 않는다고 가정한다 (과거 스냅샷, mtime이 들어간 패널 키 등)
+                mapped = MappedFrame(value, values_path)
+                import numpy as np
+                values = np.ascontiguousarray(value[mapped.float_columns].to_numpy())
+                self._write_atomic(values_path, lambda f: np.save(f, values))
+                value = mapped
+            payload = self.HEADER.pack(b'T', expires_at or 0.0) + _dumps(value)
+            self._write_atomic(path, lambda f: f.write(payload))
+        except OSError as e:
+            # 공간이 부족해도 요청은 캐시 없이 계속한다. 다음 쓰기 전에 정리를 돌린다
+            logger.warning(f"캐시 저장 실패 ({_namespace(key)}): {str(e)}")
+            self._remove_files(path)
+            self._last_sweep = 0
+        self.maybe_sweep()
+
+    def delete(self, key):
+        self._remove_files(self._path(key))
+
+    def maybe_sweep(self):
+        if time.monotonic() - self._last_sweep >= self.sweep_seconds:
+            self._last_sweep = time.monotonic()
+            self.sweep()
+
+    def sweep(self) -> Dict[str, int]:
+        """만료된 항목을 지우고, 남은 크기가 max_bytes를 넘으면 오래 읽지 않은 항목부터 지운다.
+
+        여러 프로세스가 동시에 돌지 않도록 디렉터리의 .sweep.lock을 잡은 프로세스만 정리한다.
+        """
+        result = {'expired': 0, 'evicted': 0, 'bytes': 0}
+        lock_file = open(os.path.join(self.directory, '.sweep.lock'), 'a')
+        try:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return result
+            now = time.time()
+            entries = []
+            for path in self._entry_paths():
+                try:
+                    stat = os.stat(path)
+                    with open(path, 'rb') as f:
+                        expires_at = self._header_expiry(f.read(self.HEADER.size))
+                except OSError:
+                    continue
+                size = stat.st_size + self._file_size(path[:-len('.pkl')] + '.npy')
+                if expires_at is not None and expires_at < now:
+                    self._remove_files(path)
+                    result['expired'] += 1
+                    continue
+                entries.append((max(stat.st_atime, stat.st_mtime), size, path))
+
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                # 한도의 90%까지 지워 매번 쓰기마다 정리하지 않게 한다
+                target = self.max_bytes * 0.9
+                for _, size, path in sorted(entries):
+                    if total <= target:
+                        break
+                    self._remove_files(path)
+                    total -= size
+                    result['evicted'] += 1
+            result['bytes'] = total
+        finally:
+            lock_file.close()
+        if result['expired'] or result['evicted']:
+            logger.info("디스크 캐시 정리: 만료 %d개, 용량 초과 %d개 삭제 (남은 %d bytes)", result['expired'], result['evicted'], result['bytes'])
+        return result
+
+    def _entry_paths(self):
+        # 캐시 항목은 {namespace}/{해시 앞 2자리}/{sha256}.pkl 이다 (metrics/ 등 다른 파일은 건드리지 않는다)
+        for root, _, files in os.walk(self.directory):
+            if len(os.path.basename(root)) != 2:
+                continue
+            for name in files:
+                if name.endswith('.pkl') and len(name) == 68:
+                    yield os.path.join(root, name)
+
+    def _attach(self, path: str, mtime: int, entry):
+        with self._attached_lock:
+            self._attached[path] = (mtime, entry)
+            self._attached.move_to_end(path)
+            # 패널 키에는 파일 mtime이 들어가 다시 쓸 때마다 새 경로가 생기므로, 오래 안 쓴 매핑부터 놓는다
+            while len(self._attached) > self.max_attached:
+                self._attached.popitem(last=False)
+
+    def _decode(self, payload: bytes):
+        if payload[:1] == b'T':
+            expires_at = self._header_expiry(payload[:self.HEADER.size])
+            return expires_at, _loads(payload[self.HEADER.size:])
+        # 앞머리가 없던 이전 형식
+        return _loads(payload)
+
+    def _header_expiry(self, header: bytes) -> Optional[float]:
+        if len(header) < self.HEADER.size or header[:1] != b'T':
+            return None
+        expires_at = self.HEADER.unpack(header)[1]
+        return expires_at or None
+
+    def _remove_files(self, path: str):
+        with self._attached_lock:
+            self._attached.pop(path, None)
+        for target in (path, path[:-len('.pkl')] + '.npy'):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"캐시 파일 삭제 실패 ({target}): {str(e)}")
+
+    def _file_size(self, path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    @contextmanager
+    def _fill_lock(self, key):
+        lock_path = self._path(key)[:-len('.pkl')] + '.lock'
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        try:
+            # 오래된 락(프로세스가 죽어서 남은 것)은 무시한다
+            if time.time() - os.stat(lock_path).st_mtime > settings.CACHE_LOCK_TIMEOUT_SECONDS:
+                os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+    def _fill_in_progress(self, key) -> bool:
+        return os.path.exists(self._path(key)[:-len('.pkl')] + '.lock')
+
+    def _write_atomic(self, path: str, write):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _path(self, key) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, _namespace(key), digest[:2], f"{digest}.pkl")
+
+
+class RedisCache(CacheBackend):
+    """여러 API 서버가 함께 쓰는 Redis 캐시. 값은 pickle 후 크기가 크면 zlib으로 압축한다.
+
+    client를 넘기면 그 클라이언트를 쓴다 (테스트에서는 fakeredis.FakeRedis()).
+    """
+    shared_across_processes = True
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'quantus', client=None):
+        super().__init__()
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key, default=None):
+        try:
+            payload = self.client.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Redis 캐시 조회 실패: {str(e)}")
+            return default
+        return default if payload is None else _loads(payload)
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        try:
+            self.client.set(self._key(key), _dumps(value), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Redis 캐시 저장 실패: {str(e)}")
+
+    def delete(self, key):
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Redis 캐시 삭제 실패: {str(e)}")
+
+    @contextmanager
+    def _fill_lock(self, key):
+        lock_key = self._key(key) + ':lock'
+        token = uuid.uuid4().hex
+        try:
+            acquired = bool(self.client.set(lock_key, token, nx=True, ex=settings.CACHE_LOCK_TIMEOUT_SECONDS))
+        except Exception as e:
+            logger.warning(f"Redis 캐시 락 획득 실패: {str(e)}")
+            acquired = True
+            token = None
+        try:
+            yield acquired
+        finally:
+            if acquired and token is not None:
+                try:
+                    # 내 락일 때만 지운다 (만료 후 다른 서버가 다시 잡았을 수 있음)
+                    if self.client.get(lock_key) == token.encode():
+                        self.client.delete(lock_key)
+                except Exception:
+                    pass
+
+    def _fill_in_progress(self, key) -> bool:
+        try:
+            return bool(self.client.exists(self._key(key) + ':lock'))
+        except Exception:
+            return False
+
+    def _key(self, key) -> str:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return f"{self.prefix}:{_namespace(key)}:{digest}"
+
+
+def _namespace(key) -> str:
+    return str(key[0]) if isinstance(key, tuple) and key else 'default'
+
+
+def create_shared_cache(backend: Optional[str] = None, directory: Optional[str] = None) -> CacheBackend:
+    directory = directory or settings.CACHE_DIR
+    backend = backend or settings.CACHE_BACKEND or ('disk' if directory else 'memory')
+
+    if backend == 'memory':
+        return MemoryCache(settings.CACHE_MEMORY_MAX_ENTRIES, settings.CACHE_MEMORY_MAX_BYTES)
+    if backend == 'disk':
+        if not directory:
+            raise ValueError("CACHE_BACKEND=disk에는 CACHE_DIR이 필요합니다.")
+        return DiskCache(directory)
+    if backend == 'redis':
+        if not settings.CACHE_REDIS_URL:
+            raise ValueError("CACHE_BACKEND=redis에는 CACHE_REDIS_URL이 필요합니다.")
+        return RedisCache(settings.CACHE_REDIS_URL, prefix=settings.CACHE_PREFIX)
+    return NullCache()
+
+
+shared_cache = create_shared_cache()
+
+
+def configure_cache(cache: CacheBackend):
+    """shared_cache를 교체한다 (테스트, 배치 실행 등)."""
+    global shared_cache
+    shared_cache = cache
+
+
+def cached(namespace: str, ttl: Optional[int] = None, key: Optional[Callable[..., tuple]] = None,
+           should_cache: Optional[Callable[..., bool]] = None):
+    """함수 결과를 shared_cache에 (namespace, *키) 로 저장하는 데코레이터.
+
+    key(*args, **kwargs)는 키 튜플을 돌려준다. 생략하면 self를 뺀 인자들의 내용 해시를 쓴다.
+    should_cache(result, *args, **kwargs)가 False이면 그 결과는 저장하지 않는다.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        is_method = next(iter(signature.parameters), None) == 'self'
+
+        def make_key(args, kwargs) -> tuple:
+            if key is not None:
+                return (namespace, *key(*args, **kwargs))
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = list(bound.arguments.items())[1 if is_method else 0:]
+            digest = hashlib.sha256()
+            for name, value in arguments:
+                digest.update(f"{name}={fingerprint(value)};".encode())
+            return (namespace, digest.hexdigest())
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return shared_cache.get_or_set(
+                make_key(args, kwargs),
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                should_cache=(lambda result: should_cache(result, *args, **kwargs)) if should_cache else None
+            )
+
+        wrapper.uncached = func
+        # 프로세스 풀 자식에서 계산할 때 부모가 캐시를 직접 보도록 (runtime.run_cpu_cached)
+        wrapper.cache_key = lambda *args, **kwargs: make_key(args, kwargs)
+        wrapper.cache_ttl = ttl
+        wrapper.should_cache = should_cache
+        return wrapper
+    return decorator
@@ -1,3 +1,4 @@
+import os
 import secrets
 import warnings
 from typing import Annotated, Any, Literal
@@ -13,13 +14,8 @@ from pydantic import (
 from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing_extensions import Self
-import logging
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from app.core.log import configure_logging
 
 
 def parse_cors(v: Any) -> list[str] | str:
@@ -61,6 +57,95 @@ class Settings(BaseSettings):
     DART_API_KEY: str
     DART_API_URL: str
 
+    # 단계별 결과(artifact) 저장소 설정
+    ARTIFACT_TTL_SECONDS: int = 3600
+    ARTIFACT_MAX_ENTRIES: int = 256
+    ARTIFACT_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # 저장된 결과를 나눠 읽을 때 (?limit=&cursor=) 기본/최대 페이지 크기
+    PAGE_DEFAULT_LIMIT: int = 100
+    PAGE_MAX_LIMIT: int = 1000
+
+    # 캐시 백엔드 (KRX 스냅샷, DART 공시, 기업 코드, 주가 패널, 투자지표 패널/분석 결과)
+    # 비워두면 CACHE_DIR이 있을 때 disk, 없으면 프로세스 안 memory
+    CACHE_BACKEND: Literal["none", "memory", "disk", "redis"] | None = None
+    CACHE_DIR: str | None = None
+    CACHE_REDIS_URL: str | None = None
+    CACHE_PREFIX: str = "quantus"
+    CACHE_MEMORY_MAX_ENTRIES: int = 1024
+    CACHE_MEMORY_MAX_BYTES: int = 512 * 1024 * 1024
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+    CACHE_LOCK_TIMEOUT_SECONDS: int = 30
+    # disk 백엔드 크기 한도 (/dev/shm은 메모리이므로 shm_size보다 작게). 넘으면 오래 읽지 않은 항목부터 지운다
+    CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+    CACHE_DISK_SWEEP_SECONDS: int = 60
+    CACHE_DISK_MAX_ATTACHED: int = 64  # 워커마다 붙여 두는 메모리 매핑 DataFrame 수
+
+    # 순수 계산 라우트 응답 메모이즈 (요청 해시 + ETag)
+    ROUTE_MEMO_MAX_ENTRIES: int = 256
+    ROUTE_MEMO_MAX_BYTES: int = 256 * 1024 * 1024
+    ROUTE_MEMO_TTL_SECONDS: int = 3600
+
+    # 시작 후 백그라운드 warm-up (기업 코드, 올해 주가 패널, 거래일 캘린더)
+    WARMUP_ENABLED: bool = True
+
+    # 샤딩 워커 모드 (python -m app.worker). 비워두면 요청을 받은 프로세스에서 직접 처리한다
+    WORKER_QUEUE_URL: str | None = None  # sqlite:///경로.db (같은 호스트) | redis://호스트:6379/0 (여러 호스트)
+    WORKER_SHARD_SIZE: int = 50  # 샤드당 기업 수
+    WORKER_MIN_ITEMS: int = 100  # 기업 수가 이보다 적으면 나누지 않고 직접 처리
+    WORKER_MAX_ATTEMPTS: int = 3
+    WORKER_LEASE_SECONDS: int = 120  # 워커가 이 시간 동안 소식이 없으면 다른 워커가 샤드를 다시 가져간다
+    WORKER_JOB_TIMEOUT_SECONDS: int = 1800
+    WORKER_RESULT_TTL_SECONDS: int = 3600
+
+    # 장 마감 후 / 공시 시즌 사전 수집 (app/service/prefetch.py). 앱 안에서 켜거나 python -m app.prefetch로 따로 띄운다
+    PREFETCH_ENABLED: bool = False
+    PREFETCH_PRICES_AT: str = "18:00"  # KST. 이 시각 이후에는 당일 스냅샷도 확정된 것으로 보고 저장한다
+    PREFETCH_FILINGS_INTERVAL_MINUTES: int = 30  # 공시 시즌 중 폴링 간격 (시즌 밖에서는 하루 한 번)
+    PREFETCH_DISCLOSURE_SEASONS: str = "0301-0415,0501-0531,0801-0831,1101-1130"  # MMDD-MMDD
+    PREFETCH_FILING_LOOKBACK_DAYS: int = 365  # 이 기간의 분기 재무제표를 미리 받아 둔다
+    PREFETCH_TRACKED_FILE: str | None = None  # 종목코드 목록 파일 (없으면 최근 주가 패널의 전 종목)
+    PREFETCH_KRX_DAILY_BUDGET: int = 1000
+    PREFETCH_KRX_RATE: float = 2  # 초당 호출 수
+    PREFETCH_DART_DAILY_BUDGET: int = 10000  # DART 한도(키당 하루 2만 건)의 절반은 사용자 요청 몫으로 남긴다
+    PREFETCH_DART_RATE: float = 5
+
+    # 로깅 설정 (QueueHandler 기반)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # 모듈별 레벨. 예: "app.service.back_test=DEBUG,app.service.dart_api=WARNING"
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_FILE: str | None = None
+    LOG_RATE_LIMIT: float = 20  # 같은 자리의 INFO 이하 로그를 초당 몇 개까지 남길지 (0이면 제한 없음)
+    LOG_RATE_BURST: int = 100
+
+    # 실행기 / 부하 제어 설정
+    IO_WORKERS: int = 32
+    IO_QUEUE_DEPTH: int = 64
+    CPU_WORKERS: int = os.cpu_count() or 1  # 0이면 프로세스 풀 없이 스레드 하나로 실행
+    CPU_QUEUE_DEPTH: int = 16
+    CLIENT_MAX_CONCURRENCY: int = 8  # 0이면 제한 없음
+    CLIENT_ID_HEADER: str = ""  # 신뢰하는 프록시/게이트웨이가 넣는 클라이언트 식별 헤더 (비우면 접속 IP로 구분)
+    RETRY_AFTER_SECONDS: int = 5
+
+    # /metrics (Prometheus). 여러 워커의 값은 CACHE_DIR/metrics에 주기적으로 기록해 합친다
+    METRICS_ENABLED: bool = True
+    METRICS_FLUSH_SECONDS: int = 10
+
+    # 요청 단위 추적. jsonl은 TRACE_FILE({pid}는 프로세스 ID)에, otlp는 TRACE_OTLP_ENDPOINT로 보낸다
+    TRACE_EXPORTER: Literal["none", "jsonl", "otlp"] = "none"
+    TRACE_SAMPLE_RATE: float = 0.05  # 요청 중 추적할 비율 (traceparent 헤더의 sampled 플래그가 우선)
+    TRACE_FILE: str = "traces/spans-{pid}.jsonl"
+    TRACE_MAX_BYTES: int = 50 * 1024 * 1024
+    TRACE_BACKUP_COUNT: int = 5
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+
+    # 요청 단위 프로파일링 (X-Profile 헤더 / ?profile= 쿼리). 켜 두어도 요청하지 않으면 비용이 없다
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str | None = None  # 지정하면 X-Profile 값이 이 토큰과 같아야 한다
+    PROFILING_DIR: str = "profiles"
+    PROFILING_INTERVAL_MS: int = 5
+    PROFILING_TRACEMALLOC_FRAMES: int = 1
+
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
@@ -74,3 +159,13 @@ class Settings(BaseSettings):
                 raise ValueError(message)
 
 settings = Settings() 
+
+# 로깅 설정 (설정을 읽는 모든 프로세스 - API 워커, 프로세스 풀 워커, 배치 - 에 적용)
+configure_logging(
+    level=settings.LOG_LEVEL,
+    levels=settings.LOG_LEVELS,
+    log_format=settings.LOG_FORMAT,
+    log_file=settings.LOG_FILE,
+    rate_limit=settings.LOG_RATE_LIMIT,
+    rate_burst=settings.LOG_RATE_BURST
+)
@@ -0,0 +1,54 @@
+import importlib
+import threading
+from typing import Any, List
+
+# 만들어진 모든 지연 객체 (warm-up에서 한꺼번에 준비시킨다)
+_registry: List["LazyObject"] = []
+
+
+class LazyObject:
+    """처음 사용할 때 모듈을 임포트하고 객체를 준비하는 프록시.
+
+    target은 "패키지.모듈:이름" 또는 "패키지.모듈" 형식이다. construct=True이면 가져온 클래스를 인자 없이 생성한다.
+    pandas 등 무거운 모듈을 앱 임포트 시점이 아니라 첫 요청(또는 warm-up) 때 불러오기 위해 쓴다.
+    """
+
+    def __init__(self, target: str, construct: bool = False):
+        self._target = target
+        self._construct = construct
+        self._value = None
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def resolve(self) -> Any:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    module_name, _, attr = self._target.partition(':')
+                    value = importlib.import_module(module_name)
+                    if attr:
+                        value = getattr(value, attr)
+                    self._value = value() if self._construct else value
+        return self._value
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        state = 'resolved' if self._value is not None else 'pending'
+        return f"<LazyObject {self._target} ({state})>"
+
+
+def lazy_service(target: str) -> Any:
+    """"모듈:클래스"를 처음 사용할 때 임포트하고 인스턴스를 만든다."""
+    return LazyObject(target, construct=True)
+
+
+def lazy_import(target: str) -> Any:
+    """"모듈" 또는 "모듈:이름"을 처음 사용할 때 임포트한다."""
+    return LazyObject(target)
+
+
+def resolve_all():
+    for lazy in list(_registry):
+        lazy.resolve()
@@ -0,0 +1,161 @@
+"""로깅 설정.
+
+요청 스레드에서는 QueueHandler로 레코드를 큐에 넣기만 하고, 포맷과 출력(콘솔/파일)은 QueueListener 스레드가 맡는다.
+모듈별 레벨(LOG_LEVELS)과 메시지 템플릿별 속도 제한(LOG_RATE_LIMIT)을 지원한다.
+
+반복문 안의 로그는 logger.debug("%s: %d개", name, count)처럼 %-인자를 넘겨 레벨이 꺼져 있으면 문자열을 만들지 않게 한다.
+속도 제한은 로그를 남긴 자리(로거 + 파일 + 줄)를 키로 쓰므로 f-string 로그도 같은 자리끼리 묶인다.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import orjson
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RateLimitFilter(logging.Filter):
+    """같은 자리(로거 + 파일 + 줄)의 레코드를 초당 rate개(버스트 burst개)까지만 통과시키는 토큰 버킷.
+
+    WARNING 이상은 항상 통과한다. 버려진 개수는 다음에 통과하는 레코드에 'suppressed'로 붙는다.
+    버킷은 최근에 쓴 max_buckets개만 유지하고, 가득 찬 채로 쉬고 있는 버킷은 새 버킷과 같으므로 지운다.
+    """
+
+    def __init__(self, rate: float, burst: int, max_buckets: int = 1024):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self._buckets: 'OrderedDict[tuple, list]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._prune(now)
+                # [남은 토큰, 마지막 갱신 시각, 버린 개수]
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            else:
+                self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def _prune(self, now: float):
+        # 오래 안 쓴 순서로 앞에서부터 본다. burst / rate초 넘게 쉰 버킷은 토큰이 다 찼다
+        idle_seconds = self.burst / self.rate
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if now - bucket[1] < idle_seconds or bucket[2]:
+                break
+            self._buckets.popitem(last=False)
+        while len(self._buckets) >= self.max_buckets:
+            self._buckets.popitem(last=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{message} (이전 {suppressed}건 생략)" if suppressed else message
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 레코드 하나씩 JSON으로 출력한다 (로그 수집기용)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        if getattr(record, 'suppressed', 0):
+            payload['suppressed'] = record.suppressed
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return orjson.dumps(payload).decode()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 기본 구현은 여기서 메시지를 포맷하지만, 포맷은 리스너 스레드에서 하도록 그대로 넘긴다 (예외 정보만 문자열로 고정)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+def parse_levels(value: str) -> Dict[str, str]:
+    """"app.service.back_test=WARNING,app.service.dart_api=DEBUG" 형식을 dict로 바꾼다."""
+    levels = {}
+    for item in value.split(','):
+        name, _, level = item.strip().partition('=')
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: str = 'INFO', levels: str = '', log_format: str = 'text', log_file: Optional[str] = None,
+                      rate_limit: float = 0, rate_burst: int = 0):
+    """루트 로거를 QueueHandler 하나로 바꾸고, 실제 출력은 리스너 스레드에서 한다. 여러 번 불러도 마지막 설정만 남는다."""
+    global _listener
+
+    formatter = JsonFormatter() if log_format == 'json' else TextFormatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=50 * 1024 * 1024, backupCount=5,
+                                                             encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    queue_handler = _QueueHandler(log_queue)
+    if rate_limit > 0:
+        queue_handler.addFilter(RateLimitFilter(rate_limit, max(rate_burst, 1)))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+def stop_logging():
+    """큐에 남은 레코드를 모두 출력하고 리스너를 멈춘다."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,472 @@
+import bisect
+import fcntl
+import functools
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core import profiling
+from app.core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Any]:
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def drain(self) -> Dict[Tuple[str, ...], Any]:
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values: Dict[Tuple[str, ...], Any]):
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._add(self._values.get(key), value)
+
+    def _copy(self, value):
+        return value
+
+    def _add(self, current, value):
+        return value if current is None else current + value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    """버킷별 개수(누적 아님) + 합계 + 개수를 [bucket..., +Inf, sum, count] 리스트로 보관한다."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 3)
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _copy(self, value):
+        return list(value)
+
+    def _add(self, current, value):
+        return list(value) if current is None else [a + b for a, b in zip(current, value)]
+
+
+class Gauge(_Metric):
+    """수집할 때 callback을 불러 현재 값을 읽는다. callback은 숫자 또는 {라벨 튜플: 값}을 돌려준다."""
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), callback: Callable[[], Any] = None):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Any]:
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.warning(f"게이지 수집 실패 ({self.name}): {str(e)}")
+            return {}
+        if value is None:
+            return {}
+        if isinstance(value, dict):
+            return {tuple(str(v) for v in key): number for key, number in value.items()}
+        return {(): value}
+
+    def drain(self) -> Dict[Tuple[str, ...], Any]:
+        # 게이지는 현재 값이므로 다른 프로세스로 옮기지 않는다
+        return {}
+
+
+class Level:
+    """여러 스레드에서 올리고 내리는 현재 값 (대기열 깊이 등). Gauge callback에서 읽는다."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount: int):
+        with self._lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 내보내는 가벼운 메트릭 저장소.
+
+    값은 프로세스마다 따로 쌓인다. 프로세스 풀 작업의 값은 drain()으로 꺼내 부모 프로세스에서 merge()하고,
+    여러 uvicorn 워커의 값은 공유 디렉터리에 주기적으로 기록한 스냅샷을 합쳐서 내보낸다.
+    """
+
+    def __init__(self):
+        self._metrics: "OrderedDict[str, _Metric]" = OrderedDict()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), callback: Callable[[], Any] = None) -> Gauge:
+        return self._register(Gauge(name, help, labelnames, callback))
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def drain(self) -> Dict[str, dict]:
+        drained = {name: metric.drain() for name, metric in self._metrics.items()}
+        return {name: values for name, values in drained.items() if values}
+
+    def merge(self, snapshot: Dict[str, dict]):
+        for name, values in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is not None and not isinstance(metric, Gauge):
+                metric.merge(values)
+
+    def combine(self, snapshots: Iterable[Dict[str, dict]], combined: Optional[Dict[str, dict]] = None) -> Dict[str, dict]:
+        """스냅샷들을 지표/라벨별로 더한다. combined를 주면 거기에 더한다."""
+        combined = {} if combined is None else combined
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                target = combined.setdefault(name, {})
+                for key, value in values.items():
+                    target[key] = metric._add(target.get(key), value)
+        return combined
+
+    def render(self, others: Iterable[Dict[str, dict]] = ()) -> str:
+        combined = self.combine(others, self.snapshot())
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(combined.get(name, {}).items()):
+                labels = list(zip(metric.labelnames, key))
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float('inf'),), value):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+                    lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def _labels(pairs: list) -> str:
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'quantus_http_request_duration_seconds', '라우트별 요청 처리 시간', ('method', 'route', 'status'))
+OUTBOUND_LATENCY = registry.histogram(
+    'quantus_outbound_request_duration_seconds', 'KRX/DART 외부 호출 시간과 결과', ('service', 'endpoint', 'status'))
+CACHE_REQUESTS = registry.counter(
+    'quantus_cache_requests_total', '캐시 조회 결과', ('cache', 'result'))
+STAGE_LATENCY = registry.histogram(
+    'quantus_stage_duration_seconds', '처리 단계별 소요 시간', ('stage',))
+STAGE_ROWS = registry.counter(
+    'quantus_stage_rows_total', '처리 단계별 결과 행 수', ('stage',))
+
+
+def record_cache(cache: str, hit: bool):
+    if settings.METRICS_ENABLED:
+        CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+@contextmanager
+def outbound_call(service: str, endpoint: str, **attributes):
+    """외부 호출 시간을 재고 span으로 남긴다. 호출하는 쪽에서 yield된 dict의 'status'에 HTTP 상태 코드를 넣는다 (없으면 error)."""
+    call = {'status': 'error'}
+    started = time.perf_counter()
+    with tracer.span(f"{service} {endpoint}", **attributes) as span:
+        try:
+            yield call
+        finally:
+            span.set_attribute('http.status_code', call['status'])
+            if settings.METRICS_ENABLED:
+                OUTBOUND_LATENCY.observe(time.perf_counter() - started, service=service, endpoint=endpoint, status=call['status'])
+
+
+def _count_rows(result: Any) -> int:
+    if isinstance(result, tuple):
+        result = result[0]
+    try:
+        return len(result) if result is not None else 0
+    except TypeError:
+        return 0
+
+
+def timed_stage(stage: str, rows: Optional[Callable[[Any], int]] = _count_rows):
+    """함수 실행 시간과 결과 행 수를 stage 라벨로 기록하고 span(프로파일링 중이면 단계별 메모리)으로 남기는 데코레이터.
+
+    메트릭, 추적, 프로파일링이 모두 꺼져 있으면 아무것도 감싸지 않는다.
+    """
+    def decorator(func):
+        if not settings.METRICS_ENABLED and not tracer.enabled and not settings.PROFILING_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            with tracer.span(stage) as span, profiling.stage(stage):
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    if settings.METRICS_ENABLED:
+                        STAGE_LATENCY.observe(time.perf_counter() - started, stage=stage)
+                if rows is not None:
+                    count = rows(result)
+                    span.set_attribute('rows', count)
+                    if settings.METRICS_ENABLED:
+                        STAGE_ROWS.inc(count, stage=stage)
+            return result
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """라우트별 요청 처리 시간을 기록하는 ASGI 미들웨어.
+
+    경로 대신 매칭된 라우트 템플릿을 라벨로 써서 라벨 수가 늘어나지 않게 한다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                method=scope['method'],
+                route=getattr(route, 'path', 'unmatched'),
+                status=status['code']
+            )
+
+
+def _process_started(pid: int) -> Optional[str]:
+    """프로세스 시작 시각(부팅 후 clock tick, /proc/<pid>/stat 22번째 필드). /proc이 없으면 None."""
+    try:
+        with open(f"/proc/{pid}/stat", 'rb') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # 두 번째 필드(comm)에 공백이 있을 수 있어 마지막 ')' 뒤에서 센다
+    return stat[stat.rindex(b')') + 2:].split()[19].decode()
+
+
+def _worker_alive(name: str) -> bool:
+    """스냅샷 파일 이름({pid}-{시작 시각 또는 u+uuid}.pkl)의 프로세스가 아직 살아 있는지 본다."""
+    pid_text, _, started = name[:-len('.pkl')].partition('-')
+    try:
+        pid = int(pid_text)
+    except ValueError:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    if started.isdigit():
+        # 같은 PID를 다른 프로세스가 다시 쓰고 있으면 원래 워커는 끝난 것이다
+        current = _process_started(pid)
+        return current is None or current == started
+    return True
+
+
+class SharedSnapshots:
+    """여러 uvicorn 워커가 각자의 메트릭 스냅샷을 공유 디렉터리에 주기적으로 기록하고, /metrics에서 합쳐 읽는다.
+
+    파일 이름은 PID와 프로세스 시작 시각이라 PID가 재사용되어도 다른 워커의 파일을 덮어쓰지 않는다.
+    종료된 워커의 스냅샷은 retired.pkl 하나에 더해 두고 지우므로 카운터가 줄지 않고 파일도 쌓이지 않는다.
+    PID로 생존 여부를 보므로 디렉터리는 같은 호스트(같은 PID 네임스페이스)의 워커끼리만 공유해야 한다.
+    """
+    RETIRED = 'retired.pkl'
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pid: Optional[int] = None
+        self._name: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        if self._pid != os.getpid():
+            # fork된 자식이 부모의 파일을 덮어쓰지 않도록 프로세스마다 이름을 새로 정한다
+            self._pid = os.getpid()
+            self._name = f"{self._pid}-{_process_started(self._pid) or 'u' + uuid.uuid4().hex[:12]}.pkl"
+        return os.path.join(self.directory, self._name)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def flush(self):
+        snapshot = {name: values for name, values in registry.snapshot().items()
+                    if not isinstance(registry._metrics[name], Gauge)}
+        self._write(self.path, snapshot)
+
+    def others(self) -> list:
+        """현재 프로세스를 제외한 워커들의 스냅샷 (종료된 워커의 값은 retired.pkl에 합쳐 남겨 둔다)."""
+        own = os.path.basename(self.path)
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        # 다른 워커가 같은 파일을 동시에 합치거나, 합치는 도중의 파일을 두 번 읽지 않도록 디렉터리 단위로 잠근다
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                workers = [name for name in names if name.endswith('.pkl') and name not in (own, self.RETIRED)]
+                dead = [name for name in workers if not _worker_alive(name)]
+                if dead:
+                    self._retire(dead)
+                snapshots = []
+                for name in [self.RETIRED] + [name for name in workers if name not in dead]:
+                    snapshot = self._read(name)
+                    if snapshot is not None:
+                        snapshots.append(snapshot['metrics'] if name == self.RETIRED else snapshot)
+                return snapshots
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _retire(self, dead: List[str]):
+        retired = self._read(self.RETIRED) or {'workers': [], 'metrics': {}}
+        # 합친 뒤 파일을 지우기 전에 멈췄던 워커는 다시 더하지 않는다
+        folded = [name for name in dead if name not in retired['workers']]
+        snapshots = [snapshot for snapshot in map(self._read, folded) if snapshot is not None]
+        retired['metrics'] = registry.combine(snapshots, retired['metrics'])
+        retired['workers'] = dead
+        if not self._write(os.path.join(self.directory, self.RETIRED), retired):
+            return
+        for name in dead:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        logger.info(f"종료된 워커 메트릭 스냅샷 {len(dead)}개를 {self.RETIRED}에 합쳤습니다.")
+
+    def _read(self, name: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write(self, path: str, value) -> bool:
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            logger.warning(f"메트릭 스냅샷 기록 실패: {str(e)}")
+            return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+shared_snapshots = SharedSnapshots(os.path.join(settings.CACHE_DIR, 'metrics'), settings.METRICS_FLUSH_SECONDS) \
+    if settings.CACHE_DIR else None
+
+
+def render_metrics() -> str:
+    others = shared_snapshots.others() if shared_snapshots is not None else []
+    return registry.render(others)
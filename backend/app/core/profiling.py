@@ -0,0 +1,319 @@
+import collections
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """등록된 스레드의 호출 스택을 일정 간격으로 읽어 접힌 스택(folded stack) 형식으로 센다.
+
+    결과는 flamegraph.pl, speedscope, inferno 등에서 그대로 불러올 수 있다.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: "collections.Counter[str]" = collections.Counter()
+        self._threads: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_thread(self, ident: int):
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+
+    def remove_thread(self, ident: int):
+        with self._lock:
+            self._threads[ident] -= 1
+            if self._threads[ident] == 0:
+                del self._threads[ident]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        names = {}
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                idents = list(self._threads)
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                if ident not in names:
+                    names[ident] = next((t.name for t in threading.enumerate() if t.ident == ident), str(ident))
+                self.samples[_fold(names[ident], frame)] += 1
+
+
+def _fold(thread_name: str, frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    stack.append(thread_name)
+    return ';'.join(reversed(stack))
+
+
+class _StageFrame:
+    __slots__ = ('start', 'peak')
+
+    def __init__(self, start: int):
+        self.start = start
+        self.peak = 0
+
+
+class ProfileSession:
+    """프로파일링 중인 요청 하나. 샘플링 프로파일러 + tracemalloc으로 단계별 시간과 최대 메모리를 모은다."""
+
+    def __init__(self, session_id: str, label: str):
+        self.id = session_id
+        self.label = label
+        self.profiler = SamplingProfiler(settings.PROFILING_INTERVAL_MS / 1000)
+        self.stages: Dict[str, dict] = {}
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.peak_bytes = 0
+        self.worker_peak_bytes = 0
+        self.top_allocations: List[dict] = []
+        self._peak = 0
+        self._active: List[_StageFrame] = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+        self.seconds = round(time.perf_counter() - self.started, 3)
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(peak, self._peak)
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.top_allocations = [
+            {'location': str(stat.traceback[0]), 'bytes': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:20]
+        ]
+
+    @contextmanager
+    def stage(self, name: str):
+        # reset_peak()은 프로세스 전체의 최대값을 지우므로, 지우기 전 최대값을 진행 중인 다른 단계(다른 스레드 포함)에 옮겨 둔다
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            self._carry_peak(peak)
+            frame = _StageFrame(current)
+            self._active.append(frame)
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                _, peak = tracemalloc.get_traced_memory()
+                self._active = [active for active in self._active if active is not frame]
+                peak = max(peak, frame.peak)
+                self._carry_peak(peak)
+            self.record_stage(name, seconds, peak - frame.start)
+
+    def record_stage(self, name: str, seconds: float, peak_bytes: int, calls: int = 1):
+        with self._lock:
+            stats = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+            stats['calls'] += calls
+            stats['seconds'] = round(stats['seconds'] + seconds, 6)
+            stats['peak_bytes'] = max(stats['peak_bytes'], peak_bytes)
+
+    @contextmanager
+    def thread(self):
+        ident = threading.get_ident()
+        self.profiler.add_thread(ident)
+        try:
+            yield
+        finally:
+            self.profiler.remove_thread(ident)
+
+    def merge(self, result: dict):
+        """프로세스 풀 워커에서 돌아온 프로파일을 합친다."""
+        self.profiler.samples.update(result['samples'])
+        for name, stats in result['stages'].items():
+            self.record_stage(name, stats['seconds'], stats['peak_bytes'], stats['calls'])
+        with self._lock:
+            self.worker_peak_bytes = max(self.worker_peak_bytes, result['peak_bytes'])
+
+    def summary(self) -> dict:
+        return {
+            'id': self.id,
+            'request': self.label,
+            'seconds': self.seconds,
+            'samples': sum(self.profiler.samples.values()),
+            'interval_ms': settings.PROFILING_INTERVAL_MS,
+            'peak_bytes': self.peak_bytes,
+            'worker_peak_bytes': self.worker_peak_bytes,
+            'stages': self.stages,
+            'top_allocations': self.top_allocations
+        }
+
+    def folded(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.profiler.samples.most_common())
+
+    def _carry_peak(self, peak: int):
+        self._peak = max(self._peak, peak)
+        for frame in self._active:
+            frame.peak = max(frame.peak, peak)
+
+
+_session: contextvars.ContextVar = contextvars.ContextVar('profile_session', default=None)
+# tracemalloc은 프로세스 전체에 하나이므로 한 번에 한 요청만 프로파일링한다
+_session_lock = threading.Lock()
+
+
+def current_session() -> Optional[ProfileSession]:
+    return _session.get()
+
+
+@contextmanager
+def stage(name: str):
+    """프로파일링 중인 요청이면 단계 시간과 최대 메모리를 기록한다. 아니면 아무것도 하지 않는다."""
+    session = _session.get()
+    if session is None:
+        yield
+        return
+    with session.stage(name):
+        yield
+
+
+@contextmanager
+def thread_scope():
+    """현재 스레드를 프로파일링 중인 요청의 샘플링 대상으로 등록한다."""
+    session = _session.get()
+    if session is None:
+        yield
+        return
+    with session.thread():
+        yield
+
+
+@contextmanager
+def remote_session(requested: bool):
+    """프로세스 풀 워커에서 부모 요청의 프로파일링을 이어서 하고, 결과 dict를 채워 돌려준다."""
+    result: dict = {}
+    if not requested:
+        yield None
+        return
+    session = ProfileSession(uuid.uuid4().hex, 'worker')
+    session.start()
+    token = _session.set(session)
+    try:
+        with session.thread():
+            yield result
+    finally:
+        _session.reset(token)
+        session.stop()
+        # 워커 프로세스의 스택은 부모 요청의 스택과 구분되도록 pid를 붙인다
+        result.update({
+            'samples': {f"cpu-worker-{os.getpid()};{stack}": count for stack, count in session.profiler.samples.items()},
+            'stages': session.stages,
+            'peak_bytes': session.peak_bytes
+        })
+
+
+def save_profile(session: ProfileSession) -> str:
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    base = os.path.join(settings.PROFILING_DIR, session.id)
+    with open(f"{base}.folded", 'w', encoding='utf-8') as f:
+        f.write(session.folded())
+    with open(f"{base}.json", 'wb') as f:
+        f.write(orjson.dumps(session.summary(), option=orjson.OPT_INDENT_2))
+    return base
+
+
+def load_profile(profile_id: str, kind: str) -> Optional[bytes]:
+    # 경로 조작을 막기 위해 세션 ID 형식(uuid hex)만 허용한다
+    if len(profile_id) != 32 or not all(c in '0123456789abcdef' for c in profile_id):
+        return None
+    path = os.path.join(settings.PROFILING_DIR, f"{profile_id}.{kind}")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class ProfilingMiddleware:
+    """X-Profile 헤더 또는 ?profile= 쿼리가 있는 API 요청을 샘플링 프로파일러 + tracemalloc으로 실행한다.
+
+    PROFILING_TOKEN이 있으면 값이 같아야 한다. 결과는 PROFILING_DIR에 저장하고 응답 헤더 X-Profile-Id로 알려준다.
+    이미 다른 요청을 프로파일링 중이면 그냥 실행하고 X-Profile: busy를 붙인다.
+    """
+
+    def __init__(self, app, path_prefix: str):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.path_prefix) or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not _session_lock.acquire(blocking=False):
+            await self.app(scope, receive, self._with_headers(send, [(b'x-profile', b'busy')]))
+            return
+
+        session = ProfileSession(uuid.uuid4().hex, f"{scope['method']} {scope['path']}")
+        logger.warning(f"요청 프로파일링 시작: {session.label} ({session.id})")
+        try:
+            session.start()
+            token = _session.set(session)
+            try:
+                with session.thread():
+                    await self.app(scope, receive, self._with_headers(send, [(b'x-profile-id', session.id.encode())]))
+            finally:
+                _session.reset(token)
+                session.stop()
+                save_profile(session)
+                logger.warning(f"요청 프로파일링 완료: {session.id} ({session.seconds}초, 최대 메모리 {session.peak_bytes / 1024 ** 2:.1f}MB)")
+        finally:
+            _session_lock.release()
+
+    def _requested(self, scope) -> bool:
+        value = None
+        for name, header in scope.get('headers', []):
+            if name == b'x-profile':
+                value = header.decode('latin-1')
+                break
+        if value is None:
+            for pair in scope.get('query_string', b'').decode('latin-1').split('&'):
+                key, _, query_value = pair.partition('=')
+                if key == 'profile':
+                    value = query_value or '1'
+                    break
+        if not value:
+            return False
+        return settings.PROFILING_TOKEN is None or value == settings.PROFILING_TOKEN
+
+    def _with_headers(self, send, headers: list):
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + headers
+            await send(message)
+        return send_wrapper
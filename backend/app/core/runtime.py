@@ -0,0 +1,253 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core import cache, profiling
+from app.core.metrics import registry
+from app.core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# run_io를 부른 이벤트 루프. I/O 실행기 스레드의 동기 코드가 계산 단계를 CPU 실행기에 맡길 때 쓴다 (submit_cpu)
+_event_loop: contextvars.ContextVar = contextvars.ContextVar('quantus_event_loop', default=None)
+
+
+class ExecutorLane:
+    """워커 수 + 대기열 깊이만큼만 작업을 받는 실행기.
+
+    자리가 없으면 대기열에 쌓지 않고 바로 503(Retry-After)을 돌려준다.
+    """
+
+    def __init__(self, name: str, workers: int, queue_depth: int, use_processes: bool = False):
+        self.name = name
+        self.workers = max(workers, 1)
+        self.capacity = self.workers + max(queue_depth, 0)
+        self.use_processes = use_processes
+        self._executor = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> Dict[str, int]:
+        return {'workers': self.workers, 'capacity': self.capacity, 'in_flight': self._in_flight}
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                logger.warning(f"{self.name} 실행기 포화: {self._in_flight}/{self.capacity}")
+                EXECUTOR_REJECTED.inc(lane=self.name)
+                raise HTTPException(
+                    status_code=503,
+                    detail="서버가 혼잡합니다. 잠시 후 다시 시도해주세요.",
+                    headers={'Retry-After': str(settings.RETRY_AFTER_SECONDS)}
+                )
+            self._in_flight += 1
+
+        executor = self._get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            if not self.use_processes:
+                # 추적 문맥(현재 span)을 실행기 스레드로 넘긴다
+                context = contextvars.copy_context()
+                return await loop.run_in_executor(
+                    executor, functools.partial(context.run, _run_task, self.name, time.time(), func, args, kwargs))
+            # 워커 프로세스에서 쌓인 메트릭, span, 프로파일은 결과와 함께 받아 이 프로세스에서 합친다
+            session = profiling.current_session()
+            result, worker_metrics, spans, profile = await loop.run_in_executor(
+                executor, functools.partial(_run_process_task, self.name, time.time(), tracer.context(),
+                                            session is not None, func, args, kwargs))
+            registry.merge(worker_metrics)
+            tracer.export(spans)
+            if profile:
+                session.merge(profile)
+            return result
+        except BrokenProcessPool:
+            # 워커 프로세스가 죽으면 풀 전체가 못 쓰게 되므로 다음 요청부터 새 풀을 만든다
+            logger.error(f"{self.name} 프로세스 풀이 손상되어 다시 생성합니다.")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.use_processes:
+                        # 이벤트 루프/스레드 풀이 떠 있는 프로세스를 fork하지 않도록 spawn 사용
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                             mp_context=multiprocessing.get_context('spawn'))
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._executor
+
+
+EXECUTOR_REJECTED = registry.counter('quantus_executor_rejected_total', '실행기 포화로 거절(503)된 작업 수', ('lane',))
+
+def _run_task(lane: str, submitted: float, func: Callable, args: tuple, kwargs: dict) -> Any:
+    with tracer.span(f"task.{lane} {getattr(func, '__name__', 'task')}",
+                     queue_wait_ms=round((time.time() - submitted) * 1000, 3)), profiling.thread_scope():
+        return func(*args, **kwargs)
+
+
+def _run_process_task(lane: str, submitted: float, trace_context, profile_requested: bool,
+                      func: Callable, args: tuple, kwargs: dict):
+    """프로세스 풀 워커에서 실행된다. 결과와 함께 그동안 쌓인 메트릭, 끝난 span, 프로파일을 돌려준다."""
+    with tracer.attach(trace_context) as spans, profiling.remote_session(profile_requested) as profile:
+        result = _run_task(lane, submitted, func, args, kwargs)
+    return result, registry.drain(), spans, profile
+
+
+# I/O 위주 작업 (KRX/DART 호출, 파일 읽기, 가벼운 pandas 처리)
+io_lane = ExecutorLane('io', settings.IO_WORKERS, settings.IO_QUEUE_DEPTH)
+
+# CPU 위주 작업 (투자지표 생성, 백테스트). CPU_WORKERS=0이면 별도 프로세스 없이 스레드 하나로 실행
+cpu_lane = ExecutorLane('cpu', settings.CPU_WORKERS or 1, settings.CPU_QUEUE_DEPTH, use_processes=settings.CPU_WORKERS > 0)
+
+
+registry.gauge('quantus_executor_in_flight', '실행 중이거나 대기 중인 작업 수', ('lane',),
+               callback=lambda: {(lane.name,): lane.in_flight for lane in (io_lane, cpu_lane)})
+registry.gauge('quantus_executor_capacity', '워커 수 + 대기열 깊이', ('lane',),
+               callback=lambda: {(lane.name,): lane.capacity for lane in (io_lane, cpu_lane)})
+
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    token = _event_loop.set(asyncio.get_running_loop())
+    try:
+        return await io_lane.run(func, *args, **kwargs)
+    finally:
+        _event_loop.reset(token)
+
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """func와 인자, 결과, 예외는 프로세스 간에 pickle 가능해야 한다.
+
+    모듈 수준 함수(app.service.tasks)를 사용하고, HTTPException은 pickle되지 않으므로 던지지 않는다.
+    """
+    return await cpu_lane.run(func, *args, **kwargs)
+
+
+async def run_cpu_cached(method: Callable, task: Callable, *args) -> Any:
+    """@cached 서비스 메서드의 결과를 이 프로세스에서 캐시로 찾고, 없으면 CPU 실행기에서 task(*args)로 계산해 저장한다.
+
+    spawn으로 뜬 프로세스 풀 자식은 캐시를 따로 가지므로(memory 백엔드) 자식 안에서 캐시하면 같은 요청도 다른 자식으로 가면
+    놓치고, 캐시 메모리도 CPU_WORKERS배가 된다. task는 자식에서 캐시를 거치지 않는 경로(method.uncached)로 계산해야 한다.
+    """
+    # 키 계산(큰 DataFrame 해시)과 disk/redis 조회, 키별/채움 락 대기는 I/O 실행기에서 하고, 계산만 CPU 실행기에 맡긴다.
+    # get_or_set을 거치므로 같은 키의 동시 요청은 하나만 계산하고 나머지는 그 결과를 받는다.
+    return await run_io(call_cpu_cached, method, task, *args)
+
+def submit_cpu(func: Callable, *args, **kwargs) -> Future:
+    """run_io로 실행 중인 동기 코드에서 계산 단계를 CPU 실행기에 맡긴다. 인자 규칙은 run_cpu와 같다.
+
+    I/O 스레드는 결과를 기다리기만 하므로 GIL을 잡고 I/O 실행기 자리를 오래 차지하지 않는다.
+    이벤트 루프 밖(스크립트, 배치, 워커)에서 부르면 그 자리에서 계산한 결과를 담아 돌려준다.
+    """
+    loop = _event_loop.get()
+    if loop is None:
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    # 추적 문맥은 호출한 스레드의 문맥이 그대로 넘어간다
+    return asyncio.run_coroutine_threadsafe(run_cpu(func, *args, **kwargs), loop)
+
+
+def call_cpu(func: Callable, *args, **kwargs) -> Any:
+    return submit_cpu(func, *args, **kwargs).result()
+
+
+def call_cpu_cached(method: Callable, task: Callable, *args) -> Any:
+    """call_cpu의 캐시 버전. @cached 서비스 메서드의 키로 이 프로세스의 캐시를 보고, 없으면 task(*args)를 CPU 실행기에서 계산한다.
+
+    계산하는 동안 키별 락(프로세스 안)과 채움 락(disk/redis)을 잡고 있어 같은 키를 한 번만 계산한다.
+
+    task는 자식에서 캐시를 거치지 않는 경로(method.uncached)로 계산해야 한다 (run_cpu_cached 참고).
+    """
+    wrapper = method.__func__
+    should_cache = wrapper.should_cache
+    return cache.shared_cache.get_or_set(
+        wrapper.cache_key(method.__self__, *args),
+        lambda: call_cpu(task, *args),
+        ttl=wrapper.cache_ttl,
+        should_cache=(lambda result: should_cache(result, method.__self__, *args)) if should_cache else None
+    )
+
+
+def shutdown_executors():
+    io_lane.shutdown()
+    cpu_lane.shutdown()
+
+
+class ClientConcurrencyMiddleware:
+    """클라이언트별 동시 요청 수를 제한하는 ASGI 미들웨어.
+
+    클라이언트는 접속 IP로 구분한다. 클라이언트가 보낸 헤더는 바꿔 가며 보내면 제한을 피할 수 있으므로,
+    신뢰하는 프록시/인증 게이트웨이가 채우는 헤더를 client_id_header로 지정했을 때만 그 값을 쓴다.
+    제한을 넘으면 429(Retry-After).
+    """
+
+    def __init__(self, app, path_prefix: str, max_concurrency: int, client_id_header: str = ''):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_concurrency = max_concurrency
+        self.client_id_header = client_id_header.lower().encode('latin-1')
+        self._active: Dict[str, int] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or self.max_concurrency <= 0 or not scope['path'].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        client_id = self._client_id(scope)
+        # 이벤트 루프 안에서만 접근하므로 락이 필요 없다
+        if self._active.get(client_id, 0) >= self.max_concurrency:
+            response = JSONResponse(
+                status_code=429,
+                content={'detail': '동시 요청 수 제한을 초과했습니다. 잠시 후 다시 시도해주세요.'},
+                headers={'Retry-After': str(settings.RETRY_AFTER_SECONDS)}
+            )
+            await response(scope, receive, send)
+            return
+
+        self._active[client_id] = self._active.get(client_id, 0) + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._active[client_id] -= 1
+            if self._active[client_id] == 0:
+                del self._active[client_id]
+
+    def _client_id(self, scope) -> str:
+        if self.client_id_header:
+            for name, value in scope.get('headers', []):
+                if name == self.client_id_header:
+                    return value.decode('latin-1')
+        client = scope.get('client')
+        return client[0] if client else 'unknown'
@@ -0,0 +1,231 @@
+import fcntl
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 장 시간과 공시 일정은 한국 시간 기준이다 (서머타임 없음)
+KST = timezone(timedelta(hours=9), 'KST')
+
+PREFETCH_RUNS = registry.counter('quantus_prefetch_runs_total', '사전 수집 작업 실행 수', ('job', 'status'))
+PREFETCH_CALLS = registry.counter('quantus_prefetch_calls_total', '사전 수집이 쓴 외부 호출 수', ('service',))
+
+
+def now_kst() -> datetime:
+    return datetime.now(KST)
+
+
+def daily_at(hhmm: str) -> Callable[[datetime], datetime]:
+    """매일 hh:mm(KST)에 실행하는 일정."""
+    hour, minute = (int(part) for part in hhmm.split(':'))
+
+    def next_run(now: datetime) -> datetime:
+        run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return run if run > now else run + timedelta(days=1)
+    return next_run
+
+
+def every(seconds: float) -> Callable[[datetime], datetime]:
+    return lambda now: now + timedelta(seconds=seconds)
+
+
+class RateBudget:
+    """외부 API 호출 예산. 하루 한도(daily, KST 자정에 초기화)와 초당 속도(per_second)를 함께 지킨다.
+
+    share(interval)은 남은 예산을 오늘 남은 실행 횟수로 나눈 몫이라, 주기 작업이 한 번에 예산을 다 쓰지 않고
+    하루에 고르게 나눠 쓴다. 외부 API가 한도 초과를 알리면 exhaust()로 그날 남은 예산을 버린다.
+    """
+
+    def __init__(self, service: str, daily: int, per_second: float = 0):
+        self.service = service
+        self.daily = daily
+        self.per_second = per_second
+        self._day = None
+        self._used = 0
+        self._next_call = 0.0
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        today = now_kst().strftime('%Y%m%d')
+        if today != self._day:
+            self._day, self._used = today, 0
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll()
+            return max(self.daily - self._used, 0)
+
+    def share(self, interval_seconds: float) -> int:
+        now = now_kst()
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        runs_left = max(math.ceil((midnight - now).total_seconds() / interval_seconds), 1)
+        return math.ceil(self.remaining / runs_left)
+
+    def acquire(self, calls: int = 1) -> bool:
+        """예산이 남아 있으면 calls만큼 쓰고 (초당 속도에 맞춰 기다린 뒤) True."""
+        with self._lock:
+            self._roll()
+            if self._used + calls > self.daily:
+                return False
+            self._used += calls
+            wait = 0.0
+            if self.per_second > 0:
+                now = time.monotonic()
+                start = max(now, self._next_call)
+                self._next_call = start + calls / self.per_second
+                wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+        PREFETCH_CALLS.inc(calls, service=self.service)
+        return True
+
+    def exhaust(self):
+        with self._lock:
+            self._roll()
+            self._used = max(self._used, self.daily)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._roll()
+            return {'day': self._day, 'used': self._used, 'daily': self.daily, 'per_second': self.per_second}
+
+
+class Scheduler:
+    """정해진 시각/주기에 사전 수집 작업을 돌리는 백그라운드 스레드.
+
+    여러 uvicorn 워커(또는 같은 호스트의 사이드카)가 함께 켜도 lock_path의 파일 락을 잡은 프로세스 하나만 작업을 돌리고,
+    나머지는 1분마다 락을 다시 시도한다. 작업 함수가 돌려준 dict는 마지막 결과로 남는다.
+    """
+
+    LEADER_RETRY_SECONDS = 60
+
+    def __init__(self, lock_path: Optional[str] = None):
+        self.lock_path = lock_path or os.path.join(tempfile.gettempdir(), 'quantus-prefetch.lock')
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+
+    def job(self, name: str, schedule: Callable[[datetime], datetime], run_at_start: bool = True):
+        """작업을 등록하는 데코레이터. schedule(now)는 다음 실행 시각을 돌려준다."""
+        def decorator(func):
+            self._jobs[name] = {'func': func, 'schedule': schedule, 'run_at_start': run_at_start,
+                                'state': {'status': 'pending', 'runs': 0, 'failures': 0}}
+            return func
+        return decorator
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def start(self) -> threading.Thread:
+        with self._lock:
+            if self._thread is None:
+                self._stopped.clear()
+                now = now_kst()
+                for job in self._jobs.values():
+                    job['next_run'] = now if job['run_at_start'] else job['schedule'](now)
+                self._thread = threading.Thread(target=self._loop, name='prefetch-scheduler', daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._release()
+
+    def trigger(self, name: str):
+        """다음 루프에서 바로 실행하도록 당긴다."""
+        if name not in self._jobs:
+            raise KeyError(name)
+        with self._lock:
+            self._jobs[name]['next_run'] = now_kst()
+        self._wakeup.set()
+
+    def run_job(self, name: str) -> dict:
+        job = self._jobs[name]
+        self._update(name, status='running', started_at=now_kst().isoformat(timespec='seconds'))
+        started = time.perf_counter()
+        try:
+            result = job['func']() or {}
+            status = 'done'
+            PREFETCH_RUNS.inc(job=name, status='done')
+            logger.info(f"사전 수집 완료 ({name}, {time.perf_counter() - started:.1f}초): {result}")
+        except Exception as e:
+            result, status = {'error': str(e)}, 'failed'
+            PREFETCH_RUNS.inc(job=name, status='failed')
+            logger.exception(f"사전 수집 실패 ({name}): {str(e)}")
+        with self._lock:
+            state = job['state']
+            state.update(status=status, seconds=round(time.perf_counter() - started, 3), result=result,
+                         runs=state['runs'] + 1, failures=state['failures'] + (status == 'failed'))
+        return result
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            jobs = {
+                name: {**job['state'], 'next_run': job['next_run'].isoformat(timespec='seconds') if job.get('next_run') else None}
+                for name, job in self._jobs.items()
+            }
+        return {'running': self._thread is not None, 'leader': self.is_leader, 'jobs': jobs}
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            if not self.is_leader and not self._acquire():
+                self._wakeup.wait(self.LEADER_RETRY_SECONDS)
+                self._wakeup.clear()
+                continue
+
+            now = now_kst()
+            with self._lock:
+                due = [name for name, job in self._jobs.items() if job['next_run'] <= now]
+            for name in due:
+                if self._stopped.is_set():
+                    return
+                self.run_job(name)
+                with self._lock:
+                    self._jobs[name]['next_run'] = self._jobs[name]['schedule'](now_kst())
+
+            with self._lock:
+                upcoming = min((job['next_run'] for job in self._jobs.values()), default=None)
+            timeout = (upcoming - now_kst()).total_seconds() if upcoming else self.LEADER_RETRY_SECONDS
+            self._wakeup.wait(max(timeout, 0))
+            self._wakeup.clear()
+
+    def _acquire(self) -> bool:
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            logger.debug("다른 프로세스가 사전 수집을 맡고 있습니다 (%s)", self.lock_path)
+            return False
+        self._lock_file = lock_file
+        logger.info(f"사전 수집 스케줄러 시작 (pid {os.getpid()}): {', '.join(self._jobs)}")
+        return True
+
+    def _release(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _update(self, name: str, **state):
+        with self._lock:
+            self._jobs[name]['state'].update(state)
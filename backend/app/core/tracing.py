@@ -0,0 +1,398 @@
+import contextvars
+import functools
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+from app.core import profiling
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """하나의 작업 구간. 끝나면 exporter(또는 프로세스 풀 워커에서는 수집 목록)로 보낸다."""
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'start_ns', 'end_ns', 'status', 'error')
+
+    sampled = True
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = 'ok'
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_name(self, name: str):
+        self.name = name
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes,
+            'pid': os.getpid(),
+            'thread': threading.current_thread().name
+        }
+
+
+class _NoopSpan:
+    """샘플링되지 않았거나 추적이 꺼져 있을 때 쓰는 빈 span. 하위 span도 만들지 않도록 문맥에 남긴다."""
+    sampled = False
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_name(self, name: str):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+# 프로세스 풀 워커에서 끝난 span을 모아 부모 프로세스로 돌려보낼 목록
+_collected: contextvars.ContextVar = contextvars.ContextVar('collected_spans', default=None)
+
+
+class _RemoteParent:
+    """다른 프로세스(또는 traceparent 헤더)에서 넘어온 부모 span 정보."""
+    sampled = True
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_name(self, name: str):
+        pass
+
+
+class JsonlExporter:
+    """span을 한 줄에 하나씩 JSON으로 쓰고, 파일이 max_bytes를 넘으면 .1 ~ .N으로 돌린다."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path.format(pid=os.getpid())
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[dict]):
+        payload = b''.join(orjson.dumps(span, default=str) + b'\n' for span in spans)
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(payload) > self.max_bytes:
+            self._rotate()
+        with open(self.path, 'ab') as f:
+            f.write(payload)
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class OtlpExporter:
+    """OTLP/HTTP(JSON) 수집기(예: 로컬 OpenTelemetry Collector, Jaeger, Tempo)로 span을 보낸다."""
+
+    def __init__(self, endpoint: str, service_name: str):
+        import requests
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._session = requests.Session()
+
+    def export(self, spans: List[dict]):
+        body = {
+            'resourceSpans': [{
+                'resource': {'attributes': [_otlp_attribute('service.name', self.service_name)]},
+                'scopeSpans': [{'scope': {'name': 'quantus'}, 'spans': [self._convert(span) for span in spans]}]
+            }]
+        }
+        response = self._session.post(self.endpoint, data=orjson.dumps(body, default=str),
+                                      headers={'Content-Type': 'application/json'}, timeout=5)
+        if response.status_code >= 300:
+            logger.warning(f"OTLP 전송 실패: status_code={response.status_code}")
+
+    def _convert(self, span: dict) -> dict:
+        attributes = {**span['attributes'], 'process.pid': span['pid'], 'thread.name': span['thread']}
+        converted = {
+            'traceId': span['trace_id'],
+            'spanId': span['span_id'],
+            'name': span['name'],
+            'kind': 1,
+            'startTimeUnixNano': str(span['start_ns']),
+            'endTimeUnixNano': str(span['end_ns']),
+            'attributes': [_otlp_attribute(key, value) for key, value in attributes.items()],
+            'status': {'code': 2, 'message': span['error'] or ''} if span['status'] == 'error' else {'code': 1}
+        }
+        if span['parent_id']:
+            converted['parentSpanId'] = span['parent_id']
+        return converted
+
+
+def _otlp_attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Tracer:
+    """요청 단위 추적기.
+
+    루트 span(요청)에서 한 번만 샘플링을 정하고(head sampling), 샘플링되지 않은 요청은 하위 span을 전혀 만들지 않는다.
+    끝난 span은 대기열에 넣고 백그라운드 스레드가 모아서 내보내므로 요청 경로에서는 파일/네트워크 I/O가 없다.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0, queue_size: int = 10000, flush_seconds: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current(self):
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        if not self.enabled or parent is NOOP_SPAN:
+            yield NOOP_SPAN
+            return
+        if parent is None and not self._sample():
+            # 샘플링되지 않은 루트: 하위 호출이 다시 샘플링하지 않도록 빈 span을 문맥에 둔다
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+
+        if parent is None:
+            span = Span(name, os.urandom(16).hex(), None, attributes)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'error'
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._finish(span)
+
+    @contextmanager
+    def root(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """요청의 루트 span. W3C traceparent 헤더가 있으면 그 trace를 잇고 샘플링 여부도 따른다."""
+        parent = _parse_traceparent(traceparent) if traceparent else None
+        token = _current_span.set(parent)
+        try:
+            with self.span(name, **attributes) as span:
+                yield span
+        finally:
+            _current_span.reset(token)
+
+    def context(self) -> Optional[Tuple[str, str, bool]]:
+        """다른 프로세스로 넘길 현재 문맥 (trace_id, span_id, sampled). 추적하지 않는 중이면 None."""
+        span = _current_span.get()
+        if span is None:
+            return None
+        if not span.sampled:
+            return ('', '', False)
+        return (span.trace_id, span.span_id, True)
+
+    @contextmanager
+    def attach(self, context: Optional[Tuple[str, str, bool]]):
+        """다른 프로세스에서 넘어온 문맥 아래에서 실행하고, 끝난 span을 모아 돌려준다 (collected 목록)."""
+        collected: List[dict] = []
+        if context is None:
+            parent = None
+        elif not context[2]:
+            parent = NOOP_SPAN
+        else:
+            parent = _RemoteParent(context[0], context[1])
+        span_token = _current_span.set(parent)
+        collect_token = _collected.set(collected)
+        try:
+            yield collected
+        finally:
+            _collected.reset(collect_token)
+            _current_span.reset(span_token)
+
+    def export(self, spans: List[dict]):
+        """프로세스 풀 워커에서 돌아온 span을 내보낸다."""
+        for span in spans:
+            self._enqueue(span)
+
+    def start(self):
+        with self._lock:
+            if self.enabled and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='trace-export', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"span 내보내기 실패 ({len(batch)}개): {str(e)}")
+
+    def _finish(self, span: Span):
+        collected = _collected.get()
+        if collected is not None:
+            collected.append(span.to_dict())
+        else:
+            self._enqueue(span.to_dict())
+
+    def _enqueue(self, span: dict):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # 내보내기가 밀리면 요청을 막지 않고 버린다
+            self.dropped += 1
+        if self._thread is None:
+            self.start()
+
+    def _sample(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+
+def _parse_traceparent(value: str):
+    # 00-{trace_id 32}-{span_id 16}-{flags 2}
+    parts = value.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    if not int(parts[3], 16) & 1:
+        return NOOP_SPAN
+    return _RemoteParent(parts[1], parts[2])
+
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None):
+    """함수 호출을 span으로 감싸는 데코레이터. attributes는 함수 인자를 받아 span 속성 dict를 돌려준다."""
+    def decorator(func):
+        if not tracer.enabled and not settings.PROFILING_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is NOOP_SPAN and profiling.current_session() is None:
+                return func(*args, **kwargs)
+            with tracer.span(name, **(attributes(*args, **kwargs) if attributes else {})), profiling.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func: Callable) -> Callable:
+    """현재 요청 문맥(추적 span, 프로파일링 세션)을 담아 다른 스레드에서 실행할 함수를 만든다.
+
+    executor.submit(bind(fn), ...)처럼 작업마다 호출한다.
+    """
+    return functools.partial(contextvars.copy_context().run, _run_bound, func)
+
+
+def _run_bound(func: Callable, *args, **kwargs):
+    with profiling.thread_scope():
+        return func(*args, **kwargs)
+
+
+def create_tracer() -> Tracer:
+    if settings.TRACE_EXPORTER == 'jsonl':
+        exporter = JsonlExporter(settings.TRACE_FILE, settings.TRACE_MAX_BYTES, settings.TRACE_BACKUP_COUNT)
+    elif settings.TRACE_EXPORTER == 'otlp':
+        exporter = OtlpExporter(settings.TRACE_OTLP_ENDPOINT, settings.PROJECT_NAME)
+    else:
+        exporter = None
+    return Tracer(exporter, sample_rate=settings.TRACE_SAMPLE_RATE)
+
+
+tracer = create_tracer()
+
+
+class TracingMiddleware:
+    """요청마다 루트 span을 만든다. 샘플링된 요청은 응답에 X-Trace-Id 헤더를 붙인다."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get('headers', []):
+            if name == b'traceparent':
+                traceparent = value.decode('latin-1')
+                break
+
+        with tracer.root(f"{scope['method']} {scope['path']}", traceparent,
+                         **{'http.method': scope['method'], 'http.target': scope['path']}) as span:
+            async def send_wrapper(message):
+                if message['type'] == 'http.response.start':
+                    span.set_attribute('http.status_code', message['status'])
+                    if span.sampled:
+                        message.setdefault('headers', [])
+                        message['headers'] = list(message['headers']) + [(b'x-trace-id', span.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get('route')
+                if route is not None:
+                    # 경로 대신 라우트 템플릿으로 이름을 붙여 같은 라우트끼리 모아 볼 수 있게 한다
+                    span.set_name(f"{scope['method']} {route.path}")
@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Optional
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """앱이 요청을 받기 시작한 뒤 백그라운드 스레드에서 무거운 준비 작업을 미리 해 둔다.
+
+    각 단계는 pending → running → done / skipped / failed 로 진행되며, 실패해도 다음 단계는 계속한다.
+    모든 단계가 끝나면 ready가 된다 (실패한 단계가 있으면 degraded).
+    """
+
+    def __init__(self):
+        self.import_seconds: Optional[float] = None
+        self._steps: "OrderedDict[str, Callable[[], Optional[str]]]" = OrderedDict()
+        self._state = OrderedDict()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def step(self, name: str):
+        """warm-up 단계를 등록하는 데코레이터. 함수가 문자열을 돌려주면 skipped 사유로 기록한다."""
+        def decorator(func):
+            self._steps[name] = func
+            self._state[name] = {'status': 'pending'}
+            return func
+        return decorator
+
+    def start(self) -> threading.Thread:
+        with self._lock:
+            if self._thread is None:
+                self._started_at = time.time()
+                self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def run(self):
+        for name, func in self._steps.items():
+            self._update(name, status='running')
+            started = time.perf_counter()
+            try:
+                reason = func()
+                status = 'skipped' if reason else 'done'
+                self._update(name, status=status, seconds=round(time.perf_counter() - started, 3), **({'reason': reason} if reason else {}))
+            except Exception as e:
+                logger.error(f"warm-up 단계 실패 ({name}): {str(e)}")
+                self._update(name, status='failed', seconds=round(time.perf_counter() - started, 3), error=str(e))
+        self._finished_at = time.time()
+        logger.info(f"warm-up 완료: {self.snapshot()['status']} ({self._finished_at - self._started_at:.2f}초)")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            steps = {name: dict(state) for name, state in self._state.items()}
+        if self._finished_at is not None:
+            status = 'degraded' if any(state['status'] == 'failed' for state in steps.values()) else 'ready'
+        else:
+            status = 'warming' if self._started_at is not None else 'pending'
+        return {
+            'status': status,
+            'ready': status in ('ready', 'degraded'),
+            'import_seconds': self.import_seconds,
+            'warmup_seconds': round(self._finished_at - self._started_at, 3) if self._finished_at else None,
+            'steps': steps
+        }
+
+    def _update(self, name: str, **state):
+        with self._lock:
+            self._state[name] = state
+
+
+warmup = Warmup()
+
+registry.gauge('quantus_app_import_seconds', 'app.main 임포트에 걸린 시간', callback=lambda: warmup.import_seconds)
+
+
+@warmup.step('services')
+def _resolve_services():
+    # 라우트의 지연 서비스들(pandas 등 임포트 포함)을 미리 만든다
+    from app.core.lazy import resolve_all
+    resolve_all()
+
+
+@warmup.step('corp_codes')
+def _load_corp_codes():
+    from app.service.dart_api import DartApi
+    DartApi()._get_corp_code()
+
+
+@warmup.step('price_panel')
+def _load_price_panel():
+    from app.service.invest_idx import InvestIdxService
+    today = datetime.now().strftime("%Y%m%d")
+    try:
+        InvestIdxService().get_stock_file(today)
+    except FileNotFoundError:
+        return f"{today[:4]}년 주가 데이터 파일이 없습니다."
+
+
+@warmup.step('trading_calendar')
+def _load_trading_calendar():
+    from app.service.invest_idx import InvestIdxService
+    from app.service.krx_api import KrxApi
+    year = datetime.now().year
+    dates = []
+    # 연초에는 올해 패널이 비어 있을 수 있으므로 작년 것도 함께 읽는다
+    for target_year in (year - 1, year):
+        try:
+            panel = InvestIdxService().get_stock_file(f"{target_year}0101")
+        except FileNotFoundError:
+            continue
+        dates.extend(col for col in panel.columns if str(col).isdigit() and len(str(col)) == 8)
+    if not dates:
+        return "거래일을 알 수 있는 주가 데이터 파일이 없습니다."
+    KrxApi.load_trading_calendar(dates)
@@ -0,0 +1,385 @@
+"""기업 목록을 샤드로 나눠 별도 워커 프로세스/호스트(python -m app.worker)에 맡기는 작업 큐.
+
+WORKER_QUEUE_URL이 있으면 get_corp_statement / create_company_analysis_dataframe이 기업 목록을 WORKER_SHARD_SIZE개씩
+샤드로 나눠 큐에 넣고, 워커가 처리한 결과를 샤드 순서대로 모은다.
+
+- sqlite:///경로.db: 같은 호스트의 프로세스끼리 (테스트, 단일 서버)
+- redis://호스트:6379/0: 여러 호스트
+
+작업 ID는 종류 + 입력 내용 해시라서 같은 입력을 다시 넣으면(요청 재시도, 여러 API 워커) 기존 샤드와 결과를 그대로 쓴다.
+워커는 샤드를 리스(lease)로 가져가 주기적으로 연장하고, 워커가 죽어 리스가 끝나면 다른 워커가 다시 가져간다.
+실패한 샤드는 지수 백오프로 WORKER_MAX_ATTEMPTS번까지 다시 시도한다. 샤드 작업은 입력만으로 결과가 정해지므로
+두 번 실행되어도 먼저 끝난 결과 하나만 남는다.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('pending', 'running', 'done', 'failed')
+
+
+class ShardJobError(RuntimeError):
+    """샤드가 재시도 한도를 넘겨 실패했거나 제한 시간 안에 끝나지 않았다."""
+
+
+class Task:
+    def __init__(self, task_id: str, job_id: str, index: int, kind: str, payload: bytes, attempts: int):
+        self.id = task_id
+        self.job_id = job_id
+        self.index = index
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+
+
+def dumps(value: Any) -> bytes:
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 3)
+
+
+def loads(payload: bytes) -> Any:
+    return pickle.loads(zlib.decompress(payload))
+
+
+def _backoff(attempts: int) -> float:
+    return min(2 ** attempts, 60)
+
+
+class WorkQueue:
+    """샤드 작업 큐 공통 인터페이스. 작업(job)은 같은 종류의 샤드(task) 여러 개이며, 샤드 ID는 '{job_id}:{index}'이다."""
+
+    def submit(self, job_id: str, kind: str, payloads: List[bytes]):
+        """샤드들을 넣는다. 이미 있는 샤드는 그대로 두고, 실패로 끝난 샤드만 다시 대기 상태로 돌린다."""
+        raise NotImplementedError
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Task]:
+        """대기 중이거나 리스가 끝난 샤드 하나를 가져간다."""
+        raise NotImplementedError
+
+    def heartbeat(self, task_id: str, worker: str, lease_seconds: float):
+        raise NotImplementedError
+
+    def complete(self, task_id: str, result: bytes):
+        raise NotImplementedError
+
+    def fail(self, task_id: str, error: str, max_attempts: int) -> bool:
+        """실패를 기록한다. 다시 시도할 수 있으면 백오프 뒤 대기 상태로 돌리고 True."""
+        raise NotImplementedError
+
+    def states(self, job_id: str, total: int) -> List[Tuple[str, Optional[str]]]:
+        """샤드 순서대로 (상태, 오류)."""
+        raise NotImplementedError
+
+    def result(self, job_id: str, index: int) -> bytes:
+        raise NotImplementedError
+
+    def jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """최근 작업별 진행 상황."""
+        raise NotImplementedError
+
+    def progress(self, job_id: str, total: int) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, _ in self.states(job_id, total):
+            counts[status] += 1
+        return {'total': total, **counts}
+
+
+class SqliteQueue(WorkQueue):
+    """SQLite 파일 하나를 큐로 쓴다. 같은 호스트의 API 프로세스와 워커 프로세스가 함께 연다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY, job_id TEXT NOT NULL, idx INTEGER NOT NULL, kind TEXT NOT NULL,
+                    payload BLOB, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL, lease_until REAL, worker TEXT,
+                    result BLOB, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id, idx)")
+            conn.execute("CREATE INDEX IF NOT EXISTS tasks_queue ON tasks (status, available_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, job_id: str, kind: str, payloads: List[bytes]):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # 오래된 완료/실패 샤드 정리
+            conn.execute("DELETE FROM tasks WHERE status IN ('done', 'failed') AND updated_at < ?",
+                         (now - settings.WORKER_RESULT_TTL_SECONDS,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (id, job_id, idx, kind, payload, status, attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', 0, ?, ?, ?)",
+                [(f"{job_id}:{index}", job_id, index, kind, payload, now, now, now) for index, payload in enumerate(payloads)])
+            for index, payload in enumerate(payloads):
+                conn.execute("UPDATE tasks SET status = 'pending', attempts = 0, available_at = ?, payload = ?, error = NULL, "
+                             "updated_at = ? WHERE id = ? AND status = 'failed'", (now, payload, now, f"{job_id}:{index}"))
+            conn.execute("COMMIT")
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Task]:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, job_id, idx, kind, payload, attempts FROM tasks "
+                "WHERE (status = 'pending' AND available_at <= ?) OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY created_at, idx LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute("UPDATE tasks SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                         "updated_at = ? WHERE id = ?", (worker, now + lease_seconds, now, row[0]))
+            conn.execute("COMMIT")
+        return Task(row[0], row[1], row[2], row[3], row[4], row[5] + 1)
+
+    def heartbeat(self, task_id: str, worker: str, lease_seconds: float):
+        with self._connect() as conn:
+            conn.execute("UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                         (time.time() + lease_seconds, task_id, worker))
+
+    def complete(self, task_id: str, result: bytes):
+        with self._connect() as conn:
+            conn.execute("UPDATE tasks SET status = 'done', result = ?, payload = NULL, error = NULL, updated_at = ? "
+                         "WHERE id = ? AND status != 'done'", (result, time.time(), task_id))
+
+    def fail(self, task_id: str, error: str, max_attempts: int) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts, status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None or row[1] == 'done':
+                return False
+            retry = row[0] < max_attempts
+            conn.execute("UPDATE tasks SET status = ?, available_at = ?, error = ?, updated_at = ? WHERE id = ?",
+                         ('pending' if retry else 'failed', now + _backoff(row[0]), error, now, task_id))
+        return retry
+
+    def states(self, job_id: str, total: int) -> List[Tuple[str, Optional[str]]]:
+        with self._connect() as conn:
+            rows = {idx: (status, error) for idx, status, error in conn.execute(
+                "SELECT idx, status, error FROM tasks WHERE job_id = ?", (job_id,))}
+        return [rows.get(index, ('failed', '샤드가 큐에서 사라졌습니다')) for index in range(total)]
+
+    def result(self, job_id: str, index: int) -> bytes:
+        with self._connect() as conn:
+            return conn.execute("SELECT result FROM tasks WHERE id = ?", (f"{job_id}:{index}",)).fetchone()[0]
+
+    def jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, kind, status, COUNT(*), MIN(created_at), MAX(updated_at) FROM tasks "
+                "GROUP BY job_id, status ORDER BY MIN(created_at) DESC").fetchall()
+        jobs: Dict[str, Dict[str, Any]] = {}
+        for job_id, kind, status, count, created_at, updated_at in rows:
+            job = jobs.setdefault(job_id, {'job_id': job_id, 'kind': kind, 'total': 0, **dict.fromkeys(STATUSES, 0),
+                                           'created_at': created_at, 'updated_at': updated_at})
+            job[status] = count
+            job['total'] += count
+            job['created_at'] = min(job['created_at'], created_at)
+            job['updated_at'] = max(job['updated_at'], updated_at)
+        return sorted(jobs.values(), key=lambda job: job['created_at'], reverse=True)[:limit]
+
+
+# 대기열(pending)에서 가져갈 수 있는 것이 없으면 리스가 끝난 실행 중 샤드를 가져간다
+_REDIS_CLAIM = """
+local id = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)[1]
+if not id then
+  id = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, 1)[1]
+  if not id then return nil end
+end
+redis.call('ZREM', KEYS[1], id)
+redis.call('ZADD', KEYS[2], ARGV[2], id)
+local key = ARGV[4] .. id
+redis.call('HSET', key, 'status', 'running', 'worker', ARGV[3])
+local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+return {id, attempts}
+"""
+
+
+class RedisQueue(WorkQueue):
+    """Redis 정렬 집합 두 개(대기: 가능 시각, 실행 중: 리스 만료 시각)와 샤드별 해시로 만든 큐. 여러 호스트가 함께 쓴다.
+
+    client를 넘기면 그 클라이언트를 쓴다 (테스트에서는 fakeredis.FakeRedis()).
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'quantus', client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = f"{prefix}:wq"
+        self._claim = client.register_script(_REDIS_CLAIM)
+
+    def _task_key(self, task_id: str) -> str:
+        return f"{self.prefix}:task:{task_id}"
+
+    def submit(self, job_id: str, kind: str, payloads: List[bytes]):
+        now = time.time()
+        ttl = settings.WORKER_RESULT_TTL_SECONDS
+        for index, payload in enumerate(payloads):
+            task_id = f"{job_id}:{index}"
+            key = self._task_key(task_id)
+            created = self.client.hsetnx(key, 'status', 'pending')
+            if not created and self.client.hget(key, 'status') != b'failed':
+                continue
+            self.client.hset(key, mapping={'job_id': job_id, 'idx': index, 'kind': kind, 'payload': payload,
+                                           'status': 'pending', 'attempts': 0, 'created_at': now, 'updated_at': now})
+            self.client.hdel(key, 'error')
+            self.client.expire(key, ttl)
+            self.client.zadd(f"{self.prefix}:pending", {task_id: now})
+        self.client.zadd(f"{self.prefix}:jobs", {f"{kind}|{job_id}|{len(payloads)}": now})
+        self.client.zremrangebyscore(f"{self.prefix}:jobs", '-inf', now - ttl)
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Task]:
+        now = time.time()
+        claimed = self._claim(keys=[f"{self.prefix}:pending", f"{self.prefix}:running"],
+                              args=[now, now + lease_seconds, worker, f"{self.prefix}:task:"])
+        if not claimed:
+            return None
+        task_id, attempts = claimed[0].decode(), int(claimed[1])
+        fields = self.client.hmget(self._task_key(task_id), 'job_id', 'idx', 'kind', 'payload')
+        if fields[0] is None:
+            # 결과 보관 기간이 지나 해시가 사라진 샤드
+            self.client.zrem(f"{self.prefix}:running", task_id)
+            return None
+        return Task(task_id, fields[0].decode(), int(fields[1]), fields[2].decode(), fields[3], attempts)
+
+    def heartbeat(self, task_id: str, worker: str, lease_seconds: float):
+        if self.client.hget(self._task_key(task_id), 'worker') == worker.encode():
+            self.client.zadd(f"{self.prefix}:running", {task_id: time.time() + lease_seconds}, xx=True)
+
+    def complete(self, task_id: str, result: bytes):
+        key = self._task_key(task_id)
+        if self.client.hget(key, 'status') == b'done':
+            return
+        self.client.hset(key, mapping={'status': 'done', 'result': result, 'updated_at': time.time()})
+        self.client.hdel(key, 'payload', 'error')
+        self.client.zrem(f"{self.prefix}:running", task_id)
+
+    def fail(self, task_id: str, error: str, max_attempts: int) -> bool:
+        key = self._task_key(task_id)
+        status, attempts = self.client.hmget(key, 'status', 'attempts')
+        if status is None or status == b'done':
+            return False
+        attempts = int(attempts or 0)
+        retry = attempts < max_attempts
+        now = time.time()
+        self.client.hset(key, mapping={'status': 'pending' if retry else 'failed', 'error': error, 'updated_at': now})
+        self.client.zrem(f"{self.prefix}:running", task_id)
+        if retry:
+            self.client.zadd(f"{self.prefix}:pending", {task_id: now + _backoff(attempts)})
+        return retry
+
+    def states(self, job_id: str, total: int) -> List[Tuple[str, Optional[str]]]:
+        pipe = self.client.pipeline()
+        for index in range(total):
+            pipe.hmget(self._task_key(f"{job_id}:{index}"), 'status', 'error')
+        states = []
+        for status, error in pipe.execute():
+            if status is None:
+                states.append(('failed', '샤드가 큐에서 사라졌습니다'))
+            else:
+                states.append((status.decode(), error.decode() if error else None))
+        return states
+
+    def result(self, job_id: str, index: int) -> bytes:
+        return self.client.hget(self._task_key(f"{job_id}:{index}"), 'result')
+
+    def jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        jobs = []
+        for member, created_at in self.client.zrevrange(f"{self.prefix}:jobs", 0, limit - 1, withscores=True):
+            kind, job_id, total = member.decode().split('|')
+            jobs.append({'job_id': job_id, 'kind': kind, **self.progress(job_id, int(total)), 'created_at': created_at})
+        return jobs
+
+
+def create_work_queue(url: Optional[str]) -> Optional[WorkQueue]:
+    if not url:
+        return None
+    if url.startswith('sqlite:///'):
+        return SqliteQueue(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisQueue(url, prefix=settings.CACHE_PREFIX)
+    raise ValueError(f"WORKER_QUEUE_URL은 sqlite:/// 또는 redis:// 로 시작해야 합니다: {url}")
+
+
+work_queue = create_work_queue(settings.WORKER_QUEUE_URL)
+
+
+def configure_work_queue(queue: Optional[WorkQueue]):
+    """work_queue를 교체한다 (테스트, 워커 CLI)."""
+    global work_queue
+    work_queue = queue
+
+
+def distributes(items: int) -> bool:
+    """이 크기의 기업 목록을 워커에 나눠 맡길지."""
+    return work_queue is not None and items >= settings.WORKER_MIN_ITEMS
+
+
+def shard_bounds(items: int) -> List[Tuple[int, int]]:
+    size = max(settings.WORKER_SHARD_SIZE, 1)
+    return [(start, min(start + size, items)) for start in range(0, items, size)]
+
+
+def run_sharded(kind: str, payloads: List[Any], timeout: Optional[float] = None) -> Iterator[Any]:
+    """샤드 입력들을 큐에 넣고, 워커가 끝낸 결과를 샤드 순서대로 하나씩 돌려준다."""
+    blobs = [dumps(payload) for payload in payloads]
+    digest = hashlib.sha256(kind.encode())
+    for blob in blobs:
+        digest.update(hashlib.sha256(blob).digest())
+    job_id = f"{kind}-{digest.hexdigest()[:16]}"
+    work_queue.submit(job_id, kind, blobs)
+    logger.info(f"샤드 작업 등록: {job_id} ({len(blobs)}개 샤드)")
+    return _gather(job_id, len(blobs), timeout or settings.WORKER_JOB_TIMEOUT_SECONDS)
+
+
+def _gather(job_id: str, total: int, timeout: float) -> Iterator[Any]:
+    started = time.monotonic()
+    last_report = started
+    next_index = 0
+    interval = 0.05
+    while next_index < total:
+        states = work_queue.states(job_id, total)
+        failed = [(index, error) for index, (status, error) in enumerate(states) if status == 'failed']
+        if failed:
+            index, error = failed[0]
+            raise ShardJobError(f"{job_id} 샤드 {index} 실패 (총 {len(failed)}개): {error}")
+
+        progressed = False
+        while next_index < total and states[next_index][0] == 'done':
+            yield loads(work_queue.result(job_id, next_index))
+            next_index += 1
+            progressed = True
+
+        now = time.monotonic()
+        if next_index < total and now - last_report >= 10:
+            counts = {status: sum(1 for state in states if state[0] == status) for status in STATUSES}
+            logger.info("샤드 진행 %s: 완료 %d/%d, 실행 중 %d, 대기 %d", job_id, counts['done'], total, counts['running'], counts['pending'])
+            last_report = now
+        if next_index < total and now - started > timeout:
+            raise ShardJobError(f"{job_id}가 {timeout:.0f}초 안에 끝나지 않았습니다 (완료 {next_index}/{total}, 워커 확인 필요)")
+        if not progressed:
+            time.sleep(interval)
+            interval = min(interval * 2, 1.0)
+        else:
+            interval = 0.05
+    logger.info(f"샤드 작업 완료: {job_id} ({total}개 샤드, {time.monotonic() - started:.1f}초)")
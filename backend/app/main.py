@@ -1,12 +1,56 @@
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes.v1 import stock_collector, stock_filter, financial_statement, invest_idx, back_test
+from app.api.main import api_router
+from app.api.routes.v1 import stock_collector, stock_filter, financial_statement, invest_idx, back_test, pipeline, cache, profiling
+from app.core.config import settings
+from app.core.runtime import ClientConcurrencyMiddleware, shutdown_executors
+from app.core.warmup import warmup
+from app.core.metrics import MetricsMiddleware, shared_snapshots
+from app.core.tracing import TracingMiddleware, tracer
+from app.core.profiling import ProfilingMiddleware
 import os
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 준비 작업은 백그라운드에서 진행하고 바로 요청을 받는다 (/ready로 상태 확인)
+    if settings.WARMUP_ENABLED:
+        warmup.start()
+    # 장 마감 후 / 공시 시즌 사전 수집 (워커 중 하나만 락을 잡고 돈다)
+    if settings.PREFETCH_ENABLED:
+        from app.service.prefetch import scheduler
+        scheduler.start()
+    if settings.METRICS_ENABLED and shared_snapshots is not None:
+        shared_snapshots.start()
+    yield
+    if settings.METRICS_ENABLED and shared_snapshots is not None:
+        shared_snapshots.stop()
+    if settings.PREFETCH_ENABLED:
+        scheduler.stop()
+    shutdown_executors()
+    if tracer.enabled:
+        tracer.flush()
+
 app = FastAPI(
     title="Quantus API",
     description="Stock data analysis API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# 요청 단위 프로파일링 (X-Profile 헤더 / ?profile= 쿼리, PROFILING_ENABLED일 때만)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, path_prefix=settings.API_V1_STR)
+
+# 클라이언트별 동시 요청 제한 (/health 등 API 밖의 경로는 제외)
+app.add_middleware(
+    ClientConcurrencyMiddleware,
+    path_prefix=settings.API_V1_STR,
+    max_concurrency=settings.CLIENT_MAX_CONCURRENCY,
+    client_id_header=settings.CLIENT_ID_HEADER
 )
 
 # Configure CORS
@@ -16,14 +60,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache", "X-Artifact-Id", "X-Trace-Id", "X-Profile-Id", "X-Total-Count", "X-Next-Cursor"],
 )
 
+# 라우트별 요청 처리 시간 (가장 바깥에서 측정해 429/503 응답도 포함)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 요청 단위 추적 (TRACE_EXPORTER=none이면 통과만 한다)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
+app.include_router(api_router)
 app.include_router(stock_collector.router, prefix="/api/v1")
 app.include_router(stock_filter.router, prefix="/api/v1")
 app.include_router(financial_statement.router, prefix="/api/v1")
 app.include_router(invest_idx.router, prefix="/api/v1")
 app.include_router(back_test.router, prefix="/api/v1")
+app.include_router(pipeline.router, prefix="/api/v1")
+app.include_router(cache.router, prefix="/api/v1")
+if settings.PROFILING_ENABLED:
+    app.include_router(profiling.router, prefix="/api/v1")
+if settings.PREFETCH_ENABLED:
+    from app.api.routes.v1 import prefetch
+    app.include_router(prefetch.router, prefix="/api/v1")
+if settings.WORKER_QUEUE_URL:
+    from app.api.routes.v1 import workers
+    app.include_router(workers.router, prefix="/api/v1")
+
+warmup.import_seconds = round(time.perf_counter() - _import_started, 3)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,54 @@
+"""장 마감 후 / 공시 시즌 사전 수집을 API 서버와 따로 돌리는 사이드카.
+
+사용법 (backend 디렉터리에서, API 서버와 같은 CACHE_DIR/CACHE_BACKEND와 data/ 디렉터리를 보게 한다):
+
+    CACHE_DIR=/dev/shm/quantus-cache python -m app.prefetch            # 스케줄러를 계속 돌린다
+    python -m app.prefetch --once prices                                # 작업 하나만 지금 돌리고 결과를 출력
+    python -m app.prefetch --once filings --once prices
+
+API 서버에서 PREFETCH_ENABLED=true로 켠 스케줄러와 같은 락 파일을 쓰므로 둘을 함께 띄워도 한쪽만 돈다.
+"""
+import argparse
+import json
+import logging
+import signal
+import threading
+
+from app.core.log import configure_logging
+
+logger = logging.getLogger("app.prefetch")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.prefetch', description='KRX/DART 사전 수집 스케줄러')
+    parser.add_argument('--once', action='append', choices=['prices', 'filings'],
+                        help='스케줄러 없이 이 작업만 지금 실행 (여러 번 지정 가능)')
+    args = parser.parse_args(argv)
+
+    # 앱 설정(app.core.config) 임포트 시 LOG_* 설정으로 다시 구성되지만, 그 전에 남기는 로그도 보이도록 먼저 켠다
+    configure_logging()
+
+    from app.core import cache
+    from app.service.prefetch import scheduler
+
+    if not cache.shared_cache.shared_across_processes:
+        logger.warning("캐시가 프로세스 밖에서 공유되지 않습니다 (CACHE_BACKEND=disk/redis 권장). "
+                       "받아 둔 스냅샷/재무제표는 이 프로세스에만 남고, 주가 패널 파일만 API 서버와 공유됩니다.")
+
+    if args.once:
+        results = {job: scheduler.run_job(job) for job in args.once}
+        print(json.dumps(results, ensure_ascii=False, indent=2, default=str))
+        return 1 if any('error' in result for result in results.values()) else 0
+
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+    scheduler.start()
+    stopped.wait()
+    logger.info("사전 수집 스케줄러 종료")
+    scheduler.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import List, Tuple, Optional, Dict
-from app.schemas.stock import StockData
-from app.schemas.invest_idx import RatioRow
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Tuple, Optional, Dict, Union
+from app.schemas.stock import StockData, require_data_or_artifact
+from app.schemas.invest_idx import RatioRow, RatioPanel
+from app.schemas.page import PageInfo
 
 class ScreeningCriteria(BaseModel):
     PER: Tuple[float, float] = Field(..., description="PER 범위 (최소값, 최대값)")
@@ -12,11 +13,16 @@ class ScreeningCriteria(BaseModel):
     부채비율: Optional[Tuple[float, float]] = Field(None, description="부채비율 범위 (최소값, 최대값)")
 
 class BackTestRequest(BaseModel):
-    test_data: List[RatioRow] = Field(..., description="백테스트에 사용할 테스트 데이터")
+    test_data: Optional[Union[RatioPanel, List[RatioRow]]] = Field(None, description="백테스트에 사용할 테스트 데이터 (행 목록 또는 columnar 패널)")
+    test_data_artifact_id: Optional[str] = Field(None, description="/idx/gen-idx 또는 /backtest/generate 결과의 artifact id")
     screening_criteria: ScreeningCriteria
     top_n: int = Field(..., gt=0, le=50, description="포트폴리오에 포함할 종목 수 (1-50)")
     initial_capital: int = Field(default=10000000, ge=1000000, description="초기자본금 (최소 100만원)")
 
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self, 'test_data', 'test_data_artifact_id')
+
 class PortfolioItem(BaseModel):
     종목명: str
     비중: float = Field(..., ge=0, le=1)
@@ -35,13 +41,20 @@ class RiskMetrics(BaseModel):
     win_rate: float = Field(..., ge=0, le=1, description="승률")
 
 class TestDataRequest(BaseModel):
-    data: List[StockData]
+    data: Optional[List[StockData]] = None
+    artifact_id: Optional[str] = None
     start_date: str
     end_date: str
     test_case: int
 
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
+
 class TestDataResponse(BaseModel):
     data: List[RatioRow]
+    artifact_id: Optional[str] = None
+    page: Optional[PageInfo] = None
 
 class TestResultResponse(BaseModel):
     monthly_results: List[MonthlyResult]
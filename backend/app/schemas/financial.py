@@ -1,7 +1,7 @@
 from enum import Enum
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from typing import List, Dict, Optional
-from app.schemas.stock import StockCmpData
+from app.schemas.stock import StockCmpData, require_data_or_artifact
 
 class QuarterCode(str, Enum):
     Q1 = "11013"
@@ -27,11 +27,17 @@ class StatementResult(BaseModel):
     data: List[FinancialData]
 
 class FinancialStatementRequest(BaseModel):
-    data: List[StockCmpData]
+    data: Optional[List[StockCmpData]] = None
+    artifact_id: Optional[str] = None
     filter_type: Optional[str] = None
     analysis_cnt: int
     start_date: str
     end_date: str
 
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
+
 class FinancialStatementResponse(BaseModel):
-    data: List[StatementResult]
\ No newline at end of file
+    data: List[StatementResult]
+    artifact_id: Optional[str] = None
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
-from app.schemas.stock import StockCmpData
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Optional, Any, Union
+from app.schemas.stock import StockCmpData, require_data_or_artifact
+from app.schemas.page import PageInfo
 
 class RatioRow(BaseModel):
     corp_name: str
@@ -10,17 +11,48 @@ class RatioRow(BaseModel):
     class Config:
         extra = "allow"  # 추가 필드 허용
 
+class RatioPanel(BaseModel):
+    """날짜 축을 한 번만 보내고 행(기업 x 지표)마다 값 배열을 보내는 columnar 포맷"""
+    dates: List[str]
+    corp_names: List[str]
+    types: List[str]
+    values: List[List[Optional[float]]]
+
+    @model_validator(mode='after')
+    def check_shape(self):
+        # 요청 단계에서 거르지 않으면 패널을 DataFrame으로 바꿀 때 reshape 오류(500)가 난다
+        if not (len(self.corp_names) == len(self.types) == len(self.values)):
+            raise ValueError("corp_names, types, values의 길이가 일치하지 않습니다.")
+        ragged = [index for index, row in enumerate(self.values) if len(row) != len(self.dates)]
+        if ragged:
+            raise ValueError(f"values 행의 길이가 dates({len(self.dates)}개)와 다릅니다: {ragged[:5]}번째 행")
+        return self
+
 class InvestIdxRequest(BaseModel):
     start_date: str
     end_date: str
-    data: List[StockCmpData]
-    financial_statements: List[Dict]
+    data: Optional[List[StockCmpData]] = None
+    artifact_id: Optional[str] = None
+    financial_statements: Optional[List[Dict]] = None
+    financial_statements_artifact_id: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_source(self):
+        require_data_or_artifact(self)
+        return require_data_or_artifact(self, 'financial_statements', 'financial_statements_artifact_id')
 
 class InvestIdxResponse(BaseModel):
     data: List[RatioRow]
+    artifact_id: Optional[str] = None
+    page: Optional[PageInfo] = None
 
 class AnalysisRequest(BaseModel):
-    data: List[RatioRow]
+    data: Optional[Union[RatioPanel, List[RatioRow]]] = None
+    artifact_id: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
 
 class InvestmentZone(BaseModel):
     lower_bound: Optional[float]
@@ -0,0 +1,8 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class PageInfo(BaseModel):
+    """저장된 결과(artifact)를 나눠 읽을 때 함께 보내는 페이지 정보"""
+    total: int  # 필터를 적용한 뒤 전체 항목 수 (투자지표 패널은 기업 수, 그 밖에는 행 수)
+    limit: int
+    next_cursor: Optional[str] = None  # 마지막 페이지면 None
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from app.schemas.stock import VolumeFilterType, CandidatesType, StrategyType
+from app.schemas.backtest import ScreeningCriteria
+
+class PipelineFilters(BaseModel):
+    etf_filter: bool = True
+    inverse_filter: bool = True
+    sector_filter: bool = True
+    preferred_filter: bool = True
+    etc_filter: bool = True
+    top_percent: float = 40
+    bottom_percent: float = 80
+
+class PipelineSpec(BaseModel):
+    start_date: str = Field(..., description="시작일 (YYYYMMDD)")
+    end_date: str = Field(..., description="종료일 (YYYYMMDD)")
+    filters: PipelineFilters = PipelineFilters()
+    volume_filter_type: VolumeFilterType = VolumeFilterType.IQR
+    candidates_type: CandidatesType = CandidatesType.ANNUAL_RETURN
+    strategy_type: StrategyType = StrategyType.RISK_AVERSE
+    analysis_cnt: int = Field(100, gt=0, description="재무제표를 조회할 후보 종목 수")
+    test_case: Optional[int] = Field(None, gt=0, description="지정하면 /backtest/generate와 같은 방식으로 별도 테스트 데이터를 만든다")
+    screening_criteria: Optional[ScreeningCriteria] = Field(None, description="생략하면 투자지표 분석 결과(투자구간)로 기준을 만든다")
+    top_n: int = Field(10, gt=0, le=50)
+    initial_capital: int = Field(default=10000000, ge=1000000)
+
+class PipelineStageInfo(BaseModel):
+    key: str
+    cached: bool
+    elapsed: float
+    rows: Optional[int] = None
+    artifact_id: Optional[str] = None
+
+class PipelineResponse(BaseModel):
+    stages: Dict[str, PipelineStageInfo]
+    screening_criteria: Dict[str, List[float]]
+    investment_zones: Dict[str, Any]
+    backtest: Dict[str, Any]
@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict
 from enum import Enum
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
+from app.schemas.page import PageInfo
 
 class VolumeFilterType(str, Enum):
     IQR = "IQR"
@@ -17,6 +18,11 @@ class StrategyType(str, Enum):
     RISK_AVERSE = "RISK_AVERSE"
     STABLE = "STABLE"
 
+def require_data_or_artifact(model, data_field: str = 'data', artifact_field: str = 'artifact_id'):
+    if getattr(model, data_field) is None and getattr(model, artifact_field) is None:
+        raise ValueError(f"{data_field} 또는 {artifact_field} 중 하나는 필요합니다.")
+    return model
+
 class DateRequest(BaseModel):
     input_date: str
 
@@ -82,23 +88,41 @@ class StockCmpData(BaseModel):
 
 class StockResponse(BaseModel):
     data: List[StockData]
+    artifact_id: Optional[str] = None
+    page: Optional[PageInfo] = None
 
 class VolumeRequest(BaseModel):
-    data: List[StockData]
+    data: Optional[List[StockData]] = None
+    artifact_id: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
 
 class VolumeResponse(BaseModel):
     data: dict
 
 class VolumeFilterRequest(BaseModel):
-    data: List[StockData]
+    data: Optional[List[StockData]] = None
+    artifact_id: Optional[str] = None
     filter_type: Optional[VolumeFilterType] = None
 
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
+
 class VolumeFilterResponse(BaseModel):
     data: List[StockData]
+    artifact_id: Optional[str] = None
 
 class StockEndRequest(BaseModel):
     endDd: str
-    data: List[StockData]
+    data: Optional[List[StockData]] = None
+    artifact_id: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
 
 class NormalCurve(BaseModel):
     x: List[float]
@@ -117,13 +141,54 @@ class StockEndResponse(BaseModel):
     data: List[StockCmpData]
     annual_return_analysis: AnalysisResult
     market_cap_change_analysis: AnalysisResult
+    artifact_id: Optional[str] = None
 
 class StockCandidatesRequest(BaseModel):
-    data: List[StockCmpData]
+    data: Optional[List[StockCmpData]] = None
+    artifact_id: Optional[str] = None
     candidates_type: Optional[CandidatesType] = None
     strategy_type: Optional[StrategyType] = None
     start_range: int = 0
     end_range: int = 100
 
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
+
 class StockCandidatesResponse(BaseModel):
-    data: List[StockCmpData]
\ No newline at end of file
+    data: List[StockCmpData]
+    artifact_id: Optional[str] = None
+
+class StockHorizonRequest(BaseModel):
+    startDd: str
+    data: Optional[List[StockData]] = None
+    artifact_id: Optional[str] = None
+    horizons: List[int] = [1, 3, 6, 12]
+    custom_end_dates: List[str] = []
+
+    @model_validator(mode='after')
+    def check_source(self):
+        return require_data_or_artifact(self)
+
+class HorizonInfo(BaseModel):
+    label: str
+    target_date: str
+    end_date: Optional[str] = None
+
+class StockHorizonData(BaseModel):
+    stockCode: str
+    stockName: str
+    marketType: str
+    sectorType: str
+    start_closingPrice: float
+    start_marketCap: float
+    start_listedShares: int
+    returns: Dict[str, Optional[float]]
+    market_cap_changes: Dict[str, Optional[float]]
+
+class StockHorizonResponse(BaseModel):
+    horizons: List[HorizonInfo]
+    data: List[StockHorizonData]
+    annual_return_analysis: Dict[str, Optional[AnalysisResult]]
+    market_cap_change_analysis: Dict[str, Optional[AnalysisResult]]
+    artifact_id: Optional[str] = None
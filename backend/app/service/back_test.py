@@ -1,19 +1,43 @@
 import pandas as pd
 import numpy as np
-from fastapi.logger import logger
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
 from typing import List
 
+from app.core import workqueue
+from app.core.metrics import timed_stage
+from app.core.tracing import bind, traced
 from app.schemas.stock import StockData, StockCmpData
 from app.service.invest_idx import InvestIdxService
 from app.service.stock_filter import StockFilterService
 from app.service.krx_api import KrxApi
 from app.service.dart_api import DartApi
 
+logger = logging.getLogger(__name__)
+
 invest_idx_service = InvestIdxService()
 stock_filter_service = StockFilterService()
 krx_api = KrxApi()
 dart_api = DartApi()
 
+class _StatementWatch:
+  """재무제표를 그대로 넘기되, 종료일 KRX 조회가 실패하면 남은 DART 조회를 기다리지 않고 바로 멈춘다."""
+
+  def __init__(self, statements, end_future):
+    self.statements = statements
+    self.end_future = end_future
+    self.count = 0
+
+  def __iter__(self):
+    for statement in self.statements:
+      if self.end_future.done() and self.end_future.exception() is not None:
+        # 제너레이터를 닫으면 iter_corp_statement가 남은 조회를 취소한다
+        self.statements.close()
+        raise self.end_future.exception()
+      self.count += 1
+      yield statement
+
 class BackTestService:
   def __init__(self):
       pass
@@ -21,7 +45,36 @@ class BackTestService:
   def run_back_test(self):
       pass
   
+  @traced('backtest.generate_test_data')
   def generate_test_data(self, data : List[StockData], start_date : str, end_date : str, test_case : int):
+    """DART 재무제표 조회를 먼저 시작하고, 그동안 주가 패널 읽기와 종료일 KRX 조회를 함께 돌린다.
+
+    조회할 기업은 종료일 스냅샷 없이도 정해지므로(cmp_universe) 기다리지 않는다. 재무제표가 도착하는 대로
+    그 기업의 투자지표 행을 만들어 두었다가 마지막에 기업 순서대로 합친다.
+    """
+    universe = stock_filter_service.cmp_universe(data)
+    cmp_case_data = universe.iloc[:test_case]
+    if workqueue.distributes(len(cmp_case_data)):
+      # 재무제표 조회/비율 계산을 워커에 나눠 맡기는 경우는 단계별로 돈다
+      return self._generate_test_data_sequential(data, start_date, end_date, test_case)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+      end_future = executor.submit(bind(krx_api.get_stock_list_with_next_day), end_date)
+      range_info_future = executor.submit(bind(self._test_range_info), universe, start_date)
+      statements = _StatementWatch(dart_api.iter_corp_statement(cmp_case_data, start_date, end_date), end_future)
+      test_data_df = invest_idx_service.stream_company_analysis_dataframe(range_info_future, statements)
+      # 종료일 데이터가 없으면 지금처럼 ValueError로 실패한다
+      end_future.result()
+
+    if statements.count == 0:
+      logger.error("모든 기업의 공시 정보가 없습니다")
+      raise HTTPException(status_code=404, detail="공시된 정보가 없습니다")
+    return test_data_df
+
+  def _test_range_info(self, universe : pd.DataFrame, start_date : str):
+    return invest_idx_service.get_candidates_range_info(universe, invest_idx_service.get_stock_file(start_date))
+
+  def _generate_test_data_sequential(self, data : List[StockData], start_date : str, end_date : str, test_case : int):
     end_data = krx_api.get_stock_list_with_next_day(end_date)
     cmp_data, annual_return_analysis, market_cap_change_analysis = stock_filter_service.calculate_cmp_data(data, end_data)
 
@@ -29,22 +82,20 @@ class BackTestService:
     
     test_statements = dart_api.get_corp_statement(cmp_case_data, start_date, end_date)
     stock_range_info = invest_idx_service.get_stock_file(start_date)
-    # DataFrame을 List[StockCmpData]로 변환
-    stock_cmp_data = [StockCmpData(**record) for record in cmp_data.to_dict(orient='records')]
-    test_range_info = invest_idx_service.get_candidates_range_info(stock_cmp_data, stock_range_info)
+    test_range_info = invest_idx_service.get_candidates_range_info(cmp_data, stock_range_info)
     test_data_df = invest_idx_service.create_company_analysis_dataframe(test_range_info, test_statements)
     
     return test_data_df
       
 
+  @timed_stage('backtest', rows=lambda result: len(result['monthly_returns']))
   def run_monthly_rebalancing_backtest(self, data, initial_capital:int, top_n : int, screening_criteria : dict):    
-    print(f"📊 백테스트 데이터 정보:")
-    print(f"   - 데이터 shape: {data.shape}")
-    print(f"   - 컬럼명: {data.columns.tolist()}")
-    print(f"   - 구분 값들: {data['구분'].unique()}")
+    logger.debug("백테스트 데이터: shape=%s, 구분 값=%s", data.shape, data['구분'].unique())
     
     rebalancing_dates = self._get_rebalancing_dates(data)
-    print(f"📅 리밸런싱 날짜: {rebalancing_dates}")
+    logger.info("백테스트 시작: %d개 리밸런싱 날짜 (%s ~ %s), top_n=%d",
+                len(rebalancing_dates), rebalancing_dates[0] if rebalancing_dates else '-',
+                rebalancing_dates[-1] if rebalancing_dates else '-', top_n)
     
     backtest_results = {
         'monthly_returns': [],
@@ -55,30 +106,22 @@ class BackTestService:
     
     current_capital = initial_capital
     
-    for i, current_date in enumerate(rebalancing_dates):
-        month_num = i + 1
+    # 안쪽 반복문이 이 인덱스를 덮어쓰면 다음 리밸런싱 날짜와 마지막 월 판단이 어긋나므로 이름을 따로 쓴다
+    for month_idx, current_date in enumerate(rebalancing_dates):
+        month_num = month_idx + 1
         
         try:
             # 1단계: 해당 월의 재무지표 추출
             fundamentals = self._get_fundamentals_at_date(data, current_date)
-            print(f"📊 {month_num}월 재무지표 추출 결과:")
-            print(f"   - 데이터 shape: {fundamentals.shape}")
-            print(f"   - 컬럼명: {fundamentals.columns.tolist()}")
-            if not fundamentals.empty:
-                print(f"   - 첫 3개 종목:")
-                for i in range(min(3, len(fundamentals))):
-                    print(f"     {fundamentals.index[i]}: {fundamentals.iloc[i].to_dict()}")
+            logger.debug("%d월 재무지표 추출: shape=%s", month_num, fundamentals.shape)
             if fundamentals.empty:
                 logger.error(f"{month_num}월: 재무지표 데이터 없음")
                 continue
             
             # 2단계: 종목 스크리닝
             selected_stocks, screening_results, rejection_reasons = self._screen_stocks_monthly(fundamentals, screening_criteria)
-            print(f"📋 {month_num}월 스크리닝 결과: {len(selected_stocks)}개 종목 선별")
-            print(f"   - 스크리닝 기준: {screening_criteria}")
-            print(f"   - 거절 사유: {rejection_reasons}")
-            if len(selected_stocks) > 0:
-                print(f"   - 선별된 종목: {selected_stocks[:5]}")  # 최대 5개만 출력
+            logger.debug("%d월 스크리닝: %d개 선별, 거절 사유 %s, 선별 종목(최대 5개) %s",
+                         month_num, len(selected_stocks), rejection_reasons, selected_stocks[:5])
             
             if len(selected_stocks) < top_n:
                 logger.error(f"{month_num}월: 선별 종목 부족 ({len(selected_stocks)}개)")
@@ -96,8 +139,8 @@ class BackTestService:
                 continue
             
             # 4단계: 다음 월까지의 수익률 계산
-            if i < len(rebalancing_dates) - 1:
-                next_date = rebalancing_dates[i + 1]
+            if month_idx < len(rebalancing_dates) - 1:
+                next_date = rebalancing_dates[month_idx + 1]
                 
                 current_portfolio = {}
                 for _, row in portfolio.iterrows():
@@ -118,7 +161,7 @@ class BackTestService:
                 backtest_results['cumulative_returns'].append(cumulative_return)
             
             else:
-                print(f"📊 {month_num}월: 마지막 월 (수익률 계산 없음)")
+                logger.debug("%d월: 마지막 월 (수익률 계산 없음)", month_num)
                 
         except Exception as e:
             logger.error(f"{month_num}월 처리 중 오류: {e}")
@@ -135,8 +178,8 @@ class BackTestService:
         
         best_month = max(monthly_returns)
         worst_month = min(monthly_returns)
-        print(f"   최고 월간수익: {best_month:+6.2f}%")
-        print(f"   최저 월간수익: {worst_month:+6.2f}%")
+        logger.info("백테스트 완료: 총 수익률 %+.2f%%, 최고 월간 %+.2f%%, 최저 월간 %+.2f%%",
+                    final_return, best_month, worst_month)
     
     # 결과 딕셔너리에 최종 정보 추가
     backtest_results.update({
@@ -161,6 +204,7 @@ class BackTestService:
     
     return rebalancing_dates
   
+  @traced('backtest.fundamentals', attributes=lambda self, data, target_date, *args, **kwargs: {'date': target_date})
   def _get_fundamentals_at_date(
         self, data : pd.DataFrame,
         target_date : str, 
@@ -187,12 +231,12 @@ class BackTestService:
     
     return fund_df
   
+  @traced('backtest.screen')
   def _screen_stocks_monthly(self, fund_df :pd.DataFrame, screening_criteria:dict):
       selected_stocks = []
       screening_results = {}
       
-      print(f"🔍 스크리닝 대상 종목 수: {len(fund_df)}")
-      print(f"🔍 사용 가능한 지표: {fund_df.columns.tolist()}")
+      logger.debug("스크리닝 대상 %d개 종목, 지표 %s", len(fund_df), list(fund_df.columns))
       
       for stock in fund_df.index:
           passed = True
@@ -200,7 +244,7 @@ class BackTestService:
           
           for metric, (min_val, max_val) in screening_criteria.items():
               if metric not in fund_df.columns:
-                  print(f"⚠️  {stock}: {metric} 지표 없음")
+                  logger.debug("%s: %s 지표 없음", stock, metric)
                   continue
                   
               value = fund_df.loc[stock, metric]
@@ -234,7 +278,7 @@ class BackTestService:
           else:
               # 첫 번째 종목의 실패 사유를 자세히 출력
               if len(screening_results) <= 3:
-                  print(f"❌ {stock} 탈락: {stock_results}")
+                  logger.debug("%s 탈락: %s", stock, stock_results)
       
       rejection_reasons = {}
       for stock, result in screening_results.items():
@@ -248,6 +292,7 @@ class BackTestService:
       
       return selected_stocks, screening_results, rejection_reasons
 
+  @traced('backtest.portfolio')
   def _calculate_factor_scores_and_portfolio(self, fund_df : pd.DataFrame, selected_stocks : list[str], top_n=10):
       if len(selected_stocks) == 0:
           logger.info(" 스크리닝 통과 종목이 없습니다.")
@@ -318,13 +363,13 @@ class BackTestService:
       
       return top_stocks
   
+  @traced('backtest.monthly_returns', attributes=lambda self, stock_data, portfolio_stocks, start_date, end_date: {
+    'start_date': start_date, 'end_date': end_date, 'stocks': len(portfolio_stocks)})
   def _calculate_monthly_returns(self, stock_data : pd.DataFrame, portfolio_stocks : dict, start_date : str, end_date : str):
       price_data = stock_data[stock_data['구분'] == 'closingPrice'].set_index('종목명')
       
-      print(f"💰 월별 수익률 계산 ({start_date} → {end_date}):")
-      print(f"   - 포트폴리오 종목: {list(portfolio_stocks.keys())}")
-      print(f"   - 가격 데이터 shape: {price_data.shape}")
-      print(f"   - 가격 데이터 종목: {price_data.index.tolist()}")
+      logger.debug("월별 수익률 계산 (%s → %s): 포트폴리오 %s, 가격 데이터 %d개 종목",
+                   start_date, end_date, list(portfolio_stocks), len(price_data))
       
       portfolio_return = 0
       stock_returns = {}
@@ -334,21 +379,21 @@ class BackTestService:
           try:
               # 종목이 가격 데이터에 있는지 확인
               if stock not in price_data.index:
-                  print(f"❌ {stock}: 가격 데이터에 종목 없음")
+                  logger.debug("%s: 가격 데이터에 종목 없음", stock)
                   continue
               
               # 날짜 컬럼이 있는지 확인
               if start_date not in price_data.columns or end_date not in price_data.columns:
-                  print(f"❌ {stock}: 날짜 컬럼 없음 (시작:{start_date in price_data.columns}, 종료:{end_date in price_data.columns})")
+                  logger.debug("%s: 날짜 컬럼 없음 (시작:%s, 종료:%s)", stock,
+                               start_date in price_data.columns, end_date in price_data.columns)
                   continue
               
               start_price = price_data.loc[stock, start_date]
               end_price = price_data.loc[stock, end_date]
               
-              print(f"📈 {stock}: {start_price} → {end_price} (비중: {weight:.1%})")
               
               if pd.isna(start_price) or pd.isna(end_price) or start_price <= 0:
-                  print(f"❌ {stock}: 가격 데이터 없음 (시작:{start_price}, 종료:{end_price})")
+                  logger.debug("%s: 가격 데이터 없음 (시작:%s, 종료:%s)", stock, start_price, end_price)
                   continue
               
               stock_return = (end_price - start_price) / start_price * 100
@@ -358,10 +403,11 @@ class BackTestService:
               portfolio_return += contribution
               valid_stocks += 1
               
-              print(f"✅ {stock}: 수익률 {stock_return:+.2f}%, 기여도 {contribution:+.2f}%")
+              logger.debug("%s: %s → %s (비중 %.1f%%), 수익률 %+.2f%%, 기여도 %+.2f%%",
+                           stock, start_price, end_price, weight * 100, stock_return, contribution)
               
           except Exception as e:
-              print(f"❌ {stock}: 상세 오류 - {type(e).__name__}: {e}")
+              logger.warning("%s: 수익률 계산 오류 - %s: %s", stock, type(e).__name__, e)
               continue
       
       # 결과 정리
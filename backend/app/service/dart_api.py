@@ -4,24 +4,36 @@ import requests
 import zipfile
 import io
 import xml.etree.ElementTree as ET
+import numpy as np
 import pandas as pd
 from typing import List
 from datetime import datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from contextlib import closing
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 import time
 
 from app.core.config import settings
+from app.core import workqueue
+from app.core.cache import cached
+from app.core.metrics import STAGE_LATENCY, STAGE_ROWS, Level, outbound_call, registry
+from app.core.tracing import bind, traced
 from app.schemas.financial import QuarterCode
 from app.schemas.stock import StockCmpData
+from app.service.frames import to_frame
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 
+# 조회를 요청했지만 아직 결과를 받지 못한 기업 수
+_pending_statements = Level()
+registry.gauge('quantus_dart_statements_pending', 'DART 재무제표 조회 대기 기업 수', callback=lambda: _pending_statements.value)
+
 class DartApi:
   _instance = None
+  CORP_CODE_TTL_SECONDS = 24 * 60 * 60
   
   def __new__(cls):
     if cls._instance is None:
@@ -38,11 +50,11 @@ class DartApi:
 
   def filter_by_cnt(self, data :List[StockCmpData], analysis_cnt :int):
      try:
-         if not data:
+         if data is None or len(data) == 0:
              logger.warning("입력 데이터가 비어있습니다.")
              return pd.DataFrame()
          
-         selected_data = pd.DataFrame([stock.model_dump() for stock in data])
+         selected_data = to_frame(data)
          
          selected_data['score'] = selected_data['annual_return']
          
@@ -90,13 +102,75 @@ class DartApi:
          raise HTTPException(status_code=500, detail="데이터 샘플링 중 오류가 발생했습니다.")
 
   def get_corp_statement(self, data :pd.DataFrame, start_date :str, end_date :str):
+    if workqueue.distributes(len(data)):
+        # 기업 목록을 샤드로 나눠 워커(python -m app.worker)에 맡기고 샤드 순서대로 모은다
+        payloads = [(data.iloc[start:end], start_date, end_date) for start, end in workqueue.shard_bounds(len(data))]
+        statement_results = [statement for shard in workqueue.run_sharded('corp_statement', payloads) for statement in shard]
+    else:
+        statement_results = list(self.iter_corp_statement(data, start_date, end_date))
+
+    if not statement_results:
+        logger.error("모든 기업의 공시 정보가 없습니다")
+        raise HTTPException(status_code=404, detail="공시된 정보가 없습니다")
+        
+    logger.info("최종 처리된 회사 수: %d", len(statement_results))
+    return statement_results
+
+  def iter_corp_statement(self, data :pd.DataFrame, start_date :str, end_date :str):
+    """기업별 재무제표 조회가 끝나는 순서대로 결과를 하나씩 반환한다."""
+    # 소비자가 중간에 멈추면(스트리밍 연결 끊김) 안쪽 제너레이터도 바로 닫아 남은 조회를 취소한다
+    with closing(self._iter_statements(data, start_date, end_date)) as statements:
+        for _, statement in statements:
+            yield statement
+
+  def statement_shard(self, data :pd.DataFrame, start_date :str, end_date :str):
+    """샤드 하나의 기업별 재무제표를 입력 순서대로 돌려준다 (워커에서 실행)."""
+    with closing(self._iter_statements(data, start_date, end_date)) as statements:
+        return [statement for _, statement in sorted(statements, key=lambda item: item[0])]
+
+  def _iter_statements(self, data :pd.DataFrame, start_date :str, end_date :str):
+    """(입력 위치, 재무제표)를 조회가 끝나는 순서대로 반환한다. 공시가 없는 기업은 건너뛴다."""
     selected_data = pd.merge(data, self._get_corp_code(), left_on='stockCode', right_on='stock_code', how='left')
+    quarter_info = self._build_quarter_info(start_date, end_date)
     
+    started = time.perf_counter()
+    futures, consumed, yielded = {}, 0, 0
+    executor = ThreadPoolExecutor(max_workers=5)
+    try:
+        futures = {
+            executor.submit(
+                bind(self._background_task), 
+                row['corp_code'], 
+                row['corp_name'], 
+                quarter_info
+            ): position
+            for position, (_, row) in enumerate(selected_data.iterrows())
+        }
+        _pending_statements.add(len(futures))
+        
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing"):
+            consumed += 1
+            _pending_statements.add(-1)
+            corp_name, df = future.result()
+            statement = self._build_statement_result(corp_name, df, quarter_info)
+            if statement is not None:
+                yielded += 1
+                yield futures[future], statement
+    finally:
+        # 스트리밍 중 클라이언트 연결이 끊기거나 조회가 실패하면 남은 조회는 취소한다
+        executor.shutdown(wait=True, cancel_futures=True)
+        # 끝까지 받지 못한 (취소/오류) 조회는 대기 수에서 뺀다
+        _pending_statements.add(consumed - len(futures))
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage='dart_statements')
+        STAGE_ROWS.inc(yielded, stage='dart_statements')
+
+  def _build_quarter_info(self, start_date :str, end_date :str):
     quarters = [QuarterCode.Q1, QuarterCode.Q2, QuarterCode.Q3, QuarterCode.Q4]
     start_year, start_quarter = self._find_last_quarter(start_date)
     end_year, end_quarter = self._find_last_quarter(end_date)
     
-    logger.info(f"재무제표 조회 시작 - 시작일: {start_date}({start_year}년 {start_quarter}분기), 종료일: {end_date}({end_year}년 {end_quarter}분기)")
+    logger.info("재무제표 조회 시작 - 시작일: %s(%s년 %s분기), 종료일: %s(%s년 %s분기)",
+                start_date, start_year, start_quarter, end_date, end_year, end_quarter)
     
     quarter_info = []
     current_year = start_year
@@ -129,101 +203,74 @@ class DartApi:
         else:
             current_quarter = quarters[quarter_idx + 1]
     
-    logger.info(f"조회할 분기 정보: {quarter_info}")
-    
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [
-            executor.submit(
-                self._background_task, 
-                row['corp_code'], 
-                row['corp_name'], 
-                quarter_info
-            ) 
-            for _, row in selected_data.iterrows()
-        ]
-        
-        results = []
-        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing"):
-            results.append(future.result())
-
-    statement_results = []
-    for corp_name, df in results:
-        if corp_name is None or df is None:
-            continue
-        if df is not None and not df.empty:
-            logger.info(f"{corp_name} 데이터 처리 시작")
-            
-            financial_data_list = []
-            
-            quarter_values = {info['period']: [] for info in quarter_info}
-            
-            for _, row in df.iterrows():
-                for info in quarter_info:
-                    period = info['period']
-                    if period in row.index:
-                        value = row[period]
-                        if pd.notna(value) and value != 'N/A':
-                            try:
-                                value = float(value)
-                                if value != 0:  
-                                    quarter_values[period].append(value)
-                            except (ValueError, TypeError):
-                                continue
-            
-            valid_quarters = {period: True for period, values in quarter_values.items() if values}
-            
-            for _, row in df.iterrows():
-                try:
-                    quarters = {}
-                    for info in quarter_info:
-                        period = info['period']
-                        if period in valid_quarters:
-                            if period in row.index:
-                                value = row[period]
-                                quarters[period] = None if pd.isna(value) or value == 'N/A' else float(value)
-                    
-                    if quarters: 
-                        find_value = row.get("find")
-                        if isinstance(find_value, bool):
-                            find_value = "O" if find_value else "X"
-                        elif find_value not in ["O", "X"]:
-                            find_value = "O" 
-                        
-                        financial_data = {
-                            "category": row["category"],
-                            "subject": row["subject"],
-                            "find": find_value,
-                            "quarters": quarters
-                        }
-                        financial_data_list.append(financial_data)
-                except Exception as e:
-                    logger.error(f"데이터 처리 중 오류 발생: {str(e)}")
-                    logger.error(f"문제가 발생한 데이터: {row.to_dict()}")
-                    continue
-            
-            if financial_data_list:
-                statement_results.append({
-                    "corp_name": corp_name,
-                    "data": financial_data_list
-                })
-                logger.info(f"{corp_name}: {len(financial_data_list)}개 항목 처리 완료")
-            else:
-                logger.warning(f"{corp_name}: 처리된 데이터가 없습니다")
-    
-    if not statement_results:
-        logger.error("모든 기업의 공시 정보가 없습니다")
-        raise HTTPException(status_code=404, detail="공시된 정보가 없습니다")
-        
-    logger.info(f"최종 처리된 회사 수: {len(statement_results)}")
-    return statement_results
+    logger.info("조회할 분기 정보: %s", quarter_info)
+    return quarter_info
+
+  def _build_statement_result(self, corp_name, df :pd.DataFrame, quarter_info :list):
+    if corp_name is None or df is None or df.empty:
+        return None
+
+    logger.debug("%s 데이터 처리 시작", corp_name)
+
+    periods = [info['period'] for info in quarter_info if info['period'] in df.columns]
+    # 분기 컬럼을 한 번에 float으로 변환 ('N/A' 및 변환 불가 값은 NaN)
+    values = df[periods].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    find = df['find'] if 'find' in df.columns else [None] * len(df)
+
+    return self.build_statement_records(corp_name, df['category'], df['subject'], find, values, periods)
+
+  def build_statement_records(self, corp_name, categories, subjects, finds, values :np.ndarray, periods :list):
+    """(계정 수 x 분기 수) 형태의 값 배열에서 StatementResult 구조를 만든다."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim != 2 or values.shape[1] != len(periods):
+        raise ValueError(f"재무제표 배열 형태가 올바르지 않습니다: {values.shape}, 분기 수: {len(periods)}")
+
+    # 0이 아닌 값이 하나라도 있는 분기만 사용
+    valid = (np.nan_to_num(values) != 0).any(axis=0)
+    if not valid.any():
+        logger.warning(f"{corp_name}: 처리된 데이터가 없습니다")
+        return None
+
+    valid_periods = [period for period, ok in zip(periods, valid) if ok]
+    valid_values = values[:, valid]
+    cells = valid_values.astype(object)
+    cells[np.isnan(valid_values)] = None
+
+    financial_data_list = [
+        {
+            "category": category,
+            "subject": subject,
+            "find": self._normalize_find(find_value),
+            "quarters": dict(zip(valid_periods, row))
+        }
+        for category, subject, find_value, row in zip(categories, subjects, finds, cells.tolist())
+    ]
+
+    logger.debug("%s: %d개 항목 처리 완료", corp_name, len(financial_data_list))
+    return {
+        "corp_name": corp_name,
+        "data": financial_data_list
+    }
+
+  def _normalize_find(self, find_value):
+    if isinstance(find_value, (bool, np.bool_)):
+        return "O" if find_value else "X"
+    if find_value not in ["O", "X"]:
+        return "O"
+    return find_value
 
   def _get_corp_code(self):
-    try:
-      if self.corp_code is not None:
-        return self.corp_code
+    if self.corp_code is None:
+      self.corp_code = self._fetch_corp_code()
+    return self.corp_code
 
+  @cached('dart_corp_code', ttl=CORP_CODE_TTL_SECONDS, key=lambda self: ())
+  def _fetch_corp_code(self):
+    try:
       url = f"{self.base_url}/corpCode.xml"
-      response = requests.get(url, params=self.params)
+      with outbound_call('dart', 'corpCode.xml') as call:
+        response = requests.get(url, params=self.params)
+        call['status'] = response.status_code
       
       if response.status_code != 200:
         logger.error(f"DART API 호출 실패: status_code={response.status_code}")
@@ -257,8 +304,7 @@ class DartApi:
         logger.warning("회사 코드 데이터가 비어있습니다.")
         raise HTTPException(status_code=500, detail="회사 코드 데이터를 찾을 수 없습니다.")
 
-      self.corp_code = pd.DataFrame(data)
-      return self.corp_code
+      return pd.DataFrame(data)
       
     except requests.RequestException as e:
       logger.error(f"네트워크 오류: {str(e)}")
@@ -270,22 +316,11 @@ class DartApi:
   def _get_corp_financial(self, corp_code :str, quarter_info :list):
     quarter_data = {}
     for info in quarter_info:
-      logger.info(f"분기 데이터 조회 시작 - 기업: {corp_code}, 연도: {info['year']}, 분기: {info['quarter']}, 보고서코드: {info['report_code']}")
-      response = self._api_call(corp_code, str(info['year']), info['report_code'])
-      
-      if response.status_code == 200:
-        data, disclosure_date = self._get_one_quarter(response)
-        quarter_data[info['period']] = {
-          "data": data,
-          "disclosure_date": disclosure_date if disclosure_date else 'N/A'
-        }
-        logger.info(f"분기 데이터 조회 성공 - 기간: {info['period']}, 공시일자: {disclosure_date}")
-      else:
-        logger.warning(f"분기 데이터 조회 실패 - {info['period']}: status_code={response.status_code}")
-        quarter_data[info['period']] = {
-          "data": {},
-          "disclosure_date": 'N/A'
-        }
+      data, disclosure_date = self._get_quarter(corp_code, str(info['year']), info['report_code'])
+      quarter_data[info['period']] = {
+        "data": data,
+        "disclosure_date": disclosure_date if disclosure_date else 'N/A'
+      }
     
     results = []
     
@@ -321,9 +356,24 @@ class DartApi:
       
       result_df = pd.DataFrame(results)
     
-    logger.info(f"재무제표 데이터 처리 완료 - 결과 행 수: {len(result_df)}")
+    logger.debug("재무제표 데이터 처리 완료 - 결과 행 수: %d", len(result_df))
     return result_df
 
+  # 공시된 분기만 캐시 (아직 공시 전이거나 실패한 분기는 나중에 다시 조회해야 함)
+  @cached('dart_quarter', key=lambda self, corp_code, bsns_year, reprt_code: (corp_code, bsns_year, reprt_code),
+          should_cache=lambda result, *args: bool(result[0]))
+  def _get_quarter(self, corp_code :str, bsns_year :str, reprt_code :str):
+    logger.debug("분기 데이터 조회 시작 - 기업: %s, 연도: %s, 보고서코드: %s", corp_code, bsns_year, reprt_code)
+    response = self._api_call(corp_code, bsns_year, reprt_code)
+
+    if response.status_code != 200:
+      logger.warning("분기 데이터 조회 실패 - %s %s/%s: status_code=%s", corp_code, bsns_year, reprt_code, response.status_code)
+      return {}, None
+
+    data, disclosure_date = self._get_one_quarter(response)
+    logger.debug("분기 데이터 조회 성공 - %s %s/%s, 공시일자: %s", corp_code, bsns_year, reprt_code, disclosure_date)
+    return data, disclosure_date
+
   def _api_call(self, corp_code :str, bsns_year :str, reprt_code :str):
     url = f"{self.base_url}/fnlttSinglAcntAll.json"
     params = {
@@ -335,7 +385,10 @@ class DartApi:
     }
     try:
       # logger.info(f"DART API 호출 시작 - URL: {url}, Parameters: {params}")
-      response = requests.get(url, params=params)
+      with outbound_call('dart', 'fnlttSinglAcntAll.json', corp_code=corp_code,
+                         quarter=f"{bsns_year}/{reprt_code}") as call:
+        response = requests.get(url, params=params)
+        call['status'] = response.status_code
       # logger.info(f"DART API 응답 - Status: {response.status_code}, Response: {response.text[:1000]}")  # 응답이 너무 길 수 있으므로 앞부분만 로깅
       return response
     except requests.RequestException as e:
@@ -476,6 +529,8 @@ class DartApi:
       session.mount("https://", adapter)
       return session
   
+  @traced('dart.company', attributes=lambda self, corp_code, corp_name, quarter_info, max_retries=3: {
+    'corp_code': corp_code, 'corp_name': str(corp_name), 'quarters': len(quarter_info)})
   def _background_task(self, corp_code, corp_name, quarter_info, max_retries=3):
     if pd.isna(corp_name) or corp_name == 'nan':
         logger.warning(f"유효하지 않은 회사명이 입력되었습니다: {corp_name}")
@@ -491,8 +546,8 @@ class DartApi:
                 Exception) as e:
             if attempt < max_retries - 1:
                 wait_time = (2 ** attempt) * 0.5  # 지수 백오프
-                print(f"재시도 {attempt + 1}/{max_retries} for {corp_name}, 대기: {wait_time}초")
+                logger.warning("재시도 %d/%d for %s, 대기: %s초", attempt + 1, max_retries, corp_name, wait_time)
                 time.sleep(wait_time)
             else:
-                print(f"최종 실패: {corp_name} - {str(e)}")
+                logger.error("최종 실패: %s - %s", corp_name, e)
                 return None, None
\ No newline at end of file
@@ -0,0 +1,11 @@
+import pandas as pd
+
+
+def to_frame(data) -> pd.DataFrame:
+    """요청 모델 목록 또는 저장된 artifact DataFrame을 새 DataFrame으로 만든다.
+
+    artifact DataFrame은 여러 요청이 공유하므로 복사본을 돌려준다.
+    """
+    if isinstance(data, pd.DataFrame):
+        return data.copy()
+    return pd.DataFrame([stock.model_dump() for stock in data])
@@ -1,5 +1,5 @@
 import numpy as np
-from fastapi.logger import logger
+import logging
 
 import pandas as pd
 from datetime import datetime, timedelta
@@ -7,14 +7,33 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from typing import List, Dict, Any
 import re
+import os
 import asyncio
 
 from app.service.krx_api import KrxApi
+from app.core import workqueue
+from app.core import cache
+from app.core.cache import cached, fingerprint
+from app.core.metrics import timed_stage
+from app.core.runtime import submit_cpu
+from app.core.tracing import bind, traced
 from app.schemas.stock import StockCmpData
 from app.schemas.invest_idx import RatioRow
+from app.service.frames import to_frame
+
+logger = logging.getLogger(__name__)
+
+
+def _ratio_panel_key(self, data, financial_statements, max_workers: int = 5) -> tuple:
+    # 재무제표는 조회가 끝나는 순서로 모이므로 기업명 순으로 정렬해 키를 만든다 (결과는 data 순서만 따른다)
+    statements = sorted(financial_statements, key=lambda statement: str(statement.get('corp_name')))
+    return (fingerprint(data), fingerprint(statements))
+
 
 class InvestIdxService:
     krx_api = KrxApi()
+    # 연도별 종가 패널 (stockCode, stockName + YYYYMMDD 컬럼). 장 마감 후 사전 수집(app.service.prefetch)이 이어 쓴다
+    STOCK_FILE_PATTERN = "data/stock_data_{year}.csv"
 
     def __init__(self):
         pass
@@ -140,8 +159,7 @@ class InvestIdxService:
             if all_data.empty:
                 all_data = temp_data
             else:
-                logger.info(f"all_data columns: {all_data.columns.tolist()}")
-                logger.info(f"temp_data columns: {temp_data.columns.tolist()}")
+                logger.debug("all_data columns: %s, temp_data columns: %s", list(all_data.columns), list(temp_data.columns))
                 # 빈 데이터프레임이 아닐 때만 merge 수행
                 if not temp_data.empty and 'stockCode' in temp_data.columns:
                     all_data = pd.merge(all_data, temp_data, on=['stockCode', 'stockName'], how='outer')
@@ -153,56 +171,162 @@ class InvestIdxService:
             logger.error(f"데이터 저장 중 오류 발생: {str(e)}")
             return pd.DataFrame()
 
+    @traced('invest_idx.candidates_range_info')
     def get_candidates_range_info(self, data: List[StockCmpData], stock_range_info: pd.DataFrame):
         
-        candidates_data = pd.DataFrame([stock.model_dump() for stock in data])
+        candidates_data = to_frame(data)
         candidates_range_info = pd.merge(candidates_data, stock_range_info, on=['stockCode', 'stockName'], how='inner')
         
         return candidates_range_info
 
+    # 캐시가 바깥이라 uncached(프로세스 풀 자식에서 쓰는 경로)에도 단계 측정이 남는다
+    @cached('ratio_panel', key=_ratio_panel_key, should_cache=lambda result, *args, **kwargs: not result.empty)
+    @timed_stage('ratio_panel')
     def create_company_analysis_dataframe(self, data, financial_statements, max_workers:int=5):
         try:
-            logger.info(f"데이터 입력 - 기업 수: {len(data)}, 재무제표 수: {len(financial_statements)}")
+            logger.info("데이터 입력 - 기업 수: %d, 재무제표 수: %d", len(data), len(financial_statements))
             
             financial_dict = self.filter_zero_accounts(financial_statements)
-            logger.info(f"재무제표 필터링 후 기업 수: {len(financial_dict)}")
-            
-            all_analysis_rows = []
-            
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = []
-                for idx, row in data.iterrows():
-                    future = executor.submit(self._process_company_analysis, row, financial_dict)
-                    futures.append(future)
-                
-                for future in tqdm(futures, desc="기업별 분석 데이터 생성"):
-                    company_rows = future.result()
-                    if not company_rows:  # 빈 결과 체크
-                        logger.warning(f"기업 분석 결과 없음: {row.get('stockName', 'Unknown')}")
-                    all_analysis_rows.extend(company_rows)
-            
-            logger.info(f"전체 분석 행 수: {len(all_analysis_rows)}")
+            logger.info("재무제표 필터링 후 기업 수: %d", len(financial_dict))
             
-            analysis_df = pd.DataFrame(all_analysis_rows)
-            
-            if not analysis_df.empty:
-                date_cols = [col for col in analysis_df.columns if re.match(r'^202\d{5}$', str(col))]
-                date_cols.sort()
-                
-                column_order = ['corp_name', 'type'] + date_cols
-                analysis_df = analysis_df[column_order]
-                logger.info(f"최종 데이터프레임 크기: {analysis_df.shape}")
+            if workqueue.distributes(len(data)):
+                # 샤드마다 해당 기업의 재무제표만 실어 워커에 맡기고, 샤드 순서대로 이어 붙인다
+                payloads = []
+                for start, end in workqueue.shard_bounds(len(data)):
+                    shard = data.iloc[start:end]
+                    shard_financials = {name: financial_dict[name] for name in shard['stockName'] if name in financial_dict}
+                    payloads.append((shard, shard_financials))
+                all_analysis_rows, empty_count = [], 0
+                for shard_rows, shard_empty in workqueue.run_sharded('ratio_rows', payloads):
+                    all_analysis_rows.extend(shard_rows)
+                    empty_count += shard_empty
             else:
-                logger.warning("최종 데이터프레임이 비어있습니다.")
+                all_analysis_rows, empty_count = self.analysis_rows(data, financial_dict, max_workers)
             
-            return analysis_df
+            # 기업마다 경고를 남기면 전 종목 실행 시 로그가 폭증하므로 개수만 남긴다
+            if empty_count:
+                logger.warning(f"분석 결과가 없는 기업 수: {empty_count}/{len(data)}")
+            return self._analysis_frame(all_analysis_rows)
+        except workqueue.ShardJobError:
+            # 워커 쪽 실패는 빈 결과로 숨기지 않고 요청 실패로 올린다
+            raise
         except Exception as e:
             logger.error(f"데이터프레임 생성 중 오류 발생: {str(e)}")
             return pd.DataFrame()
 
-    def analysis_invest_idx(self, data: List[RatioRow]) -> Dict[str, Any]:
-        analysis_df = pd.DataFrame([row.model_dump() for row in data])
+    # 스트리밍 투자지표 생성에서 CPU 실행기에 한 번에 맡기는 기업 수
+    STREAM_BATCH_SIZE = 16
+
+    @timed_stage('ratio_panel_stream')
+    def stream_company_analysis_dataframe(self, range_info_future, statements) -> pd.DataFrame:
+        """재무제표가 도착하는 대로 기업을 모아 CPU 실행기에 분석 행 계산을 맡기고, 끝나면 range_info 순서대로 합친다.
+
+        range_info_future는 주가 패널을 읽고 있는 Future로, 첫 재무제표가 도착했을 때 기다린다.
+        결과는 같은 입력의 create_company_analysis_dataframe과 같으므로 같은 ratio_panel 캐시 키를 보고 채운다.
+        """
+        from app.service import tasks
+
+        range_info = None
+        positions_by_name: Dict[str, List[int]] = {}
+        pending_positions: List[int] = []
+        pending_financials: Dict[str, Any] = {}
+        batches = []
+        received = []
+
+        def submit_batch():
+            batches.append((list(pending_positions), submit_cpu(tasks.company_analysis_rows,
+                                                                range_info.iloc[pending_positions], dict(pending_financials))))
+            pending_positions.clear()
+            pending_financials.clear()
+
+        for statement in statements:
+            received.append(statement)
+            if range_info is None:
+                range_info = range_info_future.result()
+                for position, name in enumerate(range_info['stockName']):
+                    positions_by_name.setdefault(name, []).append(position)
+            financial_dict = self.filter_zero_accounts([statement])
+            positions = positions_by_name.get(statement['corp_name'], [])
+            if not financial_dict or not positions:
+                continue
+            pending_positions.extend(positions)
+            pending_financials.update(financial_dict)
+            if len(pending_positions) >= self.STREAM_BATCH_SIZE:
+                submit_batch()
+
+        if range_info is None:
+            range_info = range_info_future.result()
+        if pending_positions:
+            submit_batch()
+
+        # 재무제표가 다 모인 뒤에야 키가 정해진다. 이미 같은 입력의 패널이 있으면 남은 계산을 취소하고 그것을 쓴다
+        wrapper = InvestIdxService.create_company_analysis_dataframe
+        key = wrapper.cache_key(self, range_info, received)
+        backend = cache.shared_cache
+        cached_frame = backend.get(key)
+        backend.record(key, hit=cached_frame is not None)
+        if cached_frame is not None:
+            for _, future in batches:
+                future.cancel()
+            return cached_frame
+
+        rows_by_position: Dict[int, list] = {}
+        for positions, future in batches:
+            rows_by_position.update(zip(positions, future.result()))
+
+        logger.info("데이터 입력 - 기업 수: %d, 재무제표 수: %d", len(range_info), len(received))
+        empty_count = len(range_info) - sum(1 for rows in rows_by_position.values() if rows)
+        if empty_count:
+            logger.warning(f"분석 결과가 없는 기업 수: {empty_count}/{len(range_info)}")
+        analysis_df = self._analysis_frame([row for position in sorted(rows_by_position) for row in rows_by_position[position]])
+        if not analysis_df.empty:
+            backend.set(key, analysis_df, wrapper.cache_ttl)
+        return analysis_df
+
+    def _analysis_frame(self, all_analysis_rows) -> pd.DataFrame:
+        logger.info("전체 분석 행 수: %d", len(all_analysis_rows))
+        
+        analysis_df = pd.DataFrame(all_analysis_rows)
+        
+        if not analysis_df.empty:
+            date_cols = [col for col in analysis_df.columns if re.match(r'^202\d{5}$', str(col))]
+            date_cols.sort()
+            
+            column_order = ['corp_name', 'type'] + date_cols
+            analysis_df = analysis_df[column_order]
+            logger.info("최종 데이터프레임 크기: %s", analysis_df.shape)
+        else:
+            logger.warning("최종 데이터프레임이 비어있습니다.")
         
+        return analysis_df
+
+    def analysis_rows(self, data, financial_dict, max_workers:int=5):
+        """기업별 분석 행을 입력 순서대로 만들고, 분석 결과가 없는 기업 수와 함께 돌려준다."""
+        all_analysis_rows = []
+        empty_count = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for idx, row in data.iterrows():
+                future = executor.submit(bind(self._process_company_analysis), row, financial_dict)
+                futures.append(future)
+            
+            for future in tqdm(futures, desc="기업별 분석 데이터 생성"):
+                company_rows = future.result()
+                if not company_rows:  # 빈 결과 체크
+                    empty_count += 1
+                all_analysis_rows.extend(company_rows)
+        return all_analysis_rows, empty_count
+
+    def analysis_invest_idx(self, data) -> Dict[str, Any]:
+        if isinstance(data, pd.DataFrame):
+            analysis_df = data
+        else:
+            analysis_df = pd.DataFrame([row.model_dump() for row in data])
+        return self._analysis_invest_idx(analysis_df)
+
+    @cached('idx_analysis')
+    @traced('invest_idx.analysis')
+    def _analysis_invest_idx(self, analysis_df: pd.DataFrame) -> Dict[str, Any]:
         metrics = ['PER', 'PBR', 'ROE', 'ROA', '영업이익률', '부채비율']
         
         result = {
@@ -218,8 +342,30 @@ class InvestIdxService:
         return result
 
     def get_stock_file(self, start_date: str):
-        fileName = f"stock_data_{start_date[:4]}.csv"
-        return pd.read_csv(f"data/{fileName}")
+        return self._read_stock_file(self.STOCK_FILE_PATTERN.format(year=start_date[:4]))
+
+    def get_stock_files(self, start_date: str, end_date: str):
+        """start_date 연도부터 end_date 연도까지의 주가 패널을 종목코드 기준으로 이어 붙인다.
+
+        아직 만들어지지 않은 이후 연도 파일은 건너뛴다 (그 기간의 종료일은 패널 밖으로 남는다).
+        """
+        panel = self.get_stock_file(start_date)
+        for year in range(int(start_date[:4]) + 1, int(end_date[:4]) + 1):
+            try:
+                year_panel = self.get_stock_file(f"{year}0101")
+            except FileNotFoundError:
+                logger.warning(f"{year}년 주가 패널이 없어 {year - 1}년까지만 사용합니다.")
+                break
+            date_cols = [col for col in year_panel.columns if str(col).isdigit() and col not in panel.columns]
+            panel = panel.merge(year_panel.drop_duplicates(subset='stockCode')[['stockCode'] + date_cols],
+                                on='stockCode', how='left')
+        return panel
+
+    # 파일이 바뀌면 키도 바뀌도록 수정 시각을 키에 포함
+    @timed_stage('price_panel')
+    @cached('price_panel', key=lambda self, path: (os.path.abspath(path), os.path.getmtime(path)))
+    def _read_stock_file(self, path: str):
+        return pd.read_csv(path, dtype={'stockCode': str})
 
     def _get_account_value_by_name(self, financial_data, account_name, quarter_column):    
         account_data = next((item for item in financial_data if item['subject'] == account_name), None)
@@ -269,7 +415,7 @@ class InvestIdxService:
             revenue_raw = self._get_account_value_by_name(financial_data, '매출액', quarter)
             operating_income_raw = self._get_account_value_by_name(financial_data, '영업이익', quarter)
             
-            logger.info(f"net_income_raw: {net_income_raw}, factor: {factor}")
+            logger.debug("net_income_raw: %s, factor: %s", net_income_raw, factor)
             
             net_income = net_income_raw * factor
             revenue = revenue_raw * factor
@@ -290,9 +436,10 @@ class InvestIdxService:
             return ratios
             
         except Exception as e:
-            print(f"비율 계산 오류: {e}")
+            logger.warning("비율 계산 오류 (%s): %s", quarter, e)
             return {key: None for key in ['PER', 'PBR', 'ROE', 'ROA', '영업이익률', '부채비율']}
 
+    @traced('invest_idx.company', attributes=lambda self, row_data, financial_dict: {'stock_name': row_data['stockName']})
     def _process_company_analysis(self, row_data, financial_dict):
         try:
             stock_name = row_data['stockName']
@@ -339,7 +486,7 @@ class InvestIdxService:
             return analysis_rows
             
         except Exception as e:
-            print(f"기업 {row_data.get('stockName', 'Unknown')} 처리 오류: {str(e)}")
+            logger.warning("기업 %s 처리 오류: %s", row_data.get('stockName', 'Unknown'), e)
             return []
 
     def _get_stock(self, date: datetime):
@@ -352,6 +499,7 @@ class InvestIdxService:
         logger.warning(f"{basDd} 데이터 수집 실패")
         return None
 
+    @traced('invest_idx.filter_zero_accounts')
     def filter_zero_accounts(self, financial_statements):
         filtered_dict = {}
         
@@ -1,16 +1,42 @@
 from app.core.config import settings
+from app.core.cache import cached
+from app.core.metrics import outbound_call, record_cache, timed_stage
 import requests
-from fastapi.logger import logger
+import logging
 import pandas as pd
 from requests.exceptions import RequestException
 from datetime import datetime, timedelta
+from collections import OrderedDict
+import threading
+import bisect
+
+logger = logging.getLogger(__name__)
 
 class KrxApi:
+    # 과거 일자의 시세 스냅샷은 변하지 않으므로 일자별로 보관한다
+    SNAPSHOT_CACHE_SIZE = 32
+    # 알려진 거래일 (주가 패널의 날짜 컬럼). 모든 인스턴스가 공유하며 warm-up에서 채운다
+    _trading_days = []
+
+    @classmethod
+    def load_trading_calendar(cls, dates):
+        cls._trading_days = sorted(set(cls._trading_days) | {str(d) for d in dates})
+        logger.info("거래일 캘린더 로드: %d일 (%s ~ %s)", len(cls._trading_days), cls._trading_days[0], cls._trading_days[-1])
+
+    def next_known_trading_day(self, date_str: str):
+        """캘린더 범위 안이면 date_str 이후 첫 거래일을, 범위 밖이면 None을 돌려준다."""
+        days = self._trading_days
+        if not days or not (days[0] <= date_str <= days[-1]):
+            return None
+        return days[bisect.bisect_left(days, date_str)]
+
     def __init__(self):
         self.base_url = settings.KRX_API_URL
         self.headers = {
             "AUTH_KEY": settings.KRX_API_KEY
         }
+        self._snapshots = OrderedDict()
+        self._snapshot_lock = threading.Lock()
 
     def get_next_business_day_data(self, start_date: str, max_attempts: int = 10):
         current_date = datetime.strptime(start_date, "%Y%m%d")
@@ -30,10 +56,16 @@ class KrxApi:
                 raise ValueError("다음 영업일 검색 중 미래 날짜에 도달했습니다.")
                 
             date_str = current_date.strftime("%Y%m%d")
+            # 캘린더로 알고 있는 휴장일은 API를 호출하지 않고 건너뛴다
+            trading_day = self.next_known_trading_day(date_str)
+            if trading_day is not None and trading_day != date_str:
+                logger.info("%s은 휴장일이어서 다음 거래일 %s로 건너뜁니다.", date_str, trading_day)
+                current_date = datetime.strptime(trading_day, "%Y%m%d")
+                date_str = trading_day
             stock_data = self.get_stock_list(date_str)
             
             if stock_data is not None and not stock_data.empty:
-                logger.info(f"{date_str} 데이터 조회 성공")
+                logger.info("%s 데이터 조회 성공", date_str)
                 return stock_data, date_str
                 
             current_date += timedelta(days=1)
@@ -41,7 +73,7 @@ class KrxApi:
             if stock_data is None:
                 logger.error(f"{date_str} API 호출 실패")
             else:
-                logger.info(f"{date_str}은 휴장일이어서 다음 날짜 {current_date.strftime('%Y%m%d')}로 시도합니다.")
+                logger.info("%s은 휴장일이어서 다음 날짜 %s로 시도합니다.", date_str, current_date.strftime('%Y%m%d'))
         
         logger.error(f"{max_attempts}회 시도 후에도 유효한 거래일을 찾지 못했습니다.")
         return None, start_date
@@ -53,7 +85,27 @@ class KrxApi:
         
         return stock_data
 
+    @timed_stage('krx_stock_list')
     def get_stock_list(self, basDd: str):
+        with self._snapshot_lock:
+            if basDd in self._snapshots:
+                self._snapshots.move_to_end(basDd)
+                record_cache('krx_snapshot_local', hit=True)
+                return self._snapshots[basDd]
+        record_cache('krx_snapshot_local', hit=False)
+
+        stock_list = self._fetch_stock_list(basDd)
+        if stock_list is not None and basDd < datetime.now().strftime("%Y%m%d"):
+            with self._snapshot_lock:
+                self._snapshots[basDd] = stock_list
+                while len(self._snapshots) > self.SNAPSHOT_CACHE_SIZE:
+                    self._snapshots.popitem(last=False)
+        return stock_list
+
+    # 당일 데이터는 장중에 바뀔 수 있고, 실패(None)는 재시도해야 하므로 캐시하지 않는다
+    @cached('krx_snapshot', key=lambda self, basDd: (basDd,),
+            should_cache=lambda result, self, basDd: result is not None and basDd < datetime.now().strftime("%Y%m%d"))
+    def _fetch_stock_list(self, basDd: str):
         kospi_list = self.get_kospi_list(basDd)
         kosdaq_list = self.get_kosdaq_list(basDd)
         
@@ -67,7 +119,7 @@ class KrxApi:
             kosdaq_list = pd.DataFrame()
             
         if kospi_list.empty and kosdaq_list.empty:
-            logger.info(f"{basDd} 은 휴장일입니다.")
+            logger.info("%s 은 휴장일입니다.", basDd)
             return pd.DataFrame()
             
         return pd.concat([kospi_list, kosdaq_list], ignore_index=True)
@@ -78,7 +130,9 @@ class KrxApi:
             "basDd": basDd
         }
         try:
-            response = requests.get(url, params=params, headers=self.headers)
+            with outbound_call('krx', 'stk_bydd_trd', basDd=basDd) as call:
+                response = requests.get(url, params=params, headers=self.headers)
+                call['status'] = response.status_code
             if response.status_code == 200:
                 data = response.json()
                 parsed_data = self._parse_stock_data(data)
@@ -99,7 +153,9 @@ class KrxApi:
             "basDd": basDd
         }
         try:
-            response = requests.get(url, params=params, headers=self.headers)
+            with outbound_call('krx', 'ksq_bydd_trd', basDd=basDd) as call:
+                response = requests.get(url, params=params, headers=self.headers)
+                call['status'] = response.status_code
             if response.status_code == 200:
                 data = response.json()
                 parsed_data = self._parse_stock_data(data)
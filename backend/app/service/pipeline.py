@@ -0,0 +1,194 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Union
+
+import orjson
+import pandas as pd
+import logging
+
+from app.core import workqueue
+from app.core.artifacts import artifact_store
+from app.core.runtime import call_cpu, call_cpu_cached
+from app.schemas.pipeline import PipelineSpec
+from app.schemas.stock import StockData
+from app.service.krx_api import KrxApi
+from app.service.stock_filter import StockFilterService
+from app.service.dart_api import DartApi
+from app.service.invest_idx import InvestIdxService
+from app.service.back_test import BackTestService
+from app.service import tasks
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineService:
+    """수집 → 필터 → 비교 → 후보 → 재무제표 → 투자지표 → 백테스트를 DAG로 실행한다.
+
+    KRX/DART 조회는 run_io로 실행 중인 스레드에서, 투자지표 생성·분석·백테스트는 CPU 실행기에서 돈다 (call_cpu).
+
+    각 단계 결과는 (단계 이름, 단계 파라미터, 상위 단계 키)의 해시로 메모이즈하므로
+    예를 들어 screening_criteria만 바꾸면 백테스트 단계만 다시 실행된다.
+    """
+    MEMO_SIZE = 64
+
+    def __init__(self):
+        self.krx_api = KrxApi()
+        self.stock_filter_service = StockFilterService()
+        self.dart_api = DartApi()
+        self.invest_idx_service = InvestIdxService()
+        self.backtest_service = BackTestService()
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def run(self, spec: Union[PipelineSpec, dict]) -> Dict[str, Any]:
+        if isinstance(spec, dict):
+            spec = PipelineSpec(**spec)
+
+        stages = {}
+        filters = spec.filters.model_dump()
+
+        stocks = self._stage(stages, 'stocks', {'start_date': spec.start_date, 'filters': filters}, [],
+                             lambda: self._collect(spec))
+        volumes = self._stage(stages, 'volumes', {'filter_type': spec.volume_filter_type}, ['stocks'],
+                              lambda: self.stock_filter_service.apply_volume_filters(stocks, spec.volume_filter_type))
+        cmp_data = self._stage(stages, 'cmp', {'end_date': spec.end_date}, ['volumes'],
+                               lambda: self._compare(volumes, spec.end_date))
+        candidates = self._stage(stages, 'candidates',
+                                 {'candidates_type': spec.candidates_type, 'strategy_type': spec.strategy_type}, ['cmp'],
+                                 lambda: self.stock_filter_service.select_candidates(cmp_data, spec.candidates_type, spec.strategy_type))
+        statements = self._stage(stages, 'statements',
+                                 {'analysis_cnt': spec.analysis_cnt, 'start_date': spec.start_date, 'end_date': spec.end_date}, ['candidates'],
+                                 lambda: self._statements(candidates, spec))
+        ratios = self._stage(stages, 'ratios', {'start_date': spec.start_date}, ['candidates', 'statements'],
+                             lambda: self._ratios(candidates, statements, spec.start_date))
+        analysis = self._stage(stages, 'analysis', {}, ['ratios'],
+                               lambda: call_cpu_cached(self.invest_idx_service._analysis_invest_idx, tasks.analysis_invest_idx, ratios))
+
+        # 메모는 다른 요청이 언제든 밀어낼 수 있으므로 다시 찾지 않고 _stage가 돌려준 값을 그대로 쓴다
+        test_data_stage, test_data = 'ratios', ratios
+        if spec.test_case:
+            test_data_stage = 'test_data'
+            test_data = self._stage(stages, 'test_data',
+                                    {'start_date': spec.start_date, 'end_date': spec.end_date, 'test_case': spec.test_case}, ['volumes'],
+                                    lambda: self.backtest_service.generate_test_data(volumes, spec.start_date, spec.end_date, spec.test_case))
+
+        criteria = self._screening_criteria(spec, analysis['investment_zones'])
+        backtest = self._stage(stages, 'backtest',
+                               {'criteria': criteria, 'top_n': spec.top_n, 'initial_capital': spec.initial_capital},
+                               [test_data_stage],
+                               lambda: call_cpu(tasks.run_monthly_rebalancing_backtest,
+                                                test_data.rename(columns={'corp_name': '종목명', 'type': '구분'}),
+                                                spec.initial_capital, spec.top_n, criteria))
+
+        return {
+            'stages': {name: {k: v for k, v in info.items() if k != 'upstream'} for name, info in stages.items()},
+            'screening_criteria': {metric: list(bounds) for metric, bounds in criteria.items()},
+            'investment_zones': analysis['investment_zones'],
+            'backtest': backtest
+        }
+
+    def _collect(self, spec: PipelineSpec) -> pd.DataFrame:
+        stock_data = self.krx_api.get_stock_list_with_next_day(spec.start_date)
+        filtered = self.stock_filter_service.apply_filters(
+            stock_data,
+            etf=spec.filters.etf_filter,
+            inverse=spec.filters.inverse_filter,
+            sector=spec.filters.sector_filter,
+            preferred=spec.filters.preferred_filter,
+            etc=spec.filters.etc_filter,
+            top_percent=spec.filters.top_percent,
+            bottom_percent=spec.filters.bottom_percent
+        )
+        return filtered.filter(items=list(StockData.model_fields))
+
+    def _compare(self, volumes: pd.DataFrame, end_date: str) -> pd.DataFrame:
+        end_data = self.krx_api.get_stock_list_with_next_day(end_date)
+        cmp_data, _, _ = self.stock_filter_service.calculate_cmp_data(volumes, end_data)
+        return cmp_data
+
+    def _statements(self, candidates: pd.DataFrame, spec: PipelineSpec) -> List[dict]:
+        selected = self.dart_api.filter_by_cnt(candidates, spec.analysis_cnt)
+        return self.dart_api.get_corp_statement(selected, spec.start_date, spec.end_date)
+
+    def _ratios(self, candidates: pd.DataFrame, statements: List[dict], start_date: str) -> pd.DataFrame:
+        stock_range_info = self.invest_idx_service.get_stock_file(start_date)
+        range_info = self.invest_idx_service.get_candidates_range_info(candidates, stock_range_info)
+        if range_info.empty:
+            raise ValueError("후보 종목들의 주가 정보를 찾을 수 없습니다.")
+        if workqueue.distributes(len(range_info)):
+            # 워커에 샤드를 맡길 때는 결과를 기다리기만 한다
+            return self.invest_idx_service.create_company_analysis_dataframe(range_info, statements)
+        return call_cpu_cached(self.invest_idx_service.create_company_analysis_dataframe,
+                               tasks.create_company_analysis_dataframe, range_info, statements)
+
+    def _screening_criteria(self, spec: PipelineSpec, zones: Dict[str, dict]) -> Dict[str, tuple]:
+        if spec.screening_criteria is not None:
+            criteria = spec.screening_criteria.model_dump()
+        else:
+            # README의 '적정 투자지표 설정' 규칙을 투자구간 분석 결과에 적용
+            rules = {
+                'PER': ('lower_bound', 'mean'),
+                'PBR': ('lower_bound', 'mean'),
+                'ROE': ('median', 'upper_bound'),
+                'ROA': ('median', 'upper_bound'),
+                '영업이익률': ('median', 'upper_bound'),
+                '부채비율': (None, 'q3'),
+            }
+            criteria = {}
+            for metric, (low_key, high_key) in rules.items():
+                zone = zones.get(metric, {})
+                low = 0 if low_key is None else zone.get(low_key)
+                high = zone.get(high_key)
+                criteria[metric] = (low, high) if low is not None and high is not None else None
+
+        # 값이 없는 기준은 적용하지 않는다
+        return {metric: tuple(float(bound) for bound in bounds) for metric, bounds in criteria.items() if bounds is not None}
+
+    def _stage(self, stages: dict, name: str, params: dict, upstream: List[str], compute: Callable[[], Any]) -> Any:
+        key = self._stage_key(name, params, [stages[stage]['key'] for stage in upstream])
+
+        with self._memo_lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                self._memo.move_to_end(key)
+
+        if entry is None:
+            started = time.perf_counter()
+            value = compute()
+            entry = {
+                'value': value,
+                'elapsed': time.perf_counter() - started,
+                'artifact_id': artifact_store.put(name, value) if isinstance(value, (pd.DataFrame, list)) else None
+            }
+            with self._memo_lock:
+                self._memo[key] = entry
+                while len(self._memo) > self.MEMO_SIZE:
+                    self._memo.popitem(last=False)
+            cached = False
+            logger.info("파이프라인 단계 실행 - %s: %.2f초", name, entry['elapsed'])
+        else:
+            cached = True
+
+        value = entry['value']
+        stages[name] = {
+            'key': key,
+            'cached': cached,
+            'elapsed': 0.0 if cached else entry['elapsed'],
+            'rows': len(value) if isinstance(value, (pd.DataFrame, list)) else None,
+            'artifact_id': entry['artifact_id']
+        }
+        return value
+
+    def _stage_key(self, name: str, params: dict, upstream_keys: List[str]) -> str:
+        payload = orjson.dumps({'stage': name, 'params': params, 'upstream': upstream_keys},
+                               option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return f"{name}-{hashlib.sha256(payload).hexdigest()[:16]}"
+
+
+pipeline_service = PipelineService()
+
+def run_pipeline(spec: Union[PipelineSpec, dict]) -> Dict[str, Any]:
+    """스크립트/노트북에서 HTTP 없이 전체 파이프라인을 실행하는 진입점."""
+    return pipeline_service.run(spec)
@@ -0,0 +1,261 @@
+"""장 마감 후 / 공시 시즌 사전 수집.
+
+사용자 요청이 KRX/DART 지연을 치르지 않도록, 한가한 시간에 미리 받아 로컬 저장소에 넣어 둔다.
+
+- prices: 매일 PREFETCH_PRICES_AT(KST)에 주가 패널(data/stock_data_{연도}.csv)의 마지막 날짜 이후 거래일 스냅샷을 받아
+  종가 컬럼을 이어 쓰고, 스냅샷은 캐시(krx_snapshot)에 남긴다. 거래일 캘린더도 함께 늘린다.
+- filings: 공시 시즌(PREFETCH_DISCLOSURE_SEASONS)에는 PREFETCH_FILINGS_INTERVAL_MINUTES마다, 그 밖에는 하루 한 번
+  추적 종목의 최근 분기 재무제표 중 캐시(dart_quarter)에 없는 것을 받는다. 최신 분기부터 채운다.
+
+두 작업 모두 서비스별 하루 예산/초당 속도(PREFETCH_*_DAILY_BUDGET, PREFETCH_*_RATE) 안에서만 호출하고,
+주기 작업은 남은 예산을 오늘 남은 실행 횟수로 나눠 써서 호출량이 하루에 고르게 퍼진다.
+"""
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core import cache
+from app.core.config import settings
+from app.core.scheduler import RateBudget, Scheduler, daily_at, now_kst
+from app.service.dart_api import DartApi
+from app.service.invest_idx import InvestIdxService
+from app.service.krx_api import KrxApi
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMN = re.compile(r'^\d{8}$')
+
+
+class PricePrefetcher:
+    """주가 패널의 마지막 날짜 다음 날부터 오늘까지의 거래일 스냅샷을 받아 패널에 이어 쓴다.
+
+    패널이 하나도 없으면 올해 첫날부터 채운다. 예산이 모자라면 남은 날은 다음 실행에서 이어 받는다.
+    """
+
+    def __init__(self, budget: RateBudget, close_at: str):
+        self.budget = budget
+        self.close_at = close_at
+
+    def run(self) -> dict:
+        now = now_kst()
+        today = now.strftime('%Y%m%d')
+        last_day = self._last_stored_day(now.year)
+        start = datetime.strptime(last_day, '%Y%m%d') + timedelta(days=1) if last_day else datetime(now.year, 1, 1)
+        # 장 마감 후 수집 시각 전이면 당일 스냅샷은 아직 확정되지 않았다
+        until = today if now.strftime('%H:%M') >= self.close_at else (now - timedelta(days=1)).strftime('%Y%m%d')
+
+        krx = KrxApi()
+        columns: Dict[str, pd.DataFrame] = {}
+        holidays, stopped = 0, None
+        day = start
+        while day.strftime('%Y%m%d') <= until:
+            basDd = day.strftime('%Y%m%d')
+            day += timedelta(days=1)
+            if datetime.strptime(basDd, '%Y%m%d').weekday() >= 5:
+                continue
+
+            snapshot_key = ('krx_snapshot', basDd)
+            snapshot = cache.shared_cache.get(snapshot_key)
+            if snapshot is None:
+                if not self.budget.acquire(2):  # KOSPI + KOSDAQ
+                    stopped = f"KRX 예산 소진 ({basDd}부터 다음 실행에서)"
+                    break
+                snapshot = krx.get_stock_list(basDd)
+                if snapshot is None:
+                    stopped = f"{basDd} KRX 조회 실패"
+                    break
+                if basDd == today and not snapshot.empty:
+                    # 서비스는 장중 변동 때문에 당일 스냅샷을 캐시하지 않지만, 마감 후 받은 것은 확정값이다
+                    cache.shared_cache.set(snapshot_key, snapshot)
+            if snapshot.empty:
+                holidays += 1
+                continue
+            columns[basDd] = snapshot[['stockCode', 'stockName', 'closingPrice']].rename(columns={'closingPrice': basDd})
+
+        for year in sorted({basDd[:4] for basDd in columns}):
+            self._append(year, {basDd: frame for basDd, frame in columns.items() if basDd[:4] == year})
+        if columns:
+            KrxApi.load_trading_calendar(list(columns))
+        if stopped:
+            logger.warning(f"주가 사전 수집 중단: {stopped}")
+        return {'stored_days': sorted(columns), 'holidays': holidays, 'last_day': max(columns, default=last_day),
+                'stopped': stopped, 'budget': self.budget.snapshot()}
+
+    def _last_stored_day(self, year: int) -> Optional[str]:
+        # 연초에는 올해 패널이 없을 수 있으므로 작년 것까지 본다
+        for target_year in (year, year - 1):
+            path = InvestIdxService.STOCK_FILE_PATTERN.format(year=target_year)
+            if os.path.exists(path):
+                header = pd.read_csv(path, nrows=0).columns
+                days = [column for column in header if DATE_COLUMN.match(column)]
+                if days:
+                    return max(days)
+        return None
+
+    def _append(self, year: str, columns: Dict[str, pd.DataFrame]):
+        path = InvestIdxService.STOCK_FILE_PATTERN.format(year=year)
+        panel = pd.read_csv(path, dtype={'stockCode': str}) if os.path.exists(path) else \
+            pd.DataFrame(columns=['stockCode', 'stockName'])
+        for basDd, frame in sorted(columns.items()):
+            panel = panel.drop(columns=[basDd], errors='ignore')
+            panel = panel.merge(frame[['stockCode', basDd]], on='stockCode', how='outer')
+            # 새로 상장된 종목은 이름이 비어 있으므로 스냅샷의 이름으로 채운다
+            names = frame.set_index('stockCode')['stockName']
+            panel['stockName'] = panel['stockName'].fillna(panel['stockCode'].map(names))
+
+        days = sorted(column for column in panel.columns if DATE_COLUMN.match(str(column)))
+        panel = panel[['stockCode', 'stockName', *days]]
+        # 주가 패널을 읽는 요청이 반쯤 쓰인 파일을 보지 않도록 임시 파일에 쓴 뒤 바꿔치기한다
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        panel.to_csv(temp_path, index=False)
+        os.replace(temp_path, path)
+        logger.info(f"주가 패널 갱신: {path} (+{len(columns)}일, {len(panel)}종목, 마지막 {days[-1]})")
+
+
+class FilingPrefetcher:
+    """추적 종목의 최근 분기 재무제표를 DART에서 받아 dart_quarter 캐시에 넣는다.
+
+    DartApi._get_quarter와 같은 키/값((data, 공시일))으로 저장하므로 사용자 요청은 그대로 캐시에서 읽는다.
+    아직 공시되지 않은 분기(status 013)는 최신 분기만 매 실행 다시 보고, 나머지는 하루에 한 번만 다시 본다.
+    """
+
+    def __init__(self, budget: RateBudget, seasons: str, interval_minutes: int, lookback_days: int,
+                 tracked_file: Optional[str] = None):
+        self.budget = budget
+        self.seasons = self._parse_seasons(seasons)
+        self.interval_seconds = interval_minutes * 60
+        self.lookback_days = lookback_days
+        self.tracked_file = tracked_file
+        self._checked: Dict[Tuple[str, str, str], str] = {}
+        self._cursor = 0
+
+    @staticmethod
+    def _parse_seasons(value: str) -> List[Tuple[str, str]]:
+        seasons = []
+        for item in filter(None, (part.strip() for part in value.split(','))):
+            start, _, end = item.partition('-')
+            if not (re.fullmatch(r'\d{4}', start) and re.fullmatch(r'\d{4}', end)):
+                raise ValueError(f"PREFETCH_DISCLOSURE_SEASONS는 MMDD-MMDD 형식이어야 합니다: {item}")
+            seasons.append((start, end))
+        return seasons
+
+    def in_season(self, now: datetime) -> bool:
+        mmdd = now.strftime('%m%d')
+        return any(start <= mmdd <= end for start, end in self.seasons)
+
+    def next_run(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.interval_seconds if self.in_season(now) else 24 * 60 * 60)
+
+    def run(self) -> dict:
+        if isinstance(cache.shared_cache, cache.NullCache):
+            return {'skipped': 'CACHE_BACKEND=none이면 받아 둘 곳이 없습니다.'}
+
+        now = now_kst()
+        in_season = self.in_season(now)
+        today = now.strftime('%Y%m%d')
+        self._checked = {target: day for target, day in self._checked.items() if day == today}
+        dart = DartApi()
+        tracked = self._tracked(dart)
+        quarters = dart._build_quarter_info((now - timedelta(days=self.lookback_days)).strftime('%Y%m%d'), today)
+        latest = quarters[-1]
+
+        latest_pending, older_pending = [], []
+        cached = 0
+        # 최신 분기부터: 시즌 중에는 막 공시된 보고서를 먼저 채운다
+        for info in reversed(quarters):
+            year, reprt_code = str(info['year']), info['report_code']
+            for corp_code in tracked:
+                target = (corp_code, year, reprt_code)
+                if cache.shared_cache.get(('dart_quarter', *target)) is not None:
+                    cached += 1
+                elif info is latest and in_season:
+                    latest_pending.append(target)
+                elif self._checked.get(target) != today:
+                    older_pending.append(target)
+        # 시즌 중 최신 분기는 매번 다시 보므로, 예산이 모자라도 같은 기업만 보지 않게 시작 위치를 돌린다
+        start = self._cursor % len(latest_pending) if latest_pending else 0
+        pending = latest_pending[start:] + latest_pending[:start] + older_pending
+
+        allowance = self.budget.share(self.interval_seconds if in_season else 24 * 60 * 60)
+        counts = {'stored': 0, 'not_filed': 0, 'failed': 0}
+        stopped = None
+        for target in pending[:allowance]:
+            if not self.budget.acquire():
+                stopped = 'DART 예산 소진'
+                break
+            result = self._fetch(dart, *target)
+            if result == 'quota':
+                self.budget.exhaust()
+                stopped = 'DART 일일 한도 초과 (status 020)'
+                break
+            counts[result] += 1
+            self._checked[target] = today
+        self._cursor = start + min(sum(counts.values()), len(latest_pending))
+
+        if stopped:
+            logger.warning(f"공시 사전 수집 중단: {stopped}")
+        return {'in_season': in_season, 'latest_quarter': latest['period'], 'companies': len(tracked),
+                'cached': cached, 'pending': len(pending), **counts, 'stopped': stopped, 'budget': self.budget.snapshot()}
+
+    def _tracked(self, dart: DartApi) -> List[str]:
+        if self.tracked_file:
+            with open(self.tracked_file, encoding='utf-8') as f:
+                stock_codes = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        else:
+            stock_codes = self._panel_stock_codes()
+        corp_codes = dart._get_corp_code()
+        selected = corp_codes[corp_codes['stock_code'].isin(set(stock_codes))]
+        return selected['corp_code'].tolist()
+
+    def _panel_stock_codes(self) -> List[str]:
+        year = now_kst().year
+        for target_year in (year, year - 1):
+            path = InvestIdxService.STOCK_FILE_PATTERN.format(year=target_year)
+            if os.path.exists(path):
+                return pd.read_csv(path, usecols=['stockCode'], dtype={'stockCode': str})['stockCode'].tolist()
+        logger.warning("추적할 종목을 정할 주가 패널이 없습니다 (PREFETCH_TRACKED_FILE로 지정 가능)")
+        return []
+
+    def _fetch(self, dart: DartApi, corp_code: str, year: str, reprt_code: str) -> str:
+        try:
+            response = dart._api_call(corp_code, year, reprt_code)
+        except Exception as e:
+            logger.warning(f"공시 사전 수집 호출 실패 - {corp_code} {year}/{reprt_code}: {str(e)}")
+            return 'failed'
+        if response.status_code != 200:
+            return 'failed'
+        try:
+            status = response.json().get('status')
+        except ValueError:
+            return 'failed'
+        if status == '020':
+            return 'quota'
+        if status == '013':
+            return 'not_filed'
+        if status != '000':
+            logger.warning(f"공시 사전 수집 응답 오류 - {corp_code} {year}/{reprt_code}: status {status}")
+            return 'failed'
+
+        data, disclosure_date = dart._get_one_quarter(response)
+        if not data:
+            return 'not_filed'
+        # DartApi._get_quarter의 캐시 키/값과 같게 저장한다
+        cache.shared_cache.set(('dart_quarter', corp_code, year, reprt_code), (data, disclosure_date))
+        return 'stored'
+
+
+krx_budget = RateBudget('krx', settings.PREFETCH_KRX_DAILY_BUDGET, settings.PREFETCH_KRX_RATE)
+dart_budget = RateBudget('dart', settings.PREFETCH_DART_DAILY_BUDGET, settings.PREFETCH_DART_RATE)
+prices = PricePrefetcher(krx_budget, settings.PREFETCH_PRICES_AT)
+filings = FilingPrefetcher(dart_budget, settings.PREFETCH_DISCLOSURE_SEASONS, settings.PREFETCH_FILINGS_INTERVAL_MINUTES,
+                           settings.PREFETCH_FILING_LOOKBACK_DAYS, settings.PREFETCH_TRACKED_FILE)
+
+# 같은 호스트의 워커/사이드카 중 하나만 돌도록 공유 캐시 디렉터리에 락을 둔다
+scheduler = Scheduler(os.path.join(settings.CACHE_DIR, 'prefetch.lock') if settings.CACHE_DIR else None)
+scheduler.job('prices', daily_at(settings.PREFETCH_PRICES_AT))(prices.run)
+scheduler.job('filings', filings.next_run)(filings.run)
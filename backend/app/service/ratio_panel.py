@@ -0,0 +1,101 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Union
+
+from app.schemas.invest_idx import RatioPanel, RatioRow
+
+META_COLUMNS = ['corp_name', 'type']
+
+class RatioPanelService:
+    """투자지표 패널(기업 x 지표 x 날짜)을 DataFrame과 전송 포맷 사이에서 변환한다.
+
+    전송 포맷은 날짜 축을 한 번만 보내고 행마다 float 배열을 보내는 columnar JSON과
+    Arrow IPC stream 두 가지를 지원한다.
+    """
+
+    def __init__(self):
+        pass
+
+    def to_frame(self, data: Union[pd.DataFrame, RatioPanel, List[RatioRow]]) -> pd.DataFrame:
+        if isinstance(data, pd.DataFrame):
+            return data
+        if isinstance(data, RatioPanel):
+            return self.from_panel(data)
+        return self.from_rows(data)
+
+    def from_panel(self, panel: RatioPanel) -> pd.DataFrame:
+        if not (len(panel.corp_names) == len(panel.types) == len(panel.values)):
+            raise ValueError("corp_names, types, values의 길이가 일치하지 않습니다.")
+
+        ragged = [index for index, row in enumerate(panel.values) if len(row) != len(panel.dates)]
+        if ragged:
+            raise ValueError(f"values 행의 길이가 dates({len(panel.dates)}개)와 다릅니다: {ragged[:5]}번째 행")
+
+        values = np.array(panel.values, dtype=float).reshape(len(panel.values), len(panel.dates))
+        return self._assemble(panel.corp_names, panel.types, values, panel.dates)
+
+    def from_rows(self, rows: List[RatioRow]) -> pd.DataFrame:
+        return pd.DataFrame([row.model_dump() for row in rows])
+
+    def to_panel(self, df: pd.DataFrame) -> dict:
+        date_cols = self.date_columns(df)
+        values = df[date_cols].to_numpy(dtype=float)
+        cells = values.astype(object)
+        cells[np.isnan(values)] = None
+        return {
+            'dates': date_cols,
+            'corp_names': df['corp_name'].tolist(),
+            'types': df['type'].tolist(),
+            'values': cells.tolist()
+        }
+
+    def to_arrow(self, df: pd.DataFrame, metadata: dict = None) -> bytes:
+        import pyarrow as pa
+
+        date_cols = self.date_columns(df)
+        arrays = [pa.array(df['corp_name'].astype(str), type=pa.string()),
+                  pa.array(df['type'].astype(str), type=pa.string())]
+        arrays += [pa.array(df[col].to_numpy(dtype=float), type=pa.float64(), from_pandas=True) for col in date_cols]
+
+        schema_metadata = {key: json.dumps(value, ensure_ascii=False) for key, value in (metadata or {}).items()}
+        table = pa.Table.from_arrays(arrays, names=META_COLUMNS + date_cols, metadata=schema_metadata or None)
+
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+
+    def from_arrow(self, body: bytes) -> tuple:
+        import pyarrow as pa
+
+        table = pa.ipc.open_stream(body).read_all()
+        metadata = {
+            key.decode(): json.loads(value)
+            for key, value in (table.schema.metadata or {}).items()
+        }
+
+        missing = [col for col in META_COLUMNS if col not in table.column_names]
+        if missing:
+            raise ValueError(f"Arrow 데이터에 필수 컬럼이 없습니다: {missing}")
+
+        date_cols = [name for name in table.column_names if name not in META_COLUMNS]
+        # 날짜 컬럼을 (행 x 날짜) 2차원 배열 하나로 모은다 (DataFrame 블록을 하나로 만들기 위해 여기서 한 번 복사된다)
+        values = np.column_stack(
+            [table.column(col).to_numpy(zero_copy_only=False) for col in date_cols]
+        ) if date_cols else np.empty((table.num_rows, 0))
+        df = self._assemble(table.column('corp_name').to_pylist(),
+                            table.column('type').to_pylist(),
+                            values,
+                            date_cols)
+        return df, metadata
+
+    def date_columns(self, df: pd.DataFrame) -> List[str]:
+        return sorted(col for col in df.columns if str(col).isdigit() and len(str(col)) == 8)
+
+    def _assemble(self, corp_names, types, values: np.ndarray, dates: List[str]) -> pd.DataFrame:
+        df = pd.DataFrame(values, columns=list(dates), copy=False)
+        df.insert(0, 'type', types)
+        df.insert(0, 'corp_name', corp_names)
+        return df
@@ -1,8 +1,13 @@
 import pandas as pd
 import re
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import List, Optional
 from app.schemas.stock import StockData
 from app.schemas.stock import VolumeFilterType, StrategyType, CandidatesType
+from app.service.frames import to_frame
+from app.core.cache import fingerprint
+from app.core.tracing import traced
 import numpy as np
 
 class StockFilterService:
@@ -35,9 +40,28 @@ class StockFilterService:
         '관리종목(소속부없음)', '투자주의환기종목(소속부없음)', '외국기업(소속부없음)'
     ]
 
+    # 유니버스 인덱스의 제외 플래그 비트
+    FLAG_ETF = 1
+    FLAG_INVERSE_LEVERAGE = 2
+    FLAG_PREFERRED = 4
+    FLAG_ETC = 8
+    FLAG_SECTOR = 16
+    FLAG_NAME_PATTERN = 32  # 이름이 '우'로 끝나거나 'HK'로 시작하는 종목
+
+    UNIVERSE_CACHE_SIZE = 16
+
     def __init__(self):
-        pass
+        self._keyword_patterns = {
+            self.FLAG_ETF: self._compile_keywords(self.FILTER_ETF),
+            self.FLAG_INVERSE_LEVERAGE: self._compile_keywords(self.FILTER_INVERSE_LEVERAGE),
+            self.FLAG_PREFERRED: self._compile_keywords(self.FILTER_PREFERRED),
+            self.FLAG_ETC: self._compile_keywords(self.FILTER_ETC),
+            self.FLAG_NAME_PATTERN: re.compile(r'우$|^HK'),
+        }
+        self._universe_cache = OrderedDict()
+        self._universe_lock = threading.Lock()
 
+    @traced('stock_filter.apply_filters')
     def apply_filters(self, stock_data: pd.DataFrame, *, 
                      etf: bool = False, 
                      inverse: bool = False, 
@@ -46,46 +70,76 @@ class StockFilterService:
                      etc: bool = False,
                      top_percent:int,
                      bottom_percent:int) -> pd.DataFrame:
-        filtered_data = stock_data.copy()
-        filter_keywords = self._get_filter_keywords(etf, inverse, preferred, etc)
-        
-        if filter_keywords:
-            filtered_data = self._apply_keyword_filters(filtered_data, filter_keywords)
+        universe = self.get_universe_index(stock_data)
+        exclude_mask = self._get_exclude_mask(etf, inverse, sector, preferred, etc)
         
-        if sector:
-            filtered_data = self._apply_sector_filter(filtered_data)
-        
-        filtered_data = filtered_data.sort_values(by='marketCap', ascending=False)
-        return filtered_data.iloc[int(len(filtered_data)*top_percent/100):int(len(filtered_data)*bottom_percent/100)]
-    
-    def _get_filter_keywords(self, etf: bool, inverse: bool, preferred: bool, etc: bool) -> List[str]:
-        keywords = []
+        filtered_data = universe[(universe['filterFlags'].to_numpy() & exclude_mask) == 0]
+        filtered_data = filtered_data.iloc[int(len(filtered_data)*top_percent/100):int(len(filtered_data)*bottom_percent/100)]
+        return filtered_data.drop(columns=['filterFlags', 'marketCapRank'])
+
+    def get_universe_index(self, stock_data: pd.DataFrame) -> pd.DataFrame:
+        """스냅샷별로 시가총액 순 정렬, 순위, 제외 플래그를 한 번만 계산해 둔다.
+
+        같은 날짜라도 장중 스냅샷은 값이 바뀌므로 날짜가 아니라 내용 해시로 구분한다.
+        """
+        key = fingerprint(stock_data)
+        with self._universe_lock:
+            cached = self._universe_cache.get(key)
+            if cached is not None:
+                self._universe_cache.move_to_end(key)
+                return cached
+
+        universe = self._build_universe_index(stock_data)
+
+        with self._universe_lock:
+            self._universe_cache[key] = universe
+            while len(self._universe_cache) > self.UNIVERSE_CACHE_SIZE:
+                self._universe_cache.popitem(last=False)
+        return universe
+
+    def _build_universe_index(self, stock_data: pd.DataFrame) -> pd.DataFrame:
+        universe = stock_data.sort_values(by='marketCap', ascending=False, kind='mergesort')
+        names = universe['stockName'].fillna('').astype(str)
+
+        flags = np.zeros(len(universe), dtype=np.int64)
+        for flag, pattern in self._keyword_patterns.items():
+            flags |= np.where(names.str.contains(pattern), flag, 0)
+        if 'sectorType' in universe.columns:
+            flags |= np.where(universe['sectorType'].isin(self.FILTER_SECTOR), self.FLAG_SECTOR, 0)
+
+        return universe.assign(
+            filterFlags=flags,
+            marketCapRank=np.arange(1, len(universe) + 1)
+        )
+
+    def _get_exclude_mask(self, etf: bool, inverse: bool, sector: bool, preferred: bool, etc: bool) -> int:
+        mask = 0
         if etf:
-            keywords.extend(self.FILTER_ETF)
+            mask |= self.FLAG_ETF
         if inverse:
-            keywords.extend(self.FILTER_INVERSE_LEVERAGE)
+            mask |= self.FLAG_INVERSE_LEVERAGE
         if preferred:
-            keywords.extend(self.FILTER_PREFERRED)
+            mask |= self.FLAG_PREFERRED
         if etc:
-            keywords.extend(self.FILTER_ETC)
-        return list(set(keywords))
-    
-    def _apply_keyword_filters(self, data: pd.DataFrame, keywords: List[str]) -> pd.DataFrame:
-        return data[~data['stockName'].apply(lambda x: 
-            any(keyword in x for keyword in keywords) or 
-            bool(re.search(r'우$', x)) or
-            bool(re.search(r'^HK', x))
-        )]
-    
-    def _apply_sector_filter(self, data: pd.DataFrame) -> pd.DataFrame:
-        return data[~data['sectorType'].isin(self.FILTER_SECTOR)]
+            mask |= self.FLAG_ETC
+        # 키워드 필터가 하나라도 켜지면 이름 패턴 필터도 함께 적용
+        if mask:
+            mask |= self.FLAG_NAME_PATTERN
+        if sector:
+            mask |= self.FLAG_SECTOR
+        return mask
+
+    def _compile_keywords(self, keywords: List[str]):
+        # 긴 키워드를 먼저 두어 하나의 정규식으로 한 번에 검사
+        return re.compile('|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
     
+    @traced('stock_filter.analyze_volume')
     def analyze_volume(self, data: List[StockData]) -> dict:
         if data is None or len(data) == 0:
             raise ValueError("데이터가 비어있습니다.")
             
         try:
-            filtered_data = pd.DataFrame([stock.model_dump() for stock in data])
+            filtered_data = to_frame(data)
                 
             if 'tradingVolume' not in filtered_data.columns:
                 raise ValueError("거래량(tradingVolume) 컬럼이 존재하지 않습니다.")
@@ -105,9 +159,10 @@ class StockFilterService:
                 raise e
             raise ValueError(f"데이터 처리 중 오류가 발생했습니다: {str(e)}")
         
+    @traced('stock_filter.apply_volume_filters')
     def apply_volume_filters(self, data: List[StockData], filter_type: VolumeFilterType) -> pd.DataFrame:
         try:
-            filtered_data = pd.DataFrame([stock.model_dump() for stock in data])
+            filtered_data = to_frame(data)
             
             if filter_type == VolumeFilterType.IQR:
                 Q1 = filtered_data['tradingVolume'].quantile(0.25)
@@ -135,9 +190,10 @@ class StockFilterService:
         except Exception as e:
             raise ValueError(f"데이터 처리 중 오류가 발생했습니다: {str(e)}")
         
+    @traced('stock_filter.calculate_cmp_data')
     def calculate_cmp_data(self, data: List[StockData], end_data: pd.DataFrame) -> pd.DataFrame:
         try:
-            filtered_data = pd.DataFrame([stock.model_dump() for stock in data])
+            filtered_data = to_frame(data)
             
             cmp_data = filtered_data.merge(end_data, on='stockCode', how='left', suffixes=('_start', '_end'))
             
@@ -146,17 +202,8 @@ class StockFilterService:
             cmp_data['marketCap_end'] = cmp_data['marketCap_end'].fillna(0)
             cmp_data['listedShares_end'] = cmp_data['listedShares_end'].fillna(0)
             
-            cmp_data["annual_return"] = cmp_data.apply(
-                lambda row: (row["closingPrice_end"] - row["closingPrice_start"]) / row["closingPrice_start"] 
-                if row["closingPrice_start"] != 0 else None, 
-                axis=1
-            )
-            
-            cmp_data["market_cap_change"] = cmp_data.apply(
-                lambda row: (row["marketCap_end"] - row["marketCap_start"]) / row["marketCap_start"]
-                if row["marketCap_start"] != 0 else None,
-                axis=1
-            )
+            cmp_data["annual_return"] = self._change_ratio(cmp_data["closingPrice_start"], cmp_data["closingPrice_end"])
+            cmp_data["market_cap_change"] = self._change_ratio(cmp_data["marketCap_start"], cmp_data["marketCap_end"])
             
             cmp_data = cmp_data.dropna(subset=['annual_return', 'market_cap_change'])
             cmp_data = cmp_data.filter(
@@ -180,12 +227,128 @@ class StockFilterService:
         except Exception as e:
             raise ValueError(f"데이터 처리 중 오류가 발생했습니다: {str(e)}")
 
+    def cmp_universe(self, data: List[StockData]) -> pd.DataFrame:
+        """calculate_cmp_data가 남길 종목을 종료일 스냅샷 없이 같은 순서로 고른다 (시작일 컬럼만).
+
+        종료일 값은 결측이면 0으로 채우므로, 수익률/시가총액 변화율이 NaN이 되어 빠지는 것은 시작 종가나 시가총액이 0/결측일 때뿐이다.
+        """
+        frame = to_frame(data)
+        valid = (frame['closingPrice'].fillna(0) != 0) & (frame['marketCap'].fillna(0) != 0)
+        return frame[valid].filter(
+            items=['stockCode', 'stockName', 'marketType', 'sectorType', 'closingPrice', 'marketCap', 'listedShares']
+            ).rename(columns={
+                'closingPrice': 'start_closingPrice',
+                'marketCap': 'start_marketCap',
+                'listedShares': 'start_listedShares'
+            })
+
+    def horizon_targets(self, start_date: str, horizons: List[int], custom_end_dates: List[str]) -> List[tuple]:
+        """(라벨, 목표일) 목록. 목표일이 시작일보다 앞서면 ValueError."""
+        targets = []
+        for months in horizons:
+            target = (pd.Timestamp(start_date) + pd.DateOffset(months=months)).strftime("%Y%m%d")
+            targets.append((f"{months}M", target))
+        for end_date in custom_end_dates:
+            if not (len(end_date) == 8 and end_date.isdigit()):
+                raise ValueError(f"종료일({end_date})은 YYYYMMDD 형식이어야 합니다.")
+            targets.append((end_date, end_date))
+
+        before_start = [label for label, target in targets if target < start_date]
+        if before_start:
+            raise ValueError(f"종료일이 시작일({start_date})보다 앞선 기간이 있습니다: {before_start}")
+        return targets
+
+    @traced('stock_filter.calculate_horizon_cmp')
+    def calculate_horizon_cmp(self, data: List[StockData], price_panel: pd.DataFrame, start_date: str,
+                              horizons: Optional[List[int]] = None, custom_end_dates: Optional[List[str]] = None) -> tuple:
+        """저장된 종가 패널에서 여러 기간(개월 수, 사용자 지정 종료일)의 수익률과 시가총액 변화율을 한 번에 계산한다.
+
+        horizons를 주지 않으면 1/3/6/12개월이다. 시가총액은 시작 시점 상장주식수 x 종료 시점 종가로 추정한다.
+        """
+        horizons = [1, 3, 6, 12] if horizons is None else horizons
+        custom_end_dates = [] if custom_end_dates is None else custom_end_dates
+        if data is None or len(data) == 0:
+            raise ValueError("데이터가 비어있습니다.")
+
+        try:
+            start_data = to_frame(data)
+
+            date_cols = sorted(col for col in price_panel.columns if str(col).isdigit() and len(str(col)) == 8)
+            if not date_cols:
+                raise ValueError("주가 패널에 날짜 컬럼이 없습니다.")
+
+            targets = self.horizon_targets(start_date, horizons, custom_end_dates)
+
+            # 각 기간의 종료일: 목표일 이전의 마지막 거래일. 목표일이 패널 마지막 날짜보다 뒤면
+            # 마지막 날짜로 당기지 않고 종료일 없음(수익률 None)으로 둔다
+            date_values = np.array(date_cols, dtype=np.int64)
+            target_values = np.array([int(target) for _, target in targets], dtype=np.int64)
+            end_idx = np.searchsorted(date_values, target_values, side='right') - 1
+            end_idx[target_values > date_values[-1]] = -1
+            horizon_info = [
+                {'label': label, 'target_date': target, 'end_date': date_cols[idx] if idx >= 0 else None}
+                for (label, target), idx in zip(targets, end_idx)
+            ]
+
+            # 거래정지 등 결측일은 직전 종가로 채운 뒤 (종목 x 기간) 행렬로 한 번에 계산
+            panel = price_panel.drop_duplicates(subset='stockCode').set_index('stockCode')[date_cols]
+            panel = panel.reindex(start_data['stockCode']).ffill(axis=1).to_numpy(dtype=float)
+            end_prices = np.full((len(start_data), len(targets)), np.nan)
+            has_end = end_idx >= 0
+            end_prices[:, has_end] = panel[:, end_idx[has_end]]
+
+            start_prices = start_data['closingPrice'].to_numpy(dtype=float)[:, None]
+            start_caps = start_data['marketCap'].to_numpy(dtype=float)[:, None]
+            shares = start_data['listedShares'].to_numpy(dtype=float)[:, None]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.where(start_prices != 0, (end_prices - start_prices) / start_prices, np.nan)
+                end_caps = end_prices * shares
+                cap_changes = np.where(start_caps != 0, (end_caps - start_caps) / start_caps, np.nan)
+
+            labels = [info['label'] for info in horizon_info]
+            result = start_data.filter(items=['stockCode', 'stockName', 'marketType', 'sectorType']).assign(
+                start_closingPrice=start_data['closingPrice'],
+                start_marketCap=start_data['marketCap'],
+                start_listedShares=start_data['listedShares'],
+                returns=self._rows_to_dicts(labels, returns),
+                market_cap_changes=self._rows_to_dicts(labels, cap_changes)
+            )
+
+            annual_return_analysis = {}
+            market_cap_change_analysis = {}
+            for i, label in enumerate(labels):
+                annual_return_analysis[label] = self._calculate_histogram_or_none(returns[:, i])
+                market_cap_change_analysis[label] = self._calculate_histogram_or_none(cap_changes[:, i])
+
+            return result, horizon_info, annual_return_analysis, market_cap_change_analysis
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"데이터 처리 중 오류가 발생했습니다: {str(e)}")
+
+    def _change_ratio(self, start: pd.Series, end: pd.Series) -> pd.Series:
+        # 시작값이 0이면 변화율을 정의할 수 없으므로 NaN
+        return (end - start) / start.where(start != 0)
+
+    def _rows_to_dicts(self, labels: List[str], values: np.ndarray) -> List[dict]:
+        cells = values.astype(object)
+        cells[np.isnan(values)] = None
+        return [dict(zip(labels, row)) for row in cells.tolist()]
+
+    def _calculate_histogram_or_none(self, values: np.ndarray):
+        series = pd.Series(values).dropna()
+        if series.empty:
+            return None
+        return self._calculate_histogram(series)
+
+    @traced('stock_filter.select_candidates')
     def select_candidates(self, data: List[StockData], candidates_type: CandidatesType, strategy_type: StrategyType) -> List[StockData]:
-        if not data:
+        if data is None or len(data) == 0:
             raise ValueError("데이터가 비어있습니다.")
 
         try:
-            candidates = pd.DataFrame([stock.model_dump() for stock in data])
+            candidates = to_frame(data)
 
             start_percent = None
             end_percent = None
@@ -0,0 +1,50 @@
+"""CPU 실행기(프로세스 풀)에서 돌리는 작업들.
+
+프로세스 풀로 보낼 수 있도록 모두 모듈 수준 함수이며, 서비스 객체는 각 워커 프로세스에서 한 번만 만든다.
+"""
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from app.service.invest_idx import InvestIdxService
+from app.service.back_test import BackTestService
+from app.service.dart_api import DartApi
+
+invest_idx_service = InvestIdxService()
+backtest_service = BackTestService()
+
+
+# 아래 두 작업의 캐시는 부모 프로세스가 본다 (runtime.run_cpu_cached). 자식마다 따로 캐시하지 않도록 uncached로 계산한다.
+def create_company_analysis_dataframe(data: pd.DataFrame, financial_statements: List[dict]) -> pd.DataFrame:
+    return invest_idx_service.create_company_analysis_dataframe.uncached(invest_idx_service, data, financial_statements)
+
+
+def analysis_invest_idx(data: pd.DataFrame) -> Dict[str, Any]:
+    return invest_idx_service._analysis_invest_idx.uncached(invest_idx_service, data)
+
+
+def company_analysis_rows(data: pd.DataFrame, financial_dict: Dict[str, Any]) -> List[list]:
+    """스트리밍 투자지표 생성(stream_company_analysis_dataframe)에서 모인 기업들의 분석 행을 입력 순서대로 계산한다."""
+    return [invest_idx_service._process_company_analysis(row, financial_dict) for _, row in data.iterrows()]
+
+
+def run_monthly_rebalancing_backtest(data: pd.DataFrame, initial_capital: int, top_n: int,
+                                     screening_criteria: Dict[str, Any]) -> Dict[str, Any]:
+    return backtest_service.run_monthly_rebalancing_backtest(data, initial_capital, top_n, screening_criteria)
+
+
+# 분산 워커(python -m app.worker)가 샤드 종류별로 부르는 작업. 큐를 다시 거치지 않도록 서비스의 로컬 경로를 직접 쓴다.
+def corp_statement_shard(payload) -> List[dict]:
+    data, start_date, end_date = payload
+    return DartApi().statement_shard(data, start_date, end_date)
+
+
+def ratio_rows_shard(payload):
+    data, financial_dict = payload
+    return invest_idx_service.analysis_rows(data, financial_dict)
+
+
+SHARD_TASKS = {
+    'corp_statement': corp_statement_shard,
+    'ratio_rows': ratio_rows_shard,
+}
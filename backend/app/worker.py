@@ -0,0 +1,132 @@
+"""샤드 작업 큐(WORKER_QUEUE_URL)에서 재무제표 조회/비율 계산 샤드를 가져와 처리하는 워커.
+
+사용법 (backend 디렉터리에서, API 서버와 같은 WORKER_QUEUE_URL을 보게 한다):
+
+    WORKER_QUEUE_URL=sqlite:////dev/shm/quantus-queue.db python -m app.worker --processes 4
+    python -m app.worker --queue redis://queue-host:6379/0 --processes 8     # 다른 호스트에서
+
+API 서버는 기업 수가 WORKER_MIN_ITEMS 이상일 때만 큐에 샤드를 넣고, 샤드 순서대로 결과를 기다린다.
+워커가 하나도 없으면 요청은 WORKER_JOB_TIMEOUT_SECONDS 뒤 실패하므로 API 서버보다 먼저 띄운다.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from app.core.log import configure_logging, stop_logging
+
+logger = logging.getLogger("app.worker")
+
+
+def _heartbeat(queue, task, worker: str, lease_seconds: float, done: threading.Event):
+    # 샤드가 리스보다 오래 걸려도 다른 워커가 가져가지 않도록 1/3마다 연장한다
+    while not done.wait(lease_seconds / 3):
+        try:
+            queue.heartbeat(task.id, worker, lease_seconds)
+        except Exception as e:
+            logger.warning(f"리스 연장 실패 ({task.id}): {str(e)}")
+
+
+def run_worker(queue_url: str, poll_seconds: float = 1.0, max_tasks: int = 0, stopped=None) -> int:
+    """큐가 빌 때까지 기다리며 샤드를 하나씩 처리한다. max_tasks > 0이면 그만큼 처리하고 끝낸다."""
+    from app.core import workqueue
+    from app.core.config import settings
+    from app.service.tasks import SHARD_TASKS
+
+    queue = workqueue.create_work_queue(queue_url)
+    # 샤드 작업이 서비스 쪽 분산 경로로 다시 들어가지 않도록 이 프로세스에서는 큐를 끈다
+    workqueue.configure_work_queue(None)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    lease_seconds = settings.WORKER_LEASE_SECONDS
+    stopped = stopped or threading.Event()
+    processed = 0
+    logger.info(f"워커 시작: {worker} ({queue_url})")
+
+    while not stopped.is_set() and (not max_tasks or processed < max_tasks):
+        task = queue.claim(worker, lease_seconds)
+        if task is None:
+            stopped.wait(poll_seconds)
+            continue
+
+        if task.attempts > settings.WORKER_MAX_ATTEMPTS:
+            # 리스가 끝나 다시 잡힌 샤드 (처리 중 워커가 죽었다)
+            queue.fail(task.id, f"워커가 {task.attempts - 1}번 응답 없이 사라졌습니다", settings.WORKER_MAX_ATTEMPTS)
+            logger.error(f"샤드 포기 {task.id}: 재시도 한도 초과")
+            continue
+
+        handler = SHARD_TASKS.get(task.kind)
+        if handler is None:
+            queue.fail(task.id, f"알 수 없는 샤드 종류입니다: {task.kind}", 0)
+            logger.error(f"알 수 없는 샤드 종류 {task.kind} ({task.id})")
+            continue
+
+        done = threading.Event()
+        threading.Thread(target=_heartbeat, args=(queue, task, worker, lease_seconds, done), daemon=True).start()
+        started = time.perf_counter()
+        try:
+            result = handler(workqueue.loads(task.payload))
+            queue.complete(task.id, workqueue.dumps(result))
+            logger.info("샤드 완료 %s (%s, %d번째 시도, %.1f초)", task.id, task.kind, task.attempts, time.perf_counter() - started)
+        except Exception as e:
+            retry = queue.fail(task.id, f"{type(e).__name__}: {str(e)}", settings.WORKER_MAX_ATTEMPTS)
+            logger.exception(f"샤드 실패 {task.id} ({task.attempts}번째 시도, {'다시 시도' if retry else '포기'}): {str(e)}")
+        finally:
+            done.set()
+        processed += 1
+
+    logger.info(f"워커 종료: {worker} (처리한 샤드 {processed}개)")
+    return processed
+
+
+def _process_main(queue_url: str, poll_seconds: float):
+    configure_logging()
+    stopped = threading.Event()
+    # 처리 중인 샤드는 끝내고 멈춘다 (끝내지 못하면 리스가 끝난 뒤 다른 워커가 가져간다)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+    run_worker(queue_url, poll_seconds, stopped=stopped)
+    # multiprocessing 자식은 atexit를 거치지 않으므로 남은 로그를 직접 비운다
+    stop_logging()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app.worker', description='재무제표/비율 계산 샤드 워커')
+    parser.add_argument('--queue', help='작업 큐 주소 (기본: WORKER_QUEUE_URL)')
+    parser.add_argument('--processes', type=int, default=1, help='워커 프로세스 수')
+    parser.add_argument('--poll', type=float, default=1.0, help='큐가 비었을 때 다시 확인하는 간격(초)')
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    from app.core.config import settings
+
+    queue_url = args.queue or settings.WORKER_QUEUE_URL
+    if not queue_url:
+        parser.error('--queue 또는 WORKER_QUEUE_URL이 필요합니다')
+
+    if args.processes <= 1:
+        _process_main(queue_url, args.poll)
+        return 0
+
+    processes = [multiprocessing.Process(target=_process_main, args=(queue_url, args.poll), name=f'worker-{index}')
+                 for index in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    def _forward(signum, _frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, _forward)
+
+    for process in processes:
+        process.join()
+    return 0 if all(process.exitcode == 0 for process in processes) else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
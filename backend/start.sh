@@ -0,0 +1,21 @@
+#!/bin/sh
+set -e
+
+# ENVIRONMENT=local(기본값)이면 개발용 단일 프로세스 + --reload
+if [ "${ENVIRONMENT:-local}" = "local" ]; then
+  exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+fi
+
+# 운영 모드: 워커 N개가 /dev/shm의 공유 캐시(주가 패널, 기업 코드, 시세 스냅샷, artifact)를 함께 쓴다
+CORES=$(nproc)
+WORKERS=${WEB_CONCURRENCY:-$CORES}
+export CACHE_DIR=${CACHE_DIR:-/dev/shm/quantus-cache}
+
+# 워커마다 CPU 프로세스 풀을 띄우므로 코어를 워커 수로 나눠 쓴다
+if [ -z "$CPU_WORKERS" ]; then
+  CPU_WORKERS=$((CORES / WORKERS))
+  [ "$CPU_WORKERS" -lt 1 ] && CPU_WORKERS=1
+  export CPU_WORKERS
+fi
+
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
@@ -0,0 +1,32 @@
+import os
+
+# 테스트는 프로세스 풀 없이(CPU 실행기 = 스레드 하나) 프로세스 안 캐시로 돌린다
+os.environ.setdefault("CPU_WORKERS", "0")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("CACHE_DIR", "")
+
+import pytest
+
+from app.core import cache
+
+
+@pytest.fixture
+def shared_cache():
+    """테스트마다 새 MemoryCache를 shared_cache로 쓰고 끝나면 되돌린다."""
+    previous = cache.shared_cache
+    backend = cache.MemoryCache(max_entries=128, max_bytes=64 * 1024 * 1024)
+    cache.configure_cache(backend)
+    yield backend
+    cache.configure_cache(previous)
+
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    import fakeredis
+    return fakeredis.FakeRedis(server=redis_server)
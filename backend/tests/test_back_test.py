@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.service.back_test import BackTestService
+
+METRICS = {'PER': 10.0, 'PBR': 1.0, 'ROE': 15.0, 'ROA': 8.0, '영업이익률': 12.0, '부채비율': 80.0}
+# 월말 종가 기준 월별 수익률(%). 모든 종목이 같은 비율로 움직인다
+MONTHLY_GROWTH = [10.0, -5.0, 20.0]
+MONTH_DATES = [['20230103', '20230131'], ['20230201', '20230228'], ['20230302', '20230331'], ['20230403', '20230428']]
+
+
+def _backtest_data(stocks: int = 12) -> pd.DataFrame:
+    dates = [date for month in MONTH_DATES for date in month]
+    month_end_prices = np.cumprod([1000.0] + [1 + growth / 100 for growth in MONTHLY_GROWTH])
+    prices = {date: month_end_prices[month] for month, days in enumerate(MONTH_DATES) for date in days}
+
+    rows = []
+    for index in range(stocks):
+        name = f"종목{index:02d}"
+        for metric, value in METRICS.items():
+            rows.append({'종목명': name, '구분': metric, **{date: value + index for date in dates}})
+        rows.append({'종목명': name, '구분': 'closingPrice', **prices})
+    return pd.DataFrame(rows)
+
+
+def test_rebalances_month_to_next_month(monkeypatch):
+    service = BackTestService()
+    periods = []
+    calculate = service._calculate_monthly_returns
+
+    def record(data, portfolio, start_date, end_date):
+        periods.append((start_date, end_date))
+        return calculate(data, portfolio, start_date, end_date)
+
+    monkeypatch.setattr(service, '_calculate_monthly_returns', record)
+    criteria = {'PER': [0, 100], 'PBR': [0, 100], 'ROE': [0, 100]}
+    result = service.run_monthly_rebalancing_backtest(_backtest_data(), 1_000_000, 5, criteria)
+
+    month_ends = [days[-1] for days in MONTH_DATES]
+    assert result['rebalancing_dates'] == month_ends
+    # 각 월은 바로 다음 리밸런싱 날짜까지 보유하고, 마지막 월은 수익률을 계산하지 않는다
+    assert periods == list(zip(month_ends, month_ends[1:]))
+    assert result['monthly_returns'] == pytest.approx(MONTHLY_GROWTH)
+    assert len(result['monthly_portfolios']) == len(MONTHLY_GROWTH)
+    assert all(len(portfolio) == 5 for portfolio in result['monthly_portfolios'])
+    expected_total = (np.prod([1 + growth / 100 for growth in MONTHLY_GROWTH]) - 1) * 100
+    assert result['total_return'] == pytest.approx(expected_total)
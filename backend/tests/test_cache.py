@@ -0,0 +1,163 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core import cache
+from app.core.cache import DiskCache, MemoryCache, RedisCache, cached
+
+
+class FailingRedis:
+    """모든 명령이 연결 오류를 내는 Redis 클라이언트."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("redis down")
+        return fail
+
+
+def _concurrent(count: int, func):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(index):
+        barrier.wait()
+        results[index] = func()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _slow_loader(calls: list, value):
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return value
+    return loader
+
+
+def test_redis_roundtrip(redis_client):
+    backend = RedisCache(prefix='test', client=redis_client)
+    frame = pd.DataFrame({'stockCode': ['000001', '000002'], 'close': [1.5, 2.5]})
+
+    backend.set(('panel', 2023), frame, ttl=60)
+    pd.testing.assert_frame_equal(backend.get(('panel', 2023)), frame)
+    assert 0 < redis_client.ttl(backend._key(('panel', 2023))) <= 60
+
+    backend.delete(('panel', 2023))
+    assert backend.get(('panel', 2023), 'missing') == 'missing'
+
+
+def test_redis_errors_fall_through():
+    backend = RedisCache(prefix='test', client=FailingRedis())
+
+    backend.set(('ns', 1), 'value')
+    backend.delete(('ns', 1))
+    assert backend.get(('ns', 1), 'missing') == 'missing'
+    # 락을 잡지 못해도 직접 계산해 돌려준다
+    assert backend.get_or_set(('ns', 1), lambda: 'computed') == 'computed'
+
+
+@pytest.mark.parametrize('backend_name', ['memory', 'redis'])
+def test_get_or_set_computes_once(backend_name, redis_client):
+    if backend_name == 'memory':
+        backend = MemoryCache(max_entries=16, max_bytes=1024 * 1024)
+    else:
+        backend = RedisCache(prefix='test', client=redis_client)
+    calls = []
+
+    results = _concurrent(6, lambda: backend.get_or_set(('ns', 'key'), _slow_loader(calls, 42), ttl=60))
+
+    assert results == [42] * 6
+    assert len(calls) == 1
+    assert backend.stats()['ns']['misses'] == 1
+
+
+def test_redis_fill_lock_across_servers(redis_server):
+    import fakeredis
+    # 같은 Redis를 보는 두 API 서버
+    first = RedisCache(prefix='test', client=fakeredis.FakeRedis(server=redis_server))
+    second = RedisCache(prefix='test', client=fakeredis.FakeRedis(server=redis_server))
+    calls = []
+
+    def fill(backend):
+        return lambda: backend.get_or_set(('ns', 'key'), _slow_loader(calls, 'value'), ttl=60)
+
+    thread = threading.Thread(target=fill(first))
+    thread.start()
+    time.sleep(0.05)
+    assert fill(second)() == 'value'
+    thread.join()
+
+    assert len(calls) == 1
+    assert not first.client.exists(first._key(('ns', 'key')) + ':lock')
+
+
+def test_cached_decorator(shared_cache):
+    calls = []
+
+    class Service:
+        @cached('square', ttl=60, should_cache=lambda result, self, value: result >= 0)
+        def square(self, value):
+            calls.append(value)
+            return value * value if value >= 0 else -1
+
+    service = Service()
+    assert service.square(3) == 9
+    assert service.square(3) == 9
+    assert calls == [3]
+
+    # should_cache가 False인 결과는 저장하지 않는다
+    service.square(-2)
+    service.square(-2)
+    assert calls == [3, -2, -2]
+
+    key = Service.square.cache_key(service, 3)
+    assert key[0] == 'square'
+    assert shared_cache.get(key) == 9
+    assert Service.square.uncached(service, 4) == 16
+
+
+def test_disk_cache_evicts_to_size_bound(tmp_path):
+    backend = DiskCache(str(tmp_path), max_bytes=200_000, sweep_seconds=0, max_attached=2)
+    for index in range(20):
+        backend.set(('panel', index), pd.DataFrame({'close': np.arange(5000, dtype='float64') + index}), ttl=3600)
+        time.sleep(0.01)
+
+    total = sum(path.stat().st_size for path in tmp_path.rglob('*') if path.is_file())
+    assert total <= 200_000
+    assert backend.get(('panel', 0)) is None
+    assert backend.get(('panel', 19))['close'].iloc[0] == 19
+    # 밀려난 항목은 .npy도 함께 지워진다
+    assert all(path.with_suffix('.pkl').exists() for path in tmp_path.rglob('*.npy'))
+
+
+def test_disk_cache_expiry_and_attached_bound(tmp_path):
+    backend = DiskCache(str(tmp_path), max_bytes=10 ** 9, sweep_seconds=3600, max_attached=2)
+    backend.set(('ns', 'short'), 'value', ttl=1)
+    time.sleep(1.1)
+    assert backend.get(('ns', 'short')) is None
+    assert not list(tmp_path.rglob('*.pkl'))
+
+    for index in range(5):
+        backend.set(('panel', index), pd.DataFrame({'close': np.arange(100.0)}), ttl=60)
+        backend.get(('panel', index))
+    assert len(backend._attached) == 2
+
+
+def test_disk_cache_write_failure_falls_through(tmp_path, monkeypatch):
+    backend = DiskCache(str(tmp_path), max_bytes=10 ** 9, sweep_seconds=3600)
+
+    def full(value):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(cache, '_dumps', full)
+    backend.set(('ns', 'key'), 'value', ttl=60)
+    assert backend.get(('ns', 'key')) is None
+    assert backend.get_or_set(('ns', 'key'), lambda: 'computed') == 'computed'
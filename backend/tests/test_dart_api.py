@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from app.service import dart_api as dart_module
+from app.service.dart_api import DartApi
+
+CODES = [f"{index:06d}" for index in range(8)]
+
+
+@pytest.fixture
+def fake_dart(monkeypatch):
+    """기업 코드 목록과 기업별 조회를 가짜로 바꾼다. 뒤에 있는 기업일수록 먼저 끝난다."""
+    corp_codes = pd.DataFrame({'corp_code': [f"C{code}" for code in CODES],
+                               'corp_name': [f"기업{code}" for code in CODES],
+                               'stock_code': CODES})
+
+    def background_task(self, corp_code, corp_name, quarter_info):
+        time.sleep(0.02 * (len(CODES) - CODES.index(corp_code[1:])))
+        if corp_name == '기업000003':
+            return None, None
+        return corp_name, pd.DataFrame({'corp': [corp_name]})
+
+    monkeypatch.setattr(DartApi, '_get_corp_code', lambda self: corp_codes)
+    monkeypatch.setattr(DartApi, '_build_quarter_info', lambda self, start_date, end_date: [])
+    monkeypatch.setattr(DartApi, '_background_task', background_task)
+    monkeypatch.setattr(DartApi, '_build_statement_result',
+                        lambda self, corp_name, df, quarter_info: None if df is None else {'corp_name': corp_name})
+
+
+def _data(codes=CODES) -> pd.DataFrame:
+    return pd.DataFrame({'stockCode': codes})
+
+
+def test_statement_shard_keeps_input_order(fake_dart):
+    before = dart_module._pending_statements.value
+    statements = DartApi().statement_shard(_data(), '20230102', '20231228')
+
+    # 공시가 없는 기업은 빠지고 나머지는 입력 순서 그대로
+    assert [statement['corp_name'] for statement in statements] == [f"기업{code}" for code in CODES if code != '000003']
+    assert dart_module._pending_statements.value == before
+
+
+def test_iter_corp_statement_yields_as_completed(fake_dart):
+    names = [statement['corp_name'] for statement in DartApi().iter_corp_statement(_data(), '20230102', '20231228')]
+    # 입력 순서가 아니라 조회가 먼저 끝난 기업부터 나온다
+    assert names != sorted(names)
+    assert sorted(names) == [f"기업{code}" for code in CODES if code != '000003']
+
+
+def test_statement_shard_cancels_remaining_on_error(fake_dart, monkeypatch):
+    codes = [f"{index:06d}" for index in range(40)]
+    calls = []
+    corp_codes = pd.DataFrame({'corp_code': [f"C{code}" for code in codes],
+                               'corp_name': [f"기업{code}" for code in codes], 'stock_code': codes})
+    release = threading.Event()
+
+    def background_task(self, corp_code, corp_name, quarter_info):
+        calls.append(corp_name)
+        if corp_name == '기업000000':
+            raise RuntimeError("DART 오류")
+        release.wait(1)
+        return corp_name, pd.DataFrame({'corp': [corp_name]})
+
+    monkeypatch.setattr(DartApi, '_get_corp_code', lambda self: corp_codes)
+    monkeypatch.setattr(DartApi, '_background_task', background_task)
+    before = dart_module._pending_statements.value
+
+    with pytest.raises(RuntimeError):
+        DartApi().statement_shard(_data(codes), '20230102', '20231228')
+    release.set()
+
+    # 실행 중이던 조회만 끝나고 나머지는 취소된다
+    assert len(calls) < len(codes)
+    assert dart_module._pending_statements.value == before
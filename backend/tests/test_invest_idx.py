@@ -0,0 +1,59 @@
+import random
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+
+from app.bench.synthetic import SyntheticMarket
+from app.service.invest_idx import InvestIdxService
+
+
+@pytest.fixture(scope='module')
+def market():
+    return SyntheticMarket(stocks=40, years=1, seed=3)
+
+
+def _done(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _shuffled(statements, seed: int):
+    statements = list(statements)
+    random.Random(seed).shuffle(statements)
+    return statements
+
+
+def test_ratio_panel_key_ignores_statement_order(market):
+    service = InvestIdxService()
+    wrapper = InvestIdxService.create_company_analysis_dataframe
+    range_info, statements = market.range_info(), market.statements()
+
+    assert wrapper.cache_key(service, range_info, statements) == wrapper.cache_key(service, range_info, _shuffled(statements, 1))
+    assert wrapper.cache_key(service, range_info, statements) != wrapper.cache_key(service, range_info, statements[1:])
+
+
+def test_stream_fills_ratio_panel_cache(market, shared_cache):
+    service = InvestIdxService()
+    range_info, statements = market.range_info(), market.statements()
+
+    # 조회가 끝나는 순서로 도착한 재무제표로 만든 패널을 같은 입력의 일괄 계산이 그대로 쓴다
+    streamed = service.stream_company_analysis_dataframe(_done(range_info), iter(_shuffled(statements, 2)))
+    assert not streamed.empty
+    assert shared_cache.stats()['ratio_panel'] == {'hits': 0, 'misses': 1, 'hit_ratio': 0.0}
+
+    batch = service.create_company_analysis_dataframe(range_info, _shuffled(statements, 3))
+    pd.testing.assert_frame_equal(batch, streamed)
+    assert shared_cache.stats()['ratio_panel']['hits'] == 1
+
+
+def test_stream_uses_cached_ratio_panel(market, shared_cache):
+    service = InvestIdxService()
+    range_info, statements = market.range_info(), market.statements()
+
+    batch = service.create_company_analysis_dataframe(range_info, statements)
+    streamed = service.stream_company_analysis_dataframe(_done(range_info), iter(_shuffled(statements, 4)))
+
+    assert streamed is batch
+    assert shared_cache.stats()['ratio_panel'] == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
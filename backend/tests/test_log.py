@@ -0,0 +1,35 @@
+import logging
+
+from app.core.log import RateLimitFilter
+
+
+def _record(message: str, lineno: int = 10, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord('app.test', level, '/app/test.py', lineno, message, None, None)
+
+
+def test_rate_limit_groups_formatted_messages_by_call_site():
+    limiter = RateLimitFilter(rate=0.001, burst=3)
+
+    # 같은 자리의 f-string 로그는 내용이 달라도 한 버킷을 쓴다
+    passed = [limiter.filter(_record(f"{day} 데이터 조회 성공")) for day in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    assert len(limiter._buckets) == 1
+
+    assert limiter.filter(_record("다른 자리", lineno=20))
+    assert limiter.filter(_record("경고는 항상 통과", level=logging.WARNING))
+
+
+def test_rate_limit_buckets_are_bounded():
+    limiter = RateLimitFilter(rate=0.001, burst=1, max_buckets=8)
+    for lineno in range(100):
+        limiter.filter(_record("로그", lineno=lineno))
+    assert len(limiter._buckets) == 8
+
+
+def test_rate_limit_drops_idle_buckets():
+    limiter = RateLimitFilter(rate=1000, burst=1)
+    limiter.filter(_record("첫 번째", lineno=1))
+    # burst / rate초가 지나면 첫 버킷은 새 버킷과 같으므로 다음 새 버킷을 만들 때 지운다
+    limiter._buckets[next(iter(limiter._buckets))][1] -= 1
+    limiter.filter(_record("두 번째", lineno=2))
+    assert [key[2] for key in limiter._buckets] == [2]
@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from app.core.cache import cached
+from app.core.runtime import call_cpu_cached, run_cpu_cached
+
+
+def slow_square(value):
+    time.sleep(0.2)
+    return value * value
+
+
+class SquareService:
+    @cached('square', ttl=60)
+    def square(self, value):
+        return slow_square(value)
+
+
+def test_run_cpu_cached_computes_once(shared_cache):
+    service = SquareService()
+
+    async def stampede():
+        return await asyncio.gather(*(run_cpu_cached(service.square, slow_square, 7) for _ in range(5)))
+
+    assert asyncio.run(stampede()) == [49] * 5
+    assert shared_cache.stats()['square'] == {'hits': 4, 'misses': 1, 'hit_ratio': 0.8}
+    assert shared_cache.get(SquareService.square.cache_key(service, 7)) == 49
+
+
+def test_call_cpu_cached_outside_event_loop(shared_cache):
+    service = SquareService()
+
+    # 이벤트 루프 밖(배치, 워커)에서는 그 자리에서 계산하고 같은 키로 저장한다
+    assert call_cpu_cached(service.square, slow_square, 3) == 9
+    assert service.square(3) == 9
+    assert shared_cache.stats()['square']['misses'] == 1
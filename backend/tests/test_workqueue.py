@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from app.core import workqueue
+from app.core.workqueue import RedisQueue, ShardJobError, SqliteQueue, dumps, loads
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def queue(request, tmp_path):
+    if request.param == 'sqlite':
+        return SqliteQueue(str(tmp_path / 'queue.db'))
+    fakeredis = pytest.importorskip('fakeredis')
+    return RedisQueue(prefix='test', client=fakeredis.FakeRedis())
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(workqueue, '_backoff', lambda attempts: 0)
+
+
+def test_claim_in_shard_order(queue):
+    queue.submit('job', 'double', [dumps(1), dumps(2)])
+
+    first = queue.claim('w1', lease_seconds=30)
+    second = queue.claim('w2', lease_seconds=30)
+    assert (first.index, first.attempts, loads(first.payload)) == (0, 1, 1)
+    assert (second.index, second.kind) == (1, 'double')
+    assert queue.claim('w3', lease_seconds=30) is None
+    assert queue.progress('job', 2) == {'total': 2, 'pending': 0, 'running': 2, 'done': 0, 'failed': 0}
+
+
+def test_expired_lease_is_reclaimed(queue):
+    queue.submit('job', 'double', [dumps(1)])
+    task = queue.claim('w1', lease_seconds=0.05)
+
+    # 리스를 연장하는 동안에는 다른 워커가 가져가지 못한다
+    queue.heartbeat(task.id, 'w1', lease_seconds=30)
+    time.sleep(0.1)
+    assert queue.claim('w2', lease_seconds=30) is None
+
+    queue.heartbeat(task.id, 'w1', lease_seconds=0.05)
+    time.sleep(0.1)
+    reclaimed = queue.claim('w2', lease_seconds=30)
+    assert (reclaimed.id, reclaimed.attempts) == (task.id, 2)
+
+
+def test_failed_shard_retries_until_max_attempts(queue, no_backoff):
+    queue.submit('job', 'double', [dumps(1)])
+
+    task = queue.claim('w1', lease_seconds=30)
+    assert queue.fail(task.id, 'boom', max_attempts=2)
+    assert queue.states('job', 1) == [('pending', 'boom')]
+
+    task = queue.claim('w1', lease_seconds=30)
+    assert task.attempts == 2
+    assert not queue.fail(task.id, 'boom again', max_attempts=2)
+    assert queue.states('job', 1) == [('failed', 'boom again')]
+    assert queue.claim('w1', lease_seconds=30) is None
+
+
+def test_resubmit_is_idempotent(queue, no_backoff):
+    queue.submit('job', 'double', [dumps(1), dumps(2)])
+    task = queue.claim('w1', lease_seconds=30)
+    queue.complete(task.id, dumps(2))
+
+    # 같은 작업을 다시 넣어도 끝난 샤드는 그대로, 실행 중인 샤드는 새로 생기지 않는다
+    queue.submit('job', 'double', [dumps(1), dumps(2)])
+    assert [status for status, _ in queue.states('job', 2)] == ['done', 'pending']
+    assert loads(queue.result('job', 0)) == 2
+    assert queue.claim('w1', lease_seconds=30).index == 1
+    assert queue.claim('w1', lease_seconds=30) is None
+
+    # 늦게 끝난 중복 실행은 먼저 끝난 결과를 덮지 않는다
+    queue.complete(task.id, dumps(99))
+    assert loads(queue.result('job', 0)) == 2
+
+
+def test_resubmit_restarts_failed_shards(queue, no_backoff):
+    queue.submit('job', 'double', [dumps(1)])
+    task = queue.claim('w1', lease_seconds=30)
+    queue.fail(task.id, 'boom', max_attempts=1)
+    assert queue.states('job', 1) == [('failed', 'boom')]
+
+    queue.submit('job', 'double', [dumps(1)])
+    assert queue.states('job', 1) == [('pending', None)]
+    assert queue.claim('w1', lease_seconds=30).attempts == 1
+
+
+def _serve(queue, stopped: threading.Event, fail_index: int = -1):
+    while not stopped.is_set():
+        task = queue.claim('worker', lease_seconds=30)
+        if task is None:
+            time.sleep(0.01)
+        elif task.index == fail_index:
+            queue.fail(task.id, 'boom', max_attempts=1)
+        else:
+            queue.complete(task.id, dumps(loads(task.payload) * 2))
+
+
+@pytest.mark.parametrize('fail_index', [-1, 1])
+def test_run_sharded_gathers_in_order(queue, monkeypatch, fail_index):
+    monkeypatch.setattr(workqueue, 'work_queue', queue)
+    stopped = threading.Event()
+    worker = threading.Thread(target=_serve, args=(queue, stopped, fail_index))
+    worker.start()
+    try:
+        if fail_index < 0:
+            assert list(workqueue.run_sharded('double', [1, 2, 3], timeout=10)) == [2, 4, 6]
+        else:
+            with pytest.raises(ShardJobError):
+                list(workqueue.run_sharded('double', [1, 2, 3], timeout=10))
+    finally:
+        stopped.set()
+        worker.join()